@@ -0,0 +1,255 @@
+#!/usr/local/bin/python3.12
+#
+# Benchmark of webcrawler.py against synthetic trust.txt ecosystems served by a local HTTP server, without touching the internet.
+#
+# Name - bench_crawl.py
+# Synopsis - bench_crawl.py [-n COUNTS] [-f FANOUT] [-x CROSSLINKS] [--notfound FRACTION] [--wellknown FRACTION] [--html FRACTION]
+#            [--redirect FRACTION] [--slow FRACTION] [--delay SECONDS] [--seed SEED] [-k] [-- WEBCRAWLER_ARGS ...]
+#   -n COUNTS - optional, comma separated numbers of domains in the ecosystems to crawl, one after another. Default is 1000.
+#   -f FANOUT - optional, the number of "member" domains of each domain. Default is 4.
+#   -x CROSSLINKS - optional, the number of "control" and "vendor" references from each domain to random others. Default is 1.
+#   --notfound FRACTION - optional, the fraction of domains whose trust.txt file is not found at either url. Default is 0.05.
+#   --wellknown FRACTION - optional, the fraction found only at "/.well-known/trust.txt". Default is 0.1.
+#   --html FRACTION - optional, the fraction that return an HTML page instead. Default is 0.05.
+#   --redirect FRACTION - optional, the fraction that redirect to another domain. Default is 0.05.
+#   --slow FRACTION - optional, the fraction that are served after a delay of SECONDS. Default is 0.01.
+#   --delay SECONDS - optional, the delay of the slow domains. Default is 0.5.
+#   --seed SEED - optional, the seed of the ecosystem. Default is 2021.
+#   -k, --keep - optional, keep the Webcrawl-YYYY-MM-DD directory of each run, in bench-crawl-COUNT.
+#   WEBCRAWLER_ARGS - optional, arguments passed to webcrawler.py, e.g., "-- -c 16 --race". Default is "-c 16".
+#
+# Summary - Domain i of an ecosystem of COUNT domains is "site<i>.test". Each is a member of domain (i-1)//FANOUT, which it lists as
+# "belongto", so the domains form a tree rooted at site0.test with a cycle along every edge, and each also lists CROSSLINKS "control"
+# and "vendor" references to random domains. Only the leaves of the tree are given the failing kinds (not found, HTML, redirected), so
+# every domain is reachable from the root. Each domain's trust.txt file is generated from the seed when requested, so ecosystems of
+# 100k domains take no memory.
+#
+# The server is an HTTP proxy on 127.0.0.1: webcrawler.py is run with http_proxy set to it, so every "http://site<i>.test/..." request
+# reaches it without any DNS lookup, and it routes each by the host in the request. webcrawler.py is run in a temporary directory, so
+# there is no resources.csv and only the ecosystem is crawled.
+#
+# For each COUNT, it reports the domains crawled per second, the p50 and p99 HTTP GET latency (interpolated from the histogram in the
+# Webcrawl-YYYY-MM-DD-metrics.json file, see metrics.py), the peak RSS of webcrawler.py, and the number of requests served.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import sys
+import os
+import glob
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from urllib.parse import urlsplit
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+#
+webcrawler = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "webcrawler.py")
+#
+# Ecosystem(count, args) - The synthetic ecosystem of count domains with the fan-out, cross links and fractions of each kind in args.
+#
+class Ecosystem:
+    #
+    def __init__ (self, count, args):
+        self.count = count
+        self.args = args
+    #
+    # kind(i) - Return how domain i is served: "ok", "wellknown", "notfound", "html", "redirect", or "slow".
+    #
+    def kind (self, i):
+        rng = random.Random(self.args.seed * 1000003 + i)
+        draw = rng.random()
+        leaf = (self.args.fanout * i + 1 >= self.count)
+        for kind, fraction in [("notfound", self.args.notfound), ("html", self.args.html), ("redirect", self.args.redirect)]:
+            if draw < fraction:
+                return kind if leaf else "ok"
+            draw -= fraction
+        for kind, fraction in [("wellknown", self.args.wellknown), ("slow", self.args.slow)]:
+            if draw < fraction:
+                return kind
+            draw -= fraction
+        return "ok"
+    #
+    # trust(i) - Return the text of the trust.txt file of domain i.
+    #
+    def trust (self, i):
+        rng = random.Random(self.args.seed * 1000003 + i)
+        lines = ["# trust.txt file for site" + str(i) + ".test"]
+        if i > 0:
+            lines.append("belongto=https://www.site" + str((i - 1) // self.args.fanout) + ".test/")
+        for child in range(self.args.fanout * i + 1, min(self.count, self.args.fanout * (i + 1) + 1)):
+            lines.append("member=https://www.site" + str(child) + ".test/")
+        for link in range(self.args.crosslinks):
+            lines.append("control=https://www.site" + str(rng.randrange(self.count)) + ".test/")
+            lines.append("vendor=https://site" + str(rng.randrange(self.count)) + ".test")
+        lines.append("social=https://social.example/@site" + str(i))
+        lines.append("contact=mailto:trust@site" + str(i) + ".test")
+        return "\n".join(lines) + "\n"
+    #
+    # lookup(host) - Return the number of the domain served at host, and whether host is the one its redirect goes to, or None.
+    #
+    def lookup (self, host):
+        host = host.split(":")[0].lower()
+        if host.startswith("www."):
+            host = host[4:]
+        moved = host.endswith("-moved.test")
+        name = host[:-len("-moved.test")] if moved else host[:-len(".test")]
+        if (not host.endswith(".test")) or (not name.startswith("site")) or (not name[4:].isdigit()):
+            return None, False
+        i = int(name[4:])
+        if i >= self.count:
+            return None, False
+        return i, moved
+#
+# Handler - Serve the trust.txt files of the server's ecosystem, routing each request by its host.
+#
+class Handler (BaseHTTPRequestHandler):
+    #
+    protocol_version = "HTTP/1.1"
+    #
+    def log_message (self, format, *args):
+        pass
+    #
+    # reply(status, contenttype, body, headers) - Send a response with the given status, content type, body, and extra headers.
+    #
+    def reply (self, status, contenttype="text/plain", body="", headers=None):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", contenttype)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+    #
+    def do_GET (self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        o = urlsplit(self.path)
+        ecosystem = server.ecosystem
+        i, moved = ecosystem.lookup(o.netloc or self.headers.get("Host", ""))
+        if i is None:
+            self.reply(502, body="Unknown host\n")
+            return
+        kind = ecosystem.kind(i)
+        if kind == "slow":
+            time.sleep(server.delay)
+        if (kind == "redirect") and not moved:
+            self.reply(301, headers={"Location": "http://site" + str(i) + "-moved.test" + o.path})
+        elif (kind == "notfound") or ((kind == "wellknown") and (o.path == "/trust.txt")):
+            self.reply(404, body="Not found\n")
+        elif o.path not in ["/trust.txt", "/.well-known/trust.txt"]:
+            self.reply(404, body="Not found\n")
+        elif kind == "html":
+            self.reply(200, "text/html; charset=utf-8", "<html><body>site" + str(i) + ".test</body></html>\n")
+        else:
+            self.reply(200, "text/plain; charset=utf-8", ecosystem.trust(i))
+#
+# serve(ecosystem, delay) - Start serving the ecosystem on a free port of 127.0.0.1 in a background thread, return the server.
+#
+def serve (ecosystem, delay):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.ecosystem = ecosystem
+    server.delay = delay
+    server.lock = threading.Lock()
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+#
+# quantile(q, histogram) - Return the q quantile of a histogram of cumulative bucket counts written by metrics.py, interpolated
+# linearly within the bucket it falls in, as Prometheus' histogram_quantile does.
+#
+def quantile (q, histogram):
+    count = histogram["count"]
+    if count == 0:
+        return 0.0
+    target = q * count
+    lower = 0.0
+    previous = 0
+    for bound, total in histogram["buckets"].items():
+        if bound == "+Inf":
+            return lower
+        if total >= target:
+            return lower + (float(bound) - lower) * (target - previous) / max(1, total - previous)
+        lower = float(bound)
+        previous = total
+    return lower
+#
+# run(count, args) - Crawl an ecosystem of count domains with webcrawler.py, print and return its results.
+#
+def run (count, args):
+    ecosystem = Ecosystem(count, args)
+    server = serve(ecosystem, args.delay)
+    workdir = tempfile.mkdtemp(prefix="bench-crawl-")
+    env = dict(os.environ)
+    proxy = "http://127.0.0.1:" + str(server.server_address[1])
+    env.update(http_proxy=proxy, HTTP_PROXY=proxy, no_proxy="", NO_PROXY="")
+    #
+    # Run webcrawler.py and wait for it, taking its peak RSS from its resource usage (in kilobytes on Linux)
+    #
+    start = time.time()
+    process = subprocess.Popen([sys.executable, os.path.abspath(webcrawler), "-k", "0"] + args.webcrawler + ["site0.test"],
+                               cwd=workdir, env=env, stdout=subprocess.DEVNULL)
+    pid, status, usage = os.wait4(process.pid, 0)
+    status = os.waitstatus_to_exitcode(status)
+    elapsed = time.time() - start
+    server.shutdown()
+    server.server_close()
+    #
+    names = glob.glob(workdir + "/Webcrawl-*/Webcrawl-*-metrics.json")
+    if (status != 0) or (len(names) == 0):
+        print ("%8d domains: webcrawler.py failed with status %d, see %s" % (count, status, workdir))
+        return None
+    file = open(names[0],"r")
+    metrics = json.load(file)
+    file.close()
+    #
+    results = {
+        "domains": metrics["domains"],
+        "seconds": elapsed,
+        "domains_per_second": metrics["domains"] / elapsed,
+        "p50": quantile(0.5, metrics["fetch_seconds"]),
+        "p99": quantile(0.99, metrics["fetch_seconds"]),
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+        "requests": server.requests
+    }
+    print ("%8d domains: %8d crawled in %8.1f s %8.1f domains/s   p50 %7.1f ms   p99 %7.1f ms   peak RSS %7.1f MB   %8d requests" %
+           (count, results["domains"], elapsed, results["domains_per_second"], 1000 * results["p50"], 1000 * results["p99"],
+            results["peak_rss_mb"], results["requests"]))
+    #
+    if args.keep:
+        target = "bench-crawl-" + str(count)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.move(glob.glob(workdir + "/Webcrawl-*")[0], target)
+    shutil.rmtree(workdir)
+    return results
+#
+# Main program
+#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark webcrawler.py against synthetic trust.txt ecosystems served locally.")
+    parser.add_argument("-n", "--counts", help="comma separated numbers of domains to crawl, default 1000", type=str, default="1000", action="store")
+    parser.add_argument("-f", "--fanout", help="number of members of each domain, default 4", type=int, default=4, action="store")
+    parser.add_argument("-x", "--crosslinks", help="number of control and vendor references of each domain, default 1", type=int, default=1, action="store")
+    parser.add_argument("--notfound", help="fraction of domains with no trust.txt file, default 0.05", type=float, default=0.05, action="store")
+    parser.add_argument("--wellknown", help="fraction of domains with their trust.txt file only at /.well-known, default 0.1", type=float, default=0.1, action="store")
+    parser.add_argument("--html", help="fraction of domains that return HTML, default 0.05", type=float, default=0.05, action="store")
+    parser.add_argument("--redirect", help="fraction of domains that redirect to another domain, default 0.05", type=float, default=0.05, action="store")
+    parser.add_argument("--slow", help="fraction of domains served after a delay, default 0.01", type=float, default=0.01, action="store")
+    parser.add_argument("--delay", help="seconds the slow domains are delayed, default 0.5", type=float, default=0.5, action="store")
+    parser.add_argument("--seed", help="seed of the ecosystem, default 2021", type=int, default=2021, action="store")
+    parser.add_argument("-k", "--keep", help="keep the Webcrawl directory of each run in bench-crawl-COUNT", action="store_true")
+    parser.add_argument("webcrawler", help="arguments passed to webcrawler.py, default -c 16", type=str, nargs="*", default=["-c", "16"])
+    args = parser.parse_args()
+    args.fanout = max(1, args.fanout)
+    #
+    for count in [int(count) for count in args.counts.split(",")]:
+        run(count, args)
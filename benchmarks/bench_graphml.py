@@ -0,0 +1,139 @@
+#!/usr/local/bin/python3.12
+#
+# Benchmark of graphml.py on synthetic trust.txt ecosystems of increasing size, to check that generating the GraphML files grows
+# linearly with the number of edges.
+#
+# Name - bench_graphml.py
+# Synopsis - bench_graphml.py [-n COUNTS] [-b BASELINE] [-z] [-l] [-o] [-c] [-k]
+#   -n COUNTS, --counts COUNTS - optional, comma separated numbers of edges in the .csv file. Default is "1000,10000,100000".
+#   -b BASELINE, --baseline BASELINE - optional, another copy of graphml.py, e.g., from an earlier commit, to also time and compare
+#   the output files of. Its time grows with the square of the edges, so it is best run with small COUNTS.
+#   -z, --gzip - optional, run graphml.py with --gzip, writing .graphmlz files.
+#   -l, --layout - optional, run graphml.py with --layout, laying the graph out and writing the positions of its nodes.
+#   -o, --owners - optional, run graphml.py with --owners, also writing the owner level graphs.
+#   -c, --communities - optional, run graphml.py with --communities, also writing the graph of each community and their summary.
+#   -k, --keep - optional, keep the Webcrawl directory of each size in bench-graphml-COUNT.
+#
+# Each ecosystem is a tree of associations with publisher members, and publishers with vendors and controlled domains, written as the
+# Webcrawl-YYYY-MM-DD.csv file and the -symmetric.csv, -associations.csv, -publishers.csv, -vendors.csv, and -controlled.csv files
+# symmetric.sql derives from it. A tenth of the references are not reciprocated, so are asymmetric. Reports the time graphml.py took,
+# edges per second, microseconds per edge, which stays flat as the ecosystem grows if the time is linear, and the size of the files
+# it wrote.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import sys
+import os
+import time
+import random
+import shutil
+import argparse
+import filecmp
+import tempfile
+import subprocess
+#
+graphml = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "graphml.py")
+dirname = "Webcrawl-2021-01-01"
+#
+# Reverse of each forward symmetric attribute
+#
+reverse = {"member": "belongto", "control": "controlledby", "vendor": "customer"}
+#
+# url(kind, i) - Return the normalized url of the i-th domain of a kind.
+#
+def url (kind, i):
+    return "https://www." + kind + str(i) + ".com/"
+#
+# ecosystem(count, path) - Write the .csv files of an ecosystem of about count edges into the Webcrawl directory in path.
+#
+def ecosystem (count, path):
+    random.seed(2021)
+    links = []
+    assocs = max(1, count // 400)
+    pubs = max(1, count // 4)
+    vends = max(1, count // 100)
+    for i in range(pubs):
+        links.append((url("association", random.randrange(assocs)), "member", url("publisher", i)))
+        links.append((url("publisher", i), "vendor", url("vendor", random.randrange(vends))))
+        if i % 10 == 0:
+            links.append((url("publisher", i), "control", url("controlled", i)))
+    #
+    crawled, symmetric, controlled = [], [], []
+    for srcurl, attr, refurl in links:
+        crawled.append(srcurl + "," + attr + "," + refurl)
+        if attr == "control":
+            controlled.append(refurl)
+        if random.random() < 0.9:
+            crawled.append(refurl + "," + reverse[attr] + "," + srcurl)
+            symmetric.append(",".join([srcurl, attr, refurl, refurl, reverse[attr], srcurl]))
+    random.shuffle(crawled)
+    #
+    files = {
+        ".csv": ["srcurl,attr,refurl"] + crawled,
+        "-symmetric.csv": symmetric,
+        "-associations.csv": [url("association", i) for i in range(assocs)],
+        "-publishers.csv": [url("publisher", i) for i in range(pubs)],
+        "-vendors.csv": [url("vendor", i) for i in range(vends)],
+        "-controlled.csv": controlled
+    }
+    os.mkdir(path + "/" + dirname)
+    for suffix, lines in files.items():
+        file = open(path + "/" + dirname + "/" + dirname + suffix,"w")
+        file.write("\n".join(lines) + "\n")
+        file.close()
+    return len(crawled)
+#
+# run(script, path, options) - Run the graphml.py script with the list of options on the Webcrawl directory in path, return the seconds
+# it took.
+#
+def run (script, path, options=[]):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.abspath(script)] + options + [dirname], cwd=path)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        print (script, "exited with code", result.returncode)
+        sys.exit(1)
+    return elapsed
+#
+# outputs(path) - Return the names of the GraphML files graphml.py wrote in the Webcrawl directory in path.
+#
+def outputs (path):
+    return sorted(name for name in os.listdir(path + "/" + dirname) if name.endswith(".graphml") or name.endswith(".graphmlz"))
+#
+# Main program
+#
+parser = argparse.ArgumentParser(description="Benchmark graphml.py on synthetic ecosystems of increasing size.")
+parser.add_argument("-n", "--counts", help="comma separated numbers of edges, default 1000,10000,100000", type=str, default="1000,10000,100000", action="store")
+parser.add_argument("-b", "--baseline", help="another copy of graphml.py to time and compare the output of", type=str, default="", action="store")
+parser.add_argument("-z", "--gzip", help="run graphml.py with --gzip", action="store_true")
+parser.add_argument("-l", "--layout", help="run graphml.py with --layout", action="store_true")
+parser.add_argument("-o", "--owners", help="run graphml.py with --owners", action="store_true")
+parser.add_argument("-c", "--communities", help="run graphml.py with --communities", action="store_true")
+parser.add_argument("-k", "--keep", help="keep the Webcrawl directory of each size in bench-graphml-COUNT", action="store_true")
+args = parser.parse_args()
+#
+print ("%8s %10s %10s %12s %10s %10s" % ("edges", "graphml", "edges/s", "us/edge", "MB", "baseline"))
+for count in [int(count) for count in args.counts.split(",")]:
+    path = tempfile.mkdtemp(prefix="bench-graphml-")
+    edges = ecosystem(count, path)
+    options = (["--gzip"] if args.gzip else []) + (["--layout"] if args.layout else []) + (["--owners"] if args.owners else []) + (["--communities"] if args.communities else [])
+    elapsed = run(graphml, path, options)
+    size = sum(os.path.getsize(path + "/" + dirname + "/" + name) for name in outputs(path))
+    baseline = ""
+    if (args.baseline != "") and not (args.gzip or args.layout or args.owners or args.communities):
+        basepath = tempfile.mkdtemp(prefix="bench-graphml-")
+        shutil.copytree(path + "/" + dirname, basepath + "/" + dirname, ignore=shutil.ignore_patterns("*.graphml"))
+        baseline = "%9.3fs" % run(args.baseline, basepath)
+        for name in outputs(path):
+            if not filecmp.cmp(path + "/" + dirname + "/" + name, basepath + "/" + dirname + "/" + name, shallow=False):
+                print (name, "differs from the baseline's")
+        shutil.rmtree(basepath)
+    print ("%8d %9.3fs %10.0f %12.2f %10.1f %10s" % (edges, elapsed, edges / elapsed, 1e6 * elapsed / edges, size / 1e6, baseline))
+    if args.keep:
+        keep = "bench-graphml-" + str(count)
+        if os.path.isdir(keep):
+            shutil.rmtree(keep)
+        shutil.move(path + "/" + dirname, keep)
+    shutil.rmtree(path)
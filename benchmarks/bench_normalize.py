@@ -0,0 +1,131 @@
+#!/usr/local/bin/python3.12
+#
+# Microbenchmark of the shared url normalizer (urlnorm.py) against the normalize() function previously copied into webcrawler.py,
+# qa_trust_txt.py, and trust2fps.py.
+#
+# Name - bench_normalize.py
+# Synopsis - bench_normalize.py [-n COUNT] [WEBCRAWL_CSV]
+#   -n COUNT - optional, the number of urls to normalize. Default is 200000.
+#   WEBCRAWL_CSV - optional, a Webcrawl-YYYY-MM-DD.csv file whose srcurl and refurl columns are used as the urls. Default is a
+#   synthetic mix of the url forms found in trust.txt files.
+#
+# Checks that both functions return identical results for every url, then reports the time taken by the original function, by
+# urlnorm.normalize() with an empty cache on every url, by urlnorm.normalize() memoized, and by urlnorm.normalize_many().
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import sys
+import os
+import time
+import random
+import argparse
+from urllib.parse import urlparse
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import urlnorm
+#
+# The original normalize() and its list of top level country domains
+#
+countrytld = sorted(urlnorm.countrytld)
+#
+def original (url):
+    o = urlparse(url)
+    if o.scheme == "":
+        s = o.path.split("/",1)
+        domain = s[0]
+        if (len(s) > 1):
+            subdir = s[1]
+        else:
+            subdir = ""
+    else:
+        subdir = o.path
+        domain = o.netloc
+    if subdir == "/":
+        subdir = ""
+    s = domain.split(".")
+    slen = len(s)
+    if (s[slen-1] in countrytld) and (slen > 2) and (s[slen-3] != "www"):
+        dlen = 3
+        domain = s[slen - 3] + "." + s[slen - 2] + "." + s[slen - 1]
+    else:
+        if slen > 1:
+            dlen = 2
+            domain = s[slen - 2] + "." + s[slen - 1]
+        else:
+            dlen = 1
+            domain = s[0]
+    domain = domain.lower()
+    subdom = ""
+    n = slen - dlen
+    if n > 0:
+        i = 0
+        subdom = s[i]
+        while i < n - 1:
+            i = i + 1
+            subdom = subdom + "." + s[i]
+    return domain, subdom, subdir
+#
+# synthetic(count) - Return count urls in the forms found in trust.txt files, with about one distinct domain for every fifty urls.
+#
+def synthetic (count):
+    random.seed(2021)
+    tlds = ["com", "org", "net", "news", "co.uk", "com.au", "de", "fr", "tv", "us"]
+    prefixes = ["https://www."] * 12 + ["http://www.", "https://", "http://", "www.", "", "https://news.", "HTTPS://WWW."]
+    suffixes = ["/"] * 12 + ["", "/trust.txt", "/about/", "/?ref=trust", "/#top"]
+    domains = ["site" + str(i) + "." + random.choice(tlds) for i in range(max(1, count // 50))]
+    return [random.choice(prefixes) + random.choice(domains) + random.choice(suffixes) for i in range(count)]
+#
+# readcsv(filename, count) - Return count urls from the srcurl and refurl columns of a Webcrawl .csv file, repeated if necessary.
+#
+def readcsv (filename, count):
+    urls = []
+    file = open(filename,"r")
+    for line in file:
+        temp = line.rstrip("\n").split(",",2)
+        if (len(temp) == 3) and (temp[0] != "srcurl"):
+            urls.append(temp[0])
+            urls.append(temp[2])
+    file.close()
+    return (urls * (count // max(1, len(urls)) + 1))[0:count]
+#
+# timeit(label, function, count) - Run function, print and return the time it took.
+#
+def timeit (label, function, count):
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print ("%-34s %8.3f s %12.0f urls/s" % (label, elapsed, count / elapsed))
+    return elapsed
+#
+# Main program
+#
+parser = argparse.ArgumentParser(description="Benchmark urlnorm.normalize() against the original normalize().")
+parser.add_argument("-n", "--count", help="number of urls to normalize, default 200000", type=int, default=200000, action="store")
+parser.add_argument("csvname", help="Webcrawl-YYYY-MM-DD.csv file to take the urls from", type=str, nargs="?", default="", action="store")
+args = parser.parse_args()
+#
+if args.csvname != "":
+    urls = readcsv(args.csvname, args.count)
+else:
+    urls = synthetic(args.count)
+count = len(urls)
+print ("urls:", count, "distinct:", len(set(urls)))
+#
+# Check the results are identical.
+#
+mismatches = [url for url in urls if original(url) != urlnorm.normalize(url)]
+if len(mismatches) > 0:
+    print ("Results differ for", len(mismatches), "urls, e.g.:", mismatches[0:5])
+    sys.exit(1)
+#
+base = timeit("original normalize()", lambda: [original(url) for url in urls], count)
+urlnorm.normalize.cache_clear()
+uncached = timeit("urlnorm.normalize() uncached", lambda: [urlnorm.normalize.__wrapped__(url) for url in urls], count)
+urlnorm.normalize.cache_clear()
+cached = timeit("urlnorm.normalize() memoized", lambda: [urlnorm.normalize(url) for url in urls], count)
+urlnorm.normalize.cache_clear()
+batch = timeit("urlnorm.normalize_many()", lambda: urlnorm.normalize_many(urls), count)
+#
+print ("speedup: uncached %.1fx, memoized %.1fx, batch %.1fx" % (base / uncached, base / cached, base / batch))
@@ -0,0 +1,121 @@
+#!/usr/local/bin/python3.12
+#
+# Benchmark of the shared trust.txt parser (trustparse.py) against the per-line cleanup and split previously copied into webcrawler.py,
+# qa_trust_txt.py, and trust2fps.py.
+#
+# Name - bench_parse.py
+# Synopsis - bench_parse.py [-r REPEAT] [DIRNAME]
+#   -r REPEAT - optional, the number of times to parse the files. Default is 5.
+#   DIRNAME - optional, a Webcrawl-YYYY-MM-DD directory whose www.<domain>-trust.txt files are parsed. Default is 10000 synthetic files.
+#
+# Checks that both parsers find the same attribute=url entries at the same line numbers in every file, the original splitting its lines
+# with str.splitlines(), then reports the time each took and their throughput in files and megabytes per second. The kinds of entry may
+# differ, as the original looked attributes up as parts of a string rather than in a set.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import sys
+import os
+import time
+import random
+import argparse
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import trustparse
+#
+# The symmetric and asymmetric attributes, as strings the attributes were looked up in
+#
+symattr = "member,belongto,control,controlledby,vendor,customer"
+asymattr = "social,contact,disclosure,datatrainingallowed"
+#
+# original(data) - Return the [linenum, attr, url, kind] entries of the trust.txt file contents data, split into lines with
+# str.splitlines(), then cleaned up, split and classified one line at a time as the scripts did. The data is decoded as the text of the
+# responses is, replacing invalid UTF-8.
+#
+def original (data):
+    entries = []
+    linenum = 0
+    for line in data.decode("utf-8","replace").splitlines():
+        linenum += 1
+        bytesline = line.strip().encode("ascii","ignore")
+        tmp1line = bytesline.decode("ascii","ignore")
+        tmpline = tmp1line.replace("\00","")
+        tmpline1 = tmpline.replace("\t","")
+        tmpline = tmpline1.replace(" ","")
+        if tmpline.startswith("#") or tmpline == "":
+            continue
+        attr = tmpline.split("=",2)
+        if (len(attr) == 2) and (attr[1] != ""):
+            if attr[0] in symattr:
+                kind = trustparse.SYMMETRIC
+            elif attr[0] in asymattr:
+                kind = trustparse.ASYMMETRIC
+            else:
+                kind = trustparse.INVALID
+            entries.append([linenum, attr[0], attr[1], kind])
+    return entries
+#
+# synthetic(count) - Return the contents of count trust.txt files of the forms found in a Webcrawl directory.
+#
+def synthetic (count):
+    random.seed(2021)
+    attrs = ["member", "belongto", "control", "controlledby", "vendor", "customer", "social", "contact", "disclosure"]
+    files = []
+    for i in range(count):
+        lines = ["# trust.txt file for https://www.site" + str(i) + ".com/", ""]
+        for j in range(random.choice([1, 2, 5, 10, 20, 100])):
+            attr = random.choice(attrs)
+            lines.append(attr + "=https://www.site" + str(random.randrange(count)) + ".com/" + random.choice(["", " ", "\t"]))
+        files.append(("\r\n" if i % 10 == 0 else "\n").join(lines).encode())
+    return files
+#
+# readdir(dirname) - Return the contents of the trust.txt files in the Webcrawl directory.
+#
+def readdir (dirname):
+    files = []
+    for name in sorted(os.listdir(dirname)):
+        if name.startswith("www.") and name.endswith("-trust.txt"):
+            file = open(dirname + "/" + name,"rb")
+            files.append(file.read())
+            file.close()
+    return files
+#
+# timeit(label, function, files, size) - Run function, print and return the time it took.
+#
+def timeit (label, function, files, size):
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print ("%-28s %8.3f s %12.0f files/s %8.1f MB/s" % (label, elapsed, files / elapsed, size / elapsed / 1e6))
+    return elapsed
+#
+# Main program
+#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark trustparse.py against the original trust.txt line parsing.")
+    parser.add_argument("-r", "--repeat", help="number of times to parse the files, default 5", type=int, default=5, action="store")
+    parser.add_argument("dirname", help="Webcrawl-YYYY-MM-DD directory to parse the trust.txt files of", type=str, nargs="?", default="", action="store")
+    args = parser.parse_args()
+    #
+    if args.dirname != "":
+        files = readdir(args.dirname)
+    else:
+        files = synthetic(10000)
+    size = sum(len(data) for data in files)
+    print ("files:", len(files), "bytes:", size)
+    #
+    # Check the results are identical.
+    #
+    mismatches = [i for i, data in enumerate(files) if [entry[0:3] for entry in original(data)] != [list(entry[0:3]) for entry in trustparse.parse(data)]]
+    if len(mismatches) > 0:
+        print ("Results differ for", len(mismatches), "files, e.g.:", [files[i][0:80] for i in mismatches[0:3]])
+        sys.exit(1)
+    #
+    count = len(files) * args.repeat
+    base = timeit("original line parsing", lambda: [original(data) for data in files * args.repeat], count, size * args.repeat)
+    parsed = timeit("trustparse.parse()", lambda: [trustparse.parse(data) for data in files * args.repeat], count, size * args.repeat)
+    iterated = timeit("trustparse.iterentries()", lambda: [list(trustparse.iterentries(data)) for data in files * args.repeat], count, size * args.repeat)
+    #
+    print ("speedup: parse %.1fx, iterentries %.1fx" % (base / parsed, base / iterated))
@@ -0,0 +1,66 @@
+#
+# JournalList.net webcrawler checkpoints, so that an interrupted crawl can be resumed.
+#
+# Name - checkpoint.py
+# Synopsis - import checkpoint
+#            checkpoint.write(filename, state)
+#            state = checkpoint.read(filename)
+#            files = checkpoint.reopen(names, state["offsets"])
+#
+# Summary - A checkpoint is a JSON file holding the state of the crawl: the phase it is in, the tasks still on the frontier (the crawl
+# waits for those being fetched to complete before taking it), the visited index, the manifest, the metrics, and the length of each
+# output file at that moment. It is written to a temporary file which then replaces the previous checkpoint, so a crash while writing
+# it leaves the previous one intact.
+#
+# On resume, each output file is truncated back to its length in the checkpoint, discarding anything written after it, and reopened
+# for appending.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import json
+#
+# offsets(files) - Flush each of the open files and return the list of their lengths.
+#
+def offsets (files):
+    lengths = []
+    for file in files:
+        file.flush()
+        lengths.append(file.tell())
+    return lengths
+#
+# write(filename, state) - Atomically write the state to the checkpoint file.
+#
+def write (filename, state):
+    tmpname = filename + ".tmp"
+    file = open(tmpname,"w")
+    json.dump(state, file)
+    file.flush()
+    os.fsync(file.fileno())
+    file.close()
+    os.replace(tmpname, filename)
+#
+# read(filename) - Read the state from the checkpoint file.
+#
+def read (filename):
+    file = open(filename,"r")
+    state = json.load(file)
+    file.close()
+    return state
+#
+# reopen(names, lengths) - Truncate each of the named files to the given length and return the list of them opened for appending.
+#
+def reopen (names, lengths):
+    files = []
+    for name, length in zip(names, lengths):
+        os.truncate(name, length)
+        files.append(open(name,"a"))
+    return files
+#
+# remove(filename) - Remove the checkpoint file once the crawl is complete.
+#
+def remove (filename):
+    if os.path.isfile(filename):
+        os.remove(filename)
@@ -0,0 +1,180 @@
+#
+# JournalList.net structured crawl log, the events of a webcrawler.py crawl as JSON lines.
+#
+# Name - crawllog.py
+# Synopsis - crawllog.py [-e EVENT] [-p PHASE] [-l LEVEL] [-o OUTCOME] [-f FIELD] FILENAME
+#   FILENAME - a Webcrawl-YYYY-MM-DD-events.jsonl or Webcrawl-YYYY-MM-DD-events.jsonl.gz file.
+#   -e EVENT, --event EVENT - optional, only print events of this kind, e.g., "domain".
+#   -p PHASE, --phase PHASE - optional, only print events of this phase of the crawl, e.g., "resources".
+#   -l LEVEL, --level LEVEL - optional, only print events of this level and above. Default is "debug", all of them.
+#   -o OUTCOME, --outcome OUTCOME - optional, only print events with this outcome, e.g., "success".
+#   -f FIELD, --field FIELD - optional, print only this field of each event rather than the whole event.
+#
+#            from crawllog import EventLog
+#            events = EventLog("Webcrawl-YYYY-MM-DD/Webcrawl-YYYY-MM-DD-events.jsonl", level="info", compress=False)
+#            events.phase = "root"
+#            events.event("info", "domain", domain="journallist.net", outcome="success", seconds=0.25)
+#            events.close()
+#
+# Summary - Each event is one line of JSON with the time, level, kind of event, and phase of the crawl, followed by its own fields,
+# e.g.:
+#
+#   {"time":1634567890.123,"level":"info","event":"domain","phase":"root","domain":"journallist.net","outcome":"success","seconds":0.25}
+#
+# Events below the level of the log are dropped when they are logged. The others are put on a queue, and a background thread turns
+# them into JSON and writes them to the file in batches, optionally compressed with gzip, so that the threads fetching trust.txt files
+# never wait for the log. An EventLog created without a filename is disabled and drops every event.
+#
+# Levels are, in order, "debug", "info", "warning", and "error".
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import json
+import time
+import gzip
+import queue
+import argparse
+import threading
+#
+# Levels of event, in order
+#
+levels = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+#
+# Most events written by the background thread at once
+#
+batchsize = 1000
+#
+# openlog(filename, mode) - Open the log filename, compressed with gzip if it ends in ".gz", as text in the given mode.
+#
+def openlog (filename, mode):
+    if filename.endswith(".gz"):
+        return gzip.open(filename, mode + "t")
+    return open(filename, mode)
+#
+# EventLog(filename, level, compress, mode) - Open the log filename, with ".gz" added if compress is True, in the given mode, "a" to
+# append or "w" to truncate, and start its background writer. Events below level are dropped. If filename is "", the log is disabled.
+#
+class EventLog:
+    #
+    def __init__ (self, filename="", level="info", compress=False, mode="a"):
+        self.phase = ""
+        self.filename = ""
+        self.level = levels["error"] + 1
+        if filename == "":
+            return
+        if compress and not filename.endswith(".gz"):
+            filename = filename + ".gz"
+        self.filename = filename
+        self.level = levels[level]
+        self.file = openlog(filename, mode)
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.writer, daemon=True)
+        self.thread.start()
+    #
+    # enabled(level) - Return True if events of the given level are logged.
+    #
+    def enabled (self, level):
+        return levels[level] >= self.level
+    #
+    # event(level, name, **fields) - Log an event of the kind name with the given fields, if its level is enabled.
+    #
+    def event (self, level, name, **fields):
+        if levels[level] < self.level:
+            return
+        entry = {"time": round(time.time(), 3), "level": level, "event": name, "phase": self.phase}
+        entry.update(fields)
+        self.queue.put(entry)
+    #
+    # include(filename) - Copy the events in the log filename, e.g., that of a shard of the crawl, into this one, once those already
+    # logged have been written. Returns when they have been copied.
+    #
+    def include (self, filename):
+        if self.filename == "":
+            return
+        self.queue.put(("include", filename))
+        self.queue.join()
+    #
+    # writer() - Run by the background thread, write the events on the queue in batches until close() puts None on it.
+    #
+    def writer (self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while (len(batch) < batchsize) and not self.queue.empty():
+                batch.append(self.queue.get())
+            lines = []
+            for item in batch:
+                if item is None:
+                    running = False
+                elif isinstance(item, tuple):
+                    self.file.write("".join(lines))
+                    lines = []
+                    file = openlog(item[1], "r")
+                    for line in file:
+                        self.file.write(line)
+                    file.close()
+                else:
+                    lines.append(json.dumps(item, separators=(",", ":")) + "\n")
+            self.file.write("".join(lines))
+            self.file.flush()
+            for item in batch:
+                self.queue.task_done()
+    #
+    # flush() - Wait until the events already logged have been written.
+    #
+    def flush (self):
+        if self.filename != "":
+            self.queue.join()
+    #
+    # close() - Write the events already logged, stop the background writer and close the file.
+    #
+    def close (self):
+        if self.filename == "":
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        self.filename = ""
+        self.level = levels["error"] + 1
+#
+# readlog(filename) - Yield each event in the log filename.
+#
+def readlog (filename):
+    file = openlog(filename, "r")
+    for line in file:
+        if line.strip() != "":
+            yield json.loads(line)
+    file.close()
+#
+# Main program
+#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the events of a webcrawler.py structured log.")
+    parser.add_argument("-e", "--event", help="only print events of this kind, e.g., domain", type=str, default="", action="store")
+    parser.add_argument("-p", "--phase", help="only print events of this phase, e.g., resources", type=str, default="", action="store")
+    parser.add_argument("-l", "--level", help="only print events of this level and above, default debug", type=str, default="debug", choices=list(levels), action="store")
+    parser.add_argument("-o", "--outcome", help="only print events with this outcome, e.g., success", type=str, default="", action="store")
+    parser.add_argument("-f", "--field", help="print only this field of each event", type=str, default="", action="store")
+    parser.add_argument("filename", help="the Webcrawl-YYYY-MM-DD-events.jsonl[.gz] file", type=str, action="store")
+    args = parser.parse_args()
+    #
+    if not os.path.isfile(args.filename):
+        print (args.filename, "does not exist")
+    else:
+        for entry in readlog(args.filename):
+            if (args.event != "") and (entry.get("event") != args.event):
+                continue
+            if (args.phase != "") and (entry.get("phase") != args.phase):
+                continue
+            if levels.get(entry.get("level"), 0) < levels[args.level]:
+                continue
+            if (args.outcome != "") and (entry.get("outcome") != args.outcome):
+                continue
+            if args.field != "":
+                if args.field in entry:
+                    print (entry[args.field])
+            else:
+                print (json.dumps(entry, separators=(",", ":")))
@@ -64,4 +64,12 @@ grep "> " temp
 rm temp temp1 temp2
 echo ""
 echo "Domains with trust.txt files found by well-known.dev"
-grep -A 1000 "BEGIN: processing well-known.dev resource list" $DIRNAME2/$DIRNAME2-log.txt | grep "Fetching" | sed -e "s/[^ ]* \([^ ]*\).*/\1/" -e "s/https:\/\/www.//" -e "s/\/trust.txt//"
+#
+# Query the structured log if the crawl wrote one (webcrawler.py --log-level), otherwise scrape the log file
+#
+EVENTS=$(ls $DIRNAME2/$DIRNAME2-events.jsonl $DIRNAME2/$DIRNAME2-events.jsonl.gz 2> /dev/null | head -n 1)
+if [ -n "$EVENTS" ]; then
+    python3.12 crawllog.py -e domain -p resources -f domain $EVENTS
+else
+    grep -A 1000 "BEGIN: processing well-known.dev resource list" $DIRNAME2/$DIRNAME2-log.txt | grep "Fetching" | sed -e "s/[^ ]* \([^ ]*\).*/\1/" -e "s/https:\/\/www.//" -e "s/\/trust.txt//"
+fi
@@ -0,0 +1,126 @@
+#
+# JournalList.net webcrawler DNS cache, resolves the domains on the crawl frontier ahead of fetching them.
+#
+# Name - dnscache.py
+# Synopsis - from dnscache import Resolver
+#            resolver = Resolver("dnscache.json", ttl=86400)
+#            resolver.prefetch(["journallist.net", "example.com"])
+#            found, error = resolver.lookup("journallist.net")
+#            resolver.save()
+#
+# Summary - Many of the domains in the well-known.dev resources.csv list and referenced from trust.txt files no longer resolve, and
+# each one would otherwise cost a connection error on "http://domain/trust.txt" and again on "http://domain/.well-known/trust.txt".
+# prefetch() resolves a batch of domains on a pool of threads without waiting for the results, so the whole frontier is resolved in
+# bulk while fetches are in progress. lookup() then returns the result, waiting for it if it is still being resolved.
+#
+# Only domains that definitely do not exist (NXDOMAIN) are reported as not found. Temporary failures, e.g., a timeout of the DNS
+# server, are not cached and are reported as found, so the fetch is still attempted.
+#
+# Results are cached, and saved to a JSON file so they are reused by the next crawl, until they are ttl seconds old.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import json
+import time
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+#
+# getaddrinfo errors meaning the domain does not exist
+#
+notfound = [socket.EAI_NONAME]
+if hasattr(socket, "EAI_NODATA"):
+    notfound.append(socket.EAI_NODATA)
+#
+# resolve(domain) - Resolve the domain, return [found, error, cache], where error is "" if found and cache is False if the failure was
+# only temporary.
+#
+def resolve (domain):
+    try:
+        socket.getaddrinfo(domain, 80, proto=socket.IPPROTO_TCP)
+    except socket.gaierror as Argument:
+        if Argument.errno in notfound:
+            return [False, "DNS NXDOMAIN: " + str(Argument), True]
+        return [True, "", False]
+    except (UnicodeError, ValueError) as Argument:
+        return [False, "DNS invalid domain: " + str(Argument), True]
+    return [True, "", True]
+#
+# Resolver(filename, ttl, workers) - Create a resolver with a cache read from the given file (if it exists) whose entries expire after
+# ttl seconds, resolving up to workers domains at once.
+#
+class Resolver:
+    #
+    def __init__ (self, filename, ttl=86400, workers=32):
+        self.filename = filename
+        self.ttl = ttl
+        self.cache = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        if os.path.isfile(filename):
+            self.read(filename)
+    #
+    # read(filename) - Add the entries of a cache file written by save() that are less than ttl seconds old, e.g., those saved by the
+    # resolvers of the webcrawler.py shard processes.
+    #
+    def read (self, filename):
+        file = open(filename,"r")
+        entries = json.load(file)
+        file.close()
+        now = time.time()
+        with self.lock:
+            for domain, entry in entries.items():
+                if now - entry[2] < self.ttl:
+                    self.cache[domain] = entry
+    #
+    # work(domain) - Resolve the domain on a worker thread and cache the result, unless the failure was temporary.
+    #
+    def work (self, domain):
+        found, error, cache = resolve(domain)
+        with self.lock:
+            if cache:
+                self.cache[domain] = [found, error, time.time()]
+            del self.pending[domain]
+        return found, error
+    #
+    # prefetch(domains) - Start resolving each of the domains that is not already cached or being resolved, without waiting.
+    #
+    def prefetch (self, domains):
+        with self.lock:
+            for domain in domains:
+                if (domain != "") and (domain not in self.cache) and (domain not in self.pending):
+                    self.pending[domain] = self.executor.submit(self.work, domain)
+    #
+    # lookup(domain) - Return [found, error] for the domain, waiting for it to be resolved if necessary.
+    #
+    def lookup (self, domain):
+        with self.lock:
+            entry = self.cache.get(domain)
+            future = self.pending.get(domain)
+        if entry is not None:
+            return entry[0], entry[1]
+        if future is None:
+            self.prefetch([domain])
+            with self.lock:
+                entry = self.cache.get(domain)
+                future = self.pending.get(domain)
+            if entry is not None:
+                return entry[0], entry[1]
+            if future is None:
+                return True, ""
+        found, error = future.result()
+        return found, error
+    #
+    # save() - Stop resolving and write the cache to its file.
+    #
+    def save (self):
+        self.executor.shutdown(cancel_futures=True)
+        with self.lock:
+            entries = dict(self.cache)
+        file = open(self.filename,"w")
+        json.dump(entries, file)
+        file.close()
@@ -0,0 +1,205 @@
+#
+# JournalList.net webcrawler frontier, the queue of trust.txt files still to be fetched.
+#
+# Name - frontier.py
+# Synopsis - from frontier import Frontier, Visited, shardof
+#
+# Summary - A Frontier holds the [srcdomain, attr, refdomain] tasks waiting to be crawled. It records each refdomain it queues in a
+# Visited index, so that each domain is queued at most once and the memory used is bounded by the number of distinct domains found.
+# The order tasks are taken from the frontier is chosen when it is created:
+#
+#   "dfs"      - depth first, last queued is crawled first (the order of the original recursive webcrawler).
+#   "bfs"      - breadth first, first queued is crawled first.
+#   "priority" - by priority class, and within a class the longest expected to take first.
+#
+# With "priority", each task is in one of the priority classes, crawled in this order:
+#
+#   ROOT       - the root domain, and the domains its "member" and "belongto" references lead to, e.g., the JournalList member tree.
+#   SYMMETRIC  - the other domains referenced by symmetric attributes, e.g., "vendor", "control", or the members of a well-known.dev domain.
+#   DISCOVERED - the domains of the well-known.dev resource list.
+#
+# Tasks queued with a priority are in that class, others in the class classify() gives them from the class of their srcdomain and their
+# attribute. Within a class, tasks are crawled longest expected time first, from the seconds each domain took in an earlier crawl (see
+# metrics.py), so that with several fetches at once the slowest domains are not started last and left to finish on their own. Domains
+# without an expected time are crawled after those with one, in the order they were queued.
+#
+# The Visited index maps each normalized domain to the outcome of crawling it:
+#
+#   "queued"   - queued on the frontier, not yet fetched.
+#   "success"  - the trust.txt file was fetched.
+#   "failure"  - the trust.txt file could not be fetched, or was not plaintext.
+#   "redirect" - the trust.txt file was fetched, but from another domain it redirects to.
+#
+# so checking whether a domain has already been crawled does not touch the disk. It can be saved to and read back from a .csv file.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import zlib
+import heapq
+from collections import deque
+#
+# Orders supported by the frontier
+#
+orders = ["dfs", "bfs", "priority"]
+#
+# Priority classes, lowest first, and the attributes that keep a reference in the ROOT class
+#
+ROOT = 0
+SYMMETRIC = 1
+DISCOVERED = 2
+treeattr = frozenset(["member", "belongto"])
+#
+# Outcomes recorded in the visited index
+#
+outcomes = ["queued", "success", "failure", "redirect"]
+#
+# shardof(domain, shards) - Return the shard, from 0 to shards-1, the domain belongs to. Uses crc32 rather than hash() so that a domain
+# is always in the same shard from one run, or one machine, to the next.
+#
+def shardof (domain, shards):
+    return zlib.crc32(domain.encode("utf-8")) % shards
+#
+# classify(srcclass, attr) - Return the priority class of a reference with the given attribute from a domain in the class srcclass.
+#
+def classify (srcclass, attr):
+    if (srcclass == ROOT) and (attr in treeattr):
+        return ROOT
+    return SYMMETRIC
+#
+# Visited() - Create an empty visited index.
+#
+class Visited:
+    #
+    def __init__ (self):
+        self.outcomes = {}
+    #
+    def __len__ (self):
+        return len(self.outcomes)
+    #
+    def __contains__ (self, domain):
+        return domain in self.outcomes
+    #
+    # mark(domain, outcome) - Record the outcome of crawling the domain.
+    #
+    def mark (self, domain, outcome):
+        if outcome not in outcomes:
+            raise ValueError("Unknown visited outcome: " + outcome)
+        self.outcomes[domain] = outcome
+    #
+    # outcome(domain) - Return the outcome recorded for the domain, or "" if it has not been visited.
+    #
+    def outcome (self, domain):
+        return self.outcomes.get(domain, "")
+    #
+    # write(filename) - Write the index to a .csv file with the columns domain,outcome.
+    #
+    def write (self, filename):
+        file = open(filename,"w")
+        file.write("domain,outcome\n")
+        for domain in sorted(self.outcomes):
+            file.write(domain + "," + self.outcomes[domain] + "\n")
+        file.close()
+    #
+    # read(filename) - Add the entries of a .csv file written by write() to the index.
+    #
+    def read (self, filename):
+        file = open(filename,"r")
+        for line in file:
+            temp = line.rstrip("\n").split(",")
+            if (len(temp) == 2) and (temp[0] != "domain"):
+                self.mark(temp[0], temp[1])
+        file.close()
+#
+# Frontier(order, visited, expected) - Create an empty frontier that hands out tasks in the given order and records the domains it queues
+# in the given visited index. With the "priority" order, expected maps domains to the seconds they are expected to take.
+#
+class Frontier:
+    #
+    def __init__ (self, order="dfs", visited=None, expected=None):
+        if order not in orders:
+            raise ValueError("Unknown frontier order: " + order)
+        self.order = order
+        if visited is None:
+            visited = Visited()
+        self.visited = visited
+        #
+        # With "priority", tasks are a heap of (class, -expected seconds, sequence, task), and the class of each domain queued is kept
+        # to classify its references
+        #
+        if order == "priority":
+            self.tasks = []
+        else:
+            self.tasks = deque()
+        self.expected = expected or {}
+        self.classes = {}
+        self.seq = 0
+    #
+    def __len__ (self):
+        return len(self.tasks)
+    #
+    # seen(refdomain) - Return True if the refdomain has already been queued or crawled.
+    #
+    def seen (self, refdomain):
+        return refdomain in self.visited
+    #
+    # push(srcdomain, attr, refdomain, priority) - Queue the task and mark the refdomain as queued in the visited index. Returns False,
+    # without queuing it, if the refdomain was already visited. The priority class is only used by the "priority" order, if it is None
+    # it is given by classify().
+    #
+    def push (self, srcdomain, attr, refdomain, priority=None):
+        if refdomain in self.visited:
+            return False
+        self.visited.mark(refdomain, "queued")
+        self.queue([srcdomain, attr, refdomain], priority)
+        return True
+    #
+    # queue(task, priority) - Add the [srcdomain, attr, refdomain] task to the tasks in the frontier order.
+    #
+    def queue (self, task, priority):
+        if self.order != "priority":
+            self.tasks.append(task)
+            return
+        if priority is None:
+            priority = classify(self.classes.get(task[0], SYMMETRIC), task[1])
+        self.classes[task[2]] = priority
+        self.seq += 1
+        heapq.heappush(self.tasks, (priority, -self.expected.get(task[2], 0.0), self.seq, task))
+    #
+    # extend(tasks, priority) - Queue a list of [srcdomain, attr, refdomain] tasks found together, e.g., the references in one trust.txt
+    # file, so that they are crawled in the order they are listed whatever the frontier order is, or with "priority" the order they are
+    # listed within their class and expected time.
+    #
+    def extend (self, tasks, priority=None):
+        if self.order == "dfs":
+            tasks = reversed(tasks)
+        for srcdomain, attr, refdomain in tasks:
+            self.push(srcdomain, attr, refdomain, priority)
+    #
+    # pop() - Remove and return the next [srcdomain, attr, refdomain] task.
+    #
+    def pop (self):
+        if self.order == "dfs":
+            return self.tasks.pop()
+        if self.order == "priority":
+            return heapq.heappop(self.tasks)[3]
+        return self.tasks.popleft()
+    #
+    # dump() - Return the list of [srcdomain, attr, refdomain] tasks on the frontier, in the order they are held, e.g., to checkpoint it.
+    # With "priority", each task is followed by its class, [srcdomain, attr, refdomain, priority].
+    #
+    def dump (self):
+        if self.order == "priority":
+            return [list(entry[3]) + [entry[0]] for entry in sorted(self.tasks)]
+        return [list(task) for task in self.tasks]
+    #
+    # load(tasks) - Put back tasks returned by dump(), in the same order. Their refdomains are expected to be in the visited index already.
+    # Tasks without a class, e.g., those being fetched when a checkpoint was written, are classified as they are queued.
+    #
+    def load (self, tasks):
+        for task in tasks:
+            srcdomain, attr, refdomain = task[0:3]
+            if refdomain not in self.visited:
+                self.visited.mark(refdomain, "queued")
+            self.queue([srcdomain, attr, refdomain], task[3] if len(task) > 3 else None)
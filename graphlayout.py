@@ -0,0 +1,150 @@
+#
+# JournalList.net ecosystem graph layout, computes the coordinates of the nodes of the graphml.py GraphML files so that yEd opens them
+# already laid out.
+#
+# Name - graphlayout.py
+# Synopsis - import graphlayout
+#            previous = graphlayout.read("Webcrawl-YYYY-MM-DD/Webcrawl-YYYY-MM-DD-layout.csv")
+#            positions = graphlayout.layout(nodes, edges, previous, iterations=50)
+#            graphlayout.write("Webcrawl-YYYY-MM-DD/Webcrawl-YYYY-MM-DD-layout.csv", positions)
+#
+# Summary - A force-directed (Fruchterman-Reingold) layout, vectorized with NumPy. Each edge pulls its nodes together with a force of
+# dist^2/k, and every pair of nodes pushes apart with a force of k^2/dist, where k is the ideal length of an edge. The moves of the
+# nodes are limited by a temperature that falls to zero over the iterations.
+#
+# The edges are held as arrays of source and target node indexes, the adjacency matrix in sparse coordinate form, so the attraction
+# of all of them is summed with two bincounts per axis. The repulsion of every pair of nodes would be quadratic, so it is approximated
+# on a grid of cells (particle-mesh): each cell repels the nodes of the others as if its nodes were all at its centroid, and the nodes
+# within a cell are pushed away from its centroid by the others in it. The grid is shifted at random on each iteration, so that nodes
+# on either side of the edge of a cell do not stay out of each other's reach.
+#
+# Nodes that have a position in the previous layout, e.g., of the previous day's crawl, start from it, and new nodes next to one of
+# their neighbours that does, so the layout changes little from one day to the next. The more nodes start from a previous position,
+# the lower the starting temperature, down to a tenth of the ideal edge length when all of them do, and the fewer the iterations, down
+# to a fifth of them.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import math
+import numpy as np
+#
+# Ideal length of an edge, and most cells along each side of the repulsion grid
+#
+distance = 80.0
+maxcells = 32
+#
+# attraction(pos, src, dst) - Return the displacement of each node by the edges from the src to the dst node indexes.
+#
+def attraction (pos, src, dst):
+    n = len(pos)
+    delta = pos[dst] - pos[src]
+    force = delta * (np.hypot(delta[:, 0], delta[:, 1]) / distance)[:, None]
+    disp = np.empty((n, 2))
+    for axis in range(2):
+        disp[:, axis] = np.bincount(src, force[:, axis], n) - np.bincount(dst, force[:, axis], n)
+    return disp
+#
+# repulsion(pos, shift) - Return the displacement of each node by the others, approximated on a grid of cells shifted by the given
+# fractions of a cell along each axis.
+#
+def repulsion (pos, shift):
+    n = len(pos)
+    side = max(1, min(maxcells, int(math.sqrt(n) / 2)))
+    span = max(float((pos.max(0) - pos.min(0)).max()), 1e-9) * (side + 1) / side
+    low = pos.min(0) - shift * span / (side + 1)
+    cell = np.minimum(((pos - low) / span * side).astype(np.intp), side - 1)
+    cell = cell[:, 0] * side + cell[:, 1]
+    #
+    # The mass and centroid of each occupied cell, and the occupied cell of each node
+    #
+    mass = np.bincount(cell, minlength=side * side).astype(float)
+    occupied = np.nonzero(mass)[0]
+    slot = np.zeros(side * side, dtype=np.intp)
+    slot[occupied] = np.arange(len(occupied))
+    slot = slot[cell]
+    mass = mass[occupied]
+    cx = np.bincount(cell, pos[:, 0], side * side)[occupied] / mass
+    cy = np.bincount(cell, pos[:, 1], side * side)[occupied] / mass
+    #
+    # Far field, each cell repelled by the others
+    #
+    dx = cx[:, None] - cx[None, :]
+    dy = cy[:, None] - cy[None, :]
+    d2 = np.maximum(dx * dx + dy * dy, 1e-9)
+    np.fill_diagonal(d2, np.inf)
+    force = (distance * distance) * mass[None, :] / d2
+    disp = np.stack([(dx * force).sum(1)[slot], (dy * force).sum(1)[slot]], 1)
+    #
+    # Near field, each node repelled by the others in its cell
+    #
+    dx = pos[:, 0] - cx[slot]
+    dy = pos[:, 1] - cy[slot]
+    force = (distance * distance) * (mass[slot] - 1) / np.maximum(dx * dx + dy * dy, 1e-2)
+    disp[:, 0] += dx * force
+    disp[:, 1] += dy * force
+    return disp
+#
+# layout(nodes, edges, previous, iterations, seed) - Return the dictionary of the (x, y) position of each of the list of nodes, linked
+# by the list of (source, target) edges, starting from their positions in the previous dictionary if they have one.
+#
+def layout (nodes, edges, previous={}, iterations=50, seed=2021):
+    n = len(nodes)
+    if n == 0:
+        return {}
+    index = dict([(node, i) for i, node in enumerate(nodes)])
+    src = np.array([index[source] for source, target in edges], dtype=np.intp)
+    dst = np.array([index[target] for source, target in edges], dtype=np.intp)
+    #
+    # Start from the previous positions, new nodes next to a neighbour with one, the others at random
+    #
+    random = np.random.default_rng(seed)
+    size = distance * math.sqrt(n)
+    pos = random.uniform(0.0, size, (n, 2))
+    seeded = np.zeros(n, dtype=bool)
+    for node, position in previous.items():
+        if node in index:
+            pos[index[node]] = position
+            seeded[index[node]] = True
+    if seeded.any():
+        placed = seeded.copy()
+        for source, target in zip(src.tolist(), dst.tolist()):
+            if placed[source] != placed[target]:
+                if placed[source]:
+                    source, target = target, source
+                pos[source] = pos[target] + random.normal(0.0, distance / 2, 2)
+                placed[source] = True
+    #
+    # Move the nodes, limited by the temperature, which falls linearly to zero
+    #
+    start = max(size / 10 * (1.0 - seeded.mean()), distance / 10)
+    iterations = max(iterations // 5, int(round(iterations * (1.0 - seeded.mean()))), 1)
+    for iteration in range(iterations):
+        temperature = start * (1.0 - iteration / iterations)
+        disp = repulsion(pos, random.uniform(0.0, 1.0, 2)) + attraction(pos, src, dst)
+        length = np.maximum(np.hypot(disp[:, 0], disp[:, 1]), 1e-9)
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+    #
+    return dict([(node, (float(pos[i, 0]), float(pos[i, 1]))) for i, node in enumerate(nodes)])
+#
+# write(filename, positions) - Write the positions to a .csv file with the columns url,x,y.
+#
+def write (filename, positions):
+    file = open(filename,"w")
+    file.write("url,x,y\n")
+    for node, (x, y) in positions.items():
+        file.write(node + "," + str(round(x, 1)) + "," + str(round(y, 1)) + "\n")
+    file.close()
+#
+# read(filename) - Return the dictionary of positions in a .csv file written by write().
+#
+def read (filename):
+    positions = {}
+    file = open(filename,"r")
+    for line in file:
+        temp = line.rstrip("\n").rsplit(",", 2)
+        if (len(temp) == 3) and (temp[0] != "url"):
+            positions[temp[0]] = (float(temp[1]), float(temp[2]))
+    file.close()
+    return positions
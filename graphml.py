@@ -3,16 +3,45 @@
 # Parses the symmetric.csv file generated by the JournalList.net webcrawler to generate a .graphml social graph.
 #
 # Name - graphml.py
-# Synopsis - graphml.py [DIRNAME]
+# Synopsis - graphml.py [-z] [-l [-i ITERATIONS]] [-o] [-c] [DIRNAME]
 #   DIRNAME - optional, the directory containing the symmetric.csv file. Default is "Webcrawl-YYYY-MM-DD" where "YYYY-MM-DD" is today's date.
+#   -z, --gzip - optional, write the graphs compressed with gzip, as .graphmlz files, which yEd opens as they are.
+#   -l, --layout - optional, lay the graph out (see graphlayout.py, which needs NumPy) and write the position of each node into the
+#   graphs, so yEd does not have to lay them out when they are opened. The positions are also written to Webcrawl-YYYY-MM-DD-layout.csv,
+#   and the layout starts from those of the most recent earlier Webcrawl directory that has one, so it changes little from day to day.
+#   -i ITERATIONS, --iterations ITERATIONS - optional, with --layout, the number of iterations of the layout. Default is 50.
+#   -o, --owners - optional, also write the owner level graphs, -owners, -owners-symmetric, and -owners-asymmetric, in which each
+#   controlled domain is collapsed into the domain that controls it, and Webcrawl-YYYY-MM-DD-owners.csv, the owner,member index of the
+#   domains collapsed into each owner.
+#   -c, --communities - optional, also split the graph into communities, writing the graph of each into the Webcrawl-YYYY-MM-DD-communities
+#   directory, the -communities summary graph of the edges between them, and Webcrawl-YYYY-MM-DD-communities.csv, the community,member
+#   index of the domains in each.
+#
+# The crawl .csv file is read once, adding each node and edge to a Graph with the views (all links, symmetric links, and asymmetric
+# links) it belongs to. Each node and edge is then rendered as GraphML once, however many views it is in, and each view is written to
+# its file in large blocks.
+#
+# In the owner level graphs, the owner of a domain listed in the -controlled.csv file is the other end of its control or controlledby
+# edge, or that domain's owner if it is controlled too, so a chain of publishers collapses into the one at its head. The edges between
+# the same owners with the same labels are merged into one, labelled with the number of edges merged, e.g., "member (12)", and the
+# edges between an owner and the domains it controls are dropped. Domains controlled in a loop are left as they are.
+#
+# The communities are the member trees of the associations, each association with the domains it has a member or belongto edge with,
+# grown by label propagation: each other domain repeatedly joins the community most of its neighbours are in, until none moves. A
+# domain in the member tree of more than one association stays in the first, and those not connected to any member tree are all put in
+# the "unassigned" community. Each community is named after the domain it started from, with any "/" replaced by "_", e.g.,
+# Webcrawl-YYYY-MM-DD-communities/www.journallist.net.graphml, and its graph has the edges between its domains. The summary graph has a
+# node for each community, of the color of the domain it is named after, white for unassigned, and the edges between communities merged
+# as in the owner level graphs.
 #
 # Copyright (c) 2021 Brown Wolf Consulting LLC
 # License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
 #
 #--------------------------------------------------------------------------------------------------
-import sys
 import os
 import time
+import gzip
+import argparse
 #
 # Set global colors
 #
@@ -26,49 +55,113 @@ red = "#FF0000"
 black = "#000000"
 white = "#FFFFFF"
 #
-# Write header to a gmlfile
-# 
-def write_header(gmlfile, title):
-    #
-    # Write graphml header to file
-    #
-    gmlfile.write("<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"no\"?>\n")
-    gmlfile.write("<graphml\n")
-    gmlfile.write("  xmlns=\"http://graphml.graphdrawing.org/xmlns\"\n")
-    gmlfile.write("  xmlns:java=\"http://www.yworks.com/xml/yfiles-common/1.0/java\"\n")
-    gmlfile.write("  xmlns:sys=\"http://www.yworks.com/xml/yfiles-common/markup/primitives/2.0\"\n")
-    gmlfile.write("  xmlns:x=\"http://www.yworks.com/xml/yfiles-common/markup/2.0\"\n")
-    gmlfile.write("  xmlns:xlink=\"http://www.w3.org/1999/xlink\"\n")
-    gmlfile.write("  xmlns:xsi=\"http://www.w3.org/2001/XMLSchema-instance\"\n")
-    gmlfile.write("  xmlns:y=\"http://www.yworks.com/xml/graphml\"\n")
-    gmlfile.write("  xmlns:yed=\"http://www.yworks.com/xml/yed/3\"\n")
-    gmlfile.write("  xsi:schemaLocation=\"http://graphml.graphdrawing.org/xmlns graphml+xlink.xsd\">\n")
-    gmlfile.write("  <key for=\"port\" id=\"d0\" yfiles.type=\"portgraphics\"/>\n")
-    gmlfile.write("  <key for=\"port\" id=\"d1\" yfiles.type=\"portgeometry\"/>\n")
-    gmlfile.write("  <key for=\"port\" id=\"d2\" yfiles.type=\"portuserdata\"/>\n")
-    gmlfile.write("  <key attr.name=\"url\" attr.type=\"string\" for=\"node\" id=\"d3\"/>\n")
-    gmlfile.write("  <key attr.name=\"description\" attr.type=\"string\" for=\"node\" id=\"d4\"/>\n")
-    gmlfile.write("  <key for=\"node\" id=\"d5\" yfiles.type=\"nodegraphics\"/>\n")
-    gmlfile.write("  <key for=\"node\" id=\"d6\" yfiles.type=\"nodegraphics\"/>\n")
-    gmlfile.write("  <key for=\"graphml\" id=\"d7\" yfiles.type=\"resources\"/>\n")
-    gmlfile.write("  <key attr.name=\"url\" attr.type=\"string\" for=\"edge\" id=\"d8\"/>\n")
-    gmlfile.write("  <key attr.name=\"description\" attr.type=\"string\" for=\"edge\" id=\"d9\"/>\n")
-    gmlfile.write("  <key for=\"edge\" id=\"d10\" yfiles.type=\"edgegraphics\"/>\n")
-    gmlfile.write("\n")
-    gmlfile.write("  <graph id=\"" + title + "\" edgedefault=\"directed\">\n")
-#
-# Write the tail of the gmlfile and close it.
-#
-def write_tail(gmlfile):
-    gmlfile.write("  </graph>\n")
-    gmlfile.write("  <data key=\"d6\">\n")
-    gmlfile.write("    <y:Resources/>\n")
-    gmlfile.write("  </data>\n")
-    gmlfile.write("</graphml>\n")
-#
-# Write a node definition to the gmlfile.
-#
-def write_node (gmlfile, url, color, border):
+# Views of the graph, each written to its own file
+#
+views = ["all", "symmetric", "asymmetric"]
+#
+# Size, in characters, of the blocks the GraphML files are written in
+#
+blocksize = 1 << 20
+#
+# GraphML header, with the title of the graph, and tail.
+#
+header = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<graphml
+  xmlns="http://graphml.graphdrawing.org/xmlns"
+  xmlns:java="http://www.yworks.com/xml/yfiles-common/1.0/java"
+  xmlns:sys="http://www.yworks.com/xml/yfiles-common/markup/primitives/2.0"
+  xmlns:x="http://www.yworks.com/xml/yfiles-common/markup/2.0"
+  xmlns:xlink="http://www.w3.org/1999/xlink"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+  xmlns:y="http://www.yworks.com/xml/graphml"
+  xmlns:yed="http://www.yworks.com/xml/yed/3"
+  xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns graphml+xlink.xsd">
+  <key for="port" id="d0" yfiles.type="portgraphics"/>
+  <key for="port" id="d1" yfiles.type="portgeometry"/>
+  <key for="port" id="d2" yfiles.type="portuserdata"/>
+  <key attr.name="url" attr.type="string" for="node" id="d3"/>
+  <key attr.name="description" attr.type="string" for="node" id="d4"/>
+  <key for="node" id="d5" yfiles.type="nodegraphics"/>
+  <key for="node" id="d6" yfiles.type="nodegraphics"/>
+  <key for="graphml" id="d7" yfiles.type="resources"/>
+  <key attr.name="url" attr.type="string" for="edge" id="d8"/>
+  <key attr.name="description" attr.type="string" for="edge" id="d9"/>
+  <key for="edge" id="d10" yfiles.type="edgegraphics"/>
+
+  <graph id="%s" edgedefault="directed">
+"""
+tail = """  </graph>
+  <data key="d6">
+    <y:Resources/>
+  </data>
+</graphml>
+"""
+#
+# Templates of a node, its geometry if it has a position, the forward and backward edges of a bidirectional edge, and a unidirectional edge.
+#
+nodetemplate = """    <node id="%(id)s" xlink:href="%(href)s">
+      <data key="d3" xml:space="preserve"><![CDATA[%(href)s]]></data>
+      <data key="d4" xml:space="preserve"><![CDATA[%(id)s]]></data>
+      <data key="d5">
+        <y:ShapeNode>
+%(geometry)s          <y:Fill color="%(color)s" transparent="false"/>
+          <y:BorderStyle color="#000000" type="%(border)s" width="1.0"/>
+          <y:NodeLabel modelName="sides" modelPosition="e">%(id)s</y:NodeLabel>
+          <y:Shape type="ellipse"/>
+        </y:ShapeNode>
+      </data>
+    </node>
+"""
+label = """          <y:EdgeLabel fontSize="9" backgroundColor="#FFFFFF" modelName="custom" preferredPlacement="anywhere">%s<y:RotatedDiscreteEdgeLabelModel angle="0.0" autoRotationEnabled="true"/>
+          <y:LabelModel><y:RotatedDiscreteEdgeLabelModel angle="0.0" autoRotationEnabled="true" candidateMask="128" distance="2.0" positionRelativeToSegment="false"/></y:LabelModel><y:ModelParameter><y:RotatedDiscreteEdgeLabelModelParameter position="scenter"/></y:ModelParameter>
+          </y:EdgeLabel>
+"""
+forwardtemplate = """    <edge source="%s" target="%s">
+      <data key="d9"/>
+      <data key="d10">
+        <y:LineEdge>
+          <y:LineStyle color="#000000" type="line" width="1.0"/>
+""" + label + """        </y:LineEdge>
+      </data>
+    </edge>
+"""
+backwardtemplate = """    <edge source="%s" target="%s">
+      <data key="d9"/>
+      <data key="d10">
+        <y:LineEdge>
+        <y:LineStyle color="#000000" type="line" width="1.0"/>
+""" + label + """        </y:LineEdge>
+      </data>
+    </edge>
+"""
+unitemplate = """    <edge source="%s" target="%s">
+      <data key="d7"/>
+      <data key="d10">
+        <y:LineEdge>
+          <y:LineStyle color="#000000" type="line" width="1.0"/>
+""" + label + """        </y:LineEdge>      </data>
+    </edge>
+"""
+geometrytemplate = """          <y:Geometry height="30.0" width="30.0" x="%.1f" y="%.1f"/>
+"""
+#
+# Pseudo url of the community of the domains not connected to any association's member tree (see communities).
+#
+unassigned = "https://unassigned/"
+#
+# Return the node id of a url, e.g., "www.journallist.net" for "https://www.journallist.net/".
+#
+def nodeid (url):
+    return url[8:len(url)-1]
+#
+# Return the name of the file of a url's graph, its node id with any "/" of its path replaced by "_", e.g., "www.assoc.org_news".
+#
+def graphname (url):
+    return nodeid(url).replace("/","_")
+#
+# Return the GraphML of a node, at the (x, y) position if it has one.
+#
+def render_node (url, color, border, position=None):
     #
     # Set href to the url's trust.txt file, unless the node color is lightgreen, lightblue, or lightyellow, in which case set href to "https://www.journallist.net/missing_trust_file/"
     #
@@ -76,126 +169,207 @@ def write_node (gmlfile, url, color, border):
     if (color == lightgreen or color == lightblue or color == lightyellow):
         href = "https://www.journallist.net/missing_trust_file/"
     #
-    nodeid = url[8:len(url)-1]
+    id = nodeid(url)
     #
     # If node id is "www.publisher.com" or "www.association.com" or "www.vendor.com" or "missing_trust.txt_file" then set href to "https://www.journallist.net/definitions/"
     #
-    if (nodeid == "www.publisher.com" or nodeid == "www.association.com" or nodeid == "www.vendor.com" or nodeid == "missing_trust.txt_file" ):
+    if (id == "www.publisher.com" or id == "www.association.com" or id == "www.vendor.com" or id == "missing_trust.txt_file" ):
         href = "https://www.journallist.net/definitions/"
     #
-    # print ("url =", url, "nodeid =", nodeid, "color =", color, "href =", href)
+    geometry = ""
+    if position is not None:
+        geometry = geometrytemplate % position
+    return nodetemplate % {"id": id, "href": href, "color": color, "border": border, "geometry": geometry}
+#
+# Return the GraphML of a bidirectional edge, its forward and backward edges.
+#
+def render_biedge (source, target, forward, backward):
+    sourceid = nodeid(source)
+    targetid = nodeid(target)
+    return (forwardtemplate % (sourceid, targetid, forward)) + (backwardtemplate % (targetid, sourceid, backward))
+#
+# Return the GraphML of a unidirectional edge.
+#
+def render_uniedge (source, target, forward):
+    return unitemplate % (nodeid(source), nodeid(target), forward)
+#
+# Legend nodes, (url, color, border)
+#
+legendnodes = [
+    ("https://www.association.com/",green,"line"),
+    ("https://www.publisher.com/",blue,"line"),
+    ("https://www.vendor.com/",yellow,"line"),
+    ("https://missing_trust.txt_file/",lightblue,"dashed")
+]
+#
+# Return the GraphML of the legend nodes and edges (no need for missing_trust.txt_file in symmetric version). If the graph has been
+# laid out, the legend nodes are placed in a column to the left of its positions.
+#
+def render_legend (positions={}):
+    legend = {}
+    if len(positions) > 0:
+        left = min(x for x, y in positions.values()) - 300.0
+        top = min(y for x, y in positions.values())
+        legend = dict([(url, (left, top + 100.0 * i)) for i, (url, color, border) in enumerate(legendnodes)])
+    return "".join([render_node(url, color, border, legend.get(url)) for url, color, border in legendnodes] + [
+        render_biedge("https://www.association.com/","https://www.publisher.com/","member","belongto"),
+        render_biedge("https://www.publisher.com/","https://www.vendor.com/","vendor", "customer"),
+        render_uniedge("https://www.publisher.com/","https://missing_trust.txt_file/","control")
+    ])
+#
+# Graph() - Create an empty graph. Its nodes map each url to its (color, border), its edges are (srcurl, refurl, forward, backward),
+# with backward None for a unidirectional edge, and each of its views lists the urls of the nodes and the indexes of the edges in it,
+# in the order they were added. Its positions map the url of each node to its (x, y) position once it has been laid out, and its legend
+# is the GraphML written at the start of each view, rendered the first time one is written.
+#
+class Graph:
     #
-    gmlfile.write("    <node id=\"" + nodeid + "\" xlink:href=\"" + href + "\">\n")
-    gmlfile.write("      <data key=\"d3\" xml:space=\"preserve\"><![CDATA[" + href + "]]></data>\n")
-    gmlfile.write("      <data key=\"d4\" xml:space=\"preserve\"><![CDATA[" + nodeid + "]]></data>\n")
-    gmlfile.write("      <data key=\"d5\">\n")
-    gmlfile.write("        <y:ShapeNode>\n")
-    gmlfile.write("          <y:Fill color=\"" + color + "\" transparent=\"false\"/>\n")
-    gmlfile.write("          <y:BorderStyle color=\"#000000\" type=\"" + border + "\" width=\"1.0\"/>\n")
-    gmlfile.write("          <y:NodeLabel modelName=\"sides\" modelPosition=\"e\">" + nodeid + "</y:NodeLabel>\n")
-    gmlfile.write("          <y:Shape type=\"ellipse\"/>\n")
-    gmlfile.write("        </y:ShapeNode>\n")
-    gmlfile.write("      </data>\n")
-    gmlfile.write("    </node>\n")
-#
-# Write a bidirectional edge definition to the gmlfile.
-#
-def write_biedge (gmlfile, source, target, forward, backward):
-    sourceid = source[8:len(source)-1]
-    targetid = target[8:len(target)-1]
+    def __init__ (self):
+        self.nodes = {}
+        self.edges = []
+        self.views = dict([(view, []) for view in views])
+        self.members = dict([(view, set()) for view in views])
+        self.positions = {}
+        self.legend = None
+        self.rendered = {}
     #
-    # Write forward edge
+    # addnode(view, url, color, border) - Add the node to the view, unless it is already in it.
     #
-    gmlfile.write("    <edge source=\"" + sourceid + "\" target=\"" + targetid + "\">\n")
-    gmlfile.write("      <data key=\"d9\"/>\n")
-    gmlfile.write("      <data key=\"d10\">\n")
-    gmlfile.write("        <y:LineEdge>\n")
-    gmlfile.write("          <y:LineStyle color=\"#000000\" type=\"line\" width=\"1.0\"/>\n")
-    gmlfile.write("          <y:EdgeLabel fontSize=\"9\" backgroundColor=\"#FFFFFF\" modelName=\"custom\" preferredPlacement=\"anywhere\">" + forward + "<y:RotatedDiscreteEdgeLabelModel angle=\"0.0\" autoRotationEnabled=\"true\"/>\n")
-    gmlfile.write("          <y:LabelModel><y:RotatedDiscreteEdgeLabelModel angle=\"0.0\" autoRotationEnabled=\"true\" candidateMask=\"128\" distance=\"2.0\" positionRelativeToSegment=\"false\"/></y:LabelModel><y:ModelParameter><y:RotatedDiscreteEdgeLabelModelParameter position=\"scenter\"/></y:ModelParameter>\n")
-    gmlfile.write("          </y:EdgeLabel>\n")
-    gmlfile.write("        </y:LineEdge>\n")
-    gmlfile.write("      </data>\n")
-    gmlfile.write("    </edge>\n")
+    def addnode (self, view, url, color, border):
+        if url not in self.members[view]:
+            self.members[view].add(url)
+            self.nodes[url] = (color, border)
+            self.views[view].append(url)
     #
-    # Write backward edge
+    # addedge(inviews, srcurl, refurl, forward, backward) - Add the edge to each of the views, bidirectional unless backward is None.
     #
-    gmlfile.write("    <edge source=\"" + targetid + "\" target=\"" + sourceid + "\">\n")
-    gmlfile.write("      <data key=\"d9\"/>\n")
-    gmlfile.write("      <data key=\"d10\">\n")
-    gmlfile.write("        <y:LineEdge>\n")
-    gmlfile.write("        <y:LineStyle color=\"#000000\" type=\"line\" width=\"1.0\"/>\n")
-    gmlfile.write("          <y:EdgeLabel fontSize=\"9\" backgroundColor=\"#FFFFFF\" modelName=\"custom\" preferredPlacement=\"anywhere\">" + backward + "<y:RotatedDiscreteEdgeLabelModel angle=\"0.0\" autoRotationEnabled=\"true\"/>\n")
-    gmlfile.write("          <y:LabelModel><y:RotatedDiscreteEdgeLabelModel angle=\"0.0\" autoRotationEnabled=\"true\" candidateMask=\"128\" distance=\"2.0\" positionRelativeToSegment=\"false\"/></y:LabelModel><y:ModelParameter><y:RotatedDiscreteEdgeLabelModelParameter position=\"scenter\"/></y:ModelParameter>\n")
-    gmlfile.write("          </y:EdgeLabel>\n")
-    gmlfile.write("        </y:LineEdge>\n")
-    gmlfile.write("      </data>\n")
-    gmlfile.write("    </edge>\n")
-#
-# Write a unidirectional edge definition to the gmlfile.
-#
-def write_uniedge (gmlfile, source, target, forward):
-    sourceid = source[8:len(source)-1]
-    targetid = target[8:len(target)-1]
-    gmlfile.write("    <edge source=\"" + sourceid + "\" target=\"" + targetid + "\">\n")
-    gmlfile.write("      <data key=\"d7\"/>\n")
-    gmlfile.write("      <data key=\"d10\">\n")
-    gmlfile.write("        <y:LineEdge>\n")
-    gmlfile.write("          <y:LineStyle color=\"#000000\" type=\"line\" width=\"1.0\"/>\n")
-    gmlfile.write("          <y:EdgeLabel fontSize=\"9\" backgroundColor=\"#FFFFFF\" modelName=\"custom\" preferredPlacement=\"anywhere\">" + forward + "<y:RotatedDiscreteEdgeLabelModel angle=\"0.0\" autoRotationEnabled=\"true\"/>\n")
-    gmlfile.write("          <y:LabelModel><y:RotatedDiscreteEdgeLabelModel angle=\"0.0\" autoRotationEnabled=\"true\" candidateMask=\"128\" distance=\"2.0\" positionRelativeToSegment=\"false\"/></y:LabelModel><y:ModelParameter><y:RotatedDiscreteEdgeLabelModelParameter position=\"scenter\"/></y:ModelParameter>\n")
-    gmlfile.write("          </y:EdgeLabel>\n")
-    gmlfile.write("        </y:LineEdge>")
-    gmlfile.write("      </data>\n")
-    gmlfile.write("    </edge>\n")
-#
-# Write graphml ledgend.
-#
-def write_legend(gmlfile):
+    def addedge (self, inviews, srcurl, refurl, forward, backward=None):
+        index = len(self.edges)
+        self.edges.append((srcurl, refurl, forward, backward))
+        for view in inviews:
+            self.views[view].append(index)
     #
-    # Write legend nodes and edges (no need for missing_trust.txt_file in symmetric version)
+    # render(item) - Return the GraphML of the node url or edge index, rendering it only the first time it is asked for.
     #
-    write_node(gmlfile,"https://www.association.com/",green,"line")
-    write_node(gmlfile,"https://www.publisher.com/",blue,"line")
-    write_node(gmlfile,"https://www.vendor.com/",yellow,"line")
-    write_node(gmlfile,"https://missing_trust.txt_file/",lightblue,"dashed")
-    write_biedge(gmlfile,"https://www.association.com/","https://www.publisher.com/","member","belongto")
-    write_biedge(gmlfile,"https://www.publisher.com/","https://www.vendor.com/","vendor", "customer")
-    write_uniedge(gmlfile,"https://www.publisher.com/","https://missing_trust.txt_file/","control")
-#
-# Read a list of urls from associations, publishers, or vendors from a file and return list.
+    def render (self, item):
+        text = self.rendered.get(item)
+        if text is None:
+            if isinstance(item, int):
+                srcurl, refurl, forward, backward = self.edges[item]
+                if backward is None:
+                    text = render_uniedge(srcurl, refurl, forward)
+                else:
+                    text = render_biedge(srcurl, refurl, forward, backward)
+            else:
+                text = render_node(item, self.nodes[item][0], self.nodes[item][1], self.positions.get(item))
+            self.rendered[item] = text
+        return text
+    #
+    # collapse(owner) - Return the graph with each node replaced by its owner in the owner dictionary, if it has one, the edges between
+    # the same owners with the same labels merged into one, labelled with the number of edges merged if more than one, and the edges
+    # between an owner and itself dropped. Its positions are those of this graph. An owner that is not a node of this graph, e.g., the
+    # unassigned community, is white.
+    #
+    def collapse (self, owner):
+        collapsed = Graph()
+        collapsed.positions = self.positions
+        weights = {}
+        for item in self.views["all"]:
+            if isinstance(item, int):
+                srcurl, refurl, forward, backward = self.edges[item]
+                srcurl = owner.get(srcurl, srcurl)
+                refurl = owner.get(refurl, refurl)
+                if srcurl != refurl:
+                    key = (srcurl, refurl, forward, backward)
+                    weights[key] = weights.get(key, 0) + 1
+            else:
+                url = owner.get(item, item)
+                color, border = self.nodes.get(url, (white, "line"))
+                collapsed.addnode ("all", url, color, border)
+        for (srcurl, refurl, forward, backward), weight in weights.items():
+            if weight > 1:
+                forward = forward + " (" + str(weight) + ")"
+                if backward is not None:
+                    backward = backward + " (" + str(weight) + ")"
+            inviews = ("all", "asymmetric") if backward is None else ("all", "symmetric")
+            for view in inviews[1:]:
+                collapsed.addnode (view, srcurl, collapsed.nodes[srcurl][0], collapsed.nodes[srcurl][1])
+                collapsed.addnode (view, refurl, collapsed.nodes[refurl][0], collapsed.nodes[refurl][1])
+            collapsed.addedge (inviews, srcurl, refurl, forward, backward)
+        return collapsed
+    #
+    # partition(community) - Return the dictionary of the graph of each community in the community dictionary of each node, with the
+    # nodes in it and the edges between them in its all view. Their positions are those of this graph.
+    #
+    def partition (self, community):
+        parts = {}
+        for item in self.views["all"]:
+            if isinstance(item, int):
+                srcurl, refurl, forward, backward = self.edges[item]
+                if community[srcurl] == community[refurl]:
+                    parts[community[srcurl]].addedge (("all",), srcurl, refurl, forward, backward)
+            else:
+                if community[item] not in parts:
+                    parts[community[item]] = Graph()
+                    parts[community[item]].positions = self.positions
+                parts[community[item]].addnode ("all", item, self.nodes[item][0], self.nodes[item][1])
+        return parts
+    #
+    # write(filename, title, view, compress) - Write the view as a GraphML file with the given title, compressed with gzip if compress
+    # is True, in blocks of blocksize characters. The GraphML is so repetitive that the fastest compression level already shrinks it
+    # more than twenty times.
+    #
+    def write (self, filename, title, view, compress=False):
+        if compress:
+            file = gzip.open(filename, "wt", compresslevel=1)
+        else:
+            file = open(filename,"w")
+        if self.legend is None:
+            self.legend = render_legend(self.positions)
+        blocks = [header % title, self.legend]
+        size = 0
+        for item in self.views[view]:
+            text = self.render(item)
+            blocks.append(text)
+            size += len(text)
+            if size >= blocksize:
+                file.write("".join(blocks))
+                blocks = []
+                size = 0
+        blocks.append(tail)
+        file.write("".join(blocks))
+        file.close()
+#
+# Read the lines of a file, e.g., a list of urls of associations, publishers, or vendors, and return the list of distinct lines in the
+# order they first appear.
 #
 def readlist (filename):
     file = open(filename,"r")
-    lines = file.readlines()
     list = []
-    for line in lines:
-        if (line not in list):
-            list.append(line.rstrip())
+    seen = set()
+    for line in file:
+        line = line.rstrip()
+        if (line not in seen):
+            seen.add(line)
+            list.append(line)
     file.close()
     return list
 #
+# Read the symmetric.csv file and return the set of its symmetric links as (srcurl, attr, refurl) in the forward direction, e.g.,
+# "member", each line being the forward link followed by its reverse, e.g., "srcurl,member,refurl,refurl,belongto,srcurl".
+#
+def readsymmetric (filename):
+    symmetric = set()
+    for line in readlist(filename):
+        temp = [field.strip() for field in line.split(",")]
+        if (len(temp) == 6) and (temp[1] in reverse) and (temp[3:6] == [temp[2], reverse[temp[1]], temp[0]]):
+            symmetric.add((temp[0], temp[1], temp[2]))
+    return symmetric
+#
 # Set edge labels based on attr.
 #
 def edgelabels (attr):
-#
-# Set edge labels.
-#
-    forward = attr
-    if (attr == "member"):
-        backward = "belongto"
-    elif (attr == "belongto"):
-        backward = "member"
-    elif (attr == "control"):
-        backward = "controlledby"
-    elif (attr == "controlledby"):
-        backward = "control"
-    elif (attr == "vendor"):
-        backward = "customer"
-    elif (attr == "customer"):
-        backward = "vendor"
-    #
-    return (forward, backward)
+    return (attr, reverse[attr])
 #
 # Set node color based on url's presence in the lists and the flag indicating presence of trust.txt file.
 #
@@ -235,51 +409,119 @@ def nodecolor (url, associations, publishers, vendors, controlled, trustfiles):
     #
     return color, border
 #
-# matchsym (link, symmetric)
-#
-def matchsym (line, symmetric):
+# owners(graph, controlled) - Return the dictionary of the owner of each domain in the controlled set that the graph has a control or
+# controlledby edge to, following chains of control to the first domain that is not itself controlled. The first such edge of a domain
+# is taken, symmetric ones before asymmetric ones as the graph adds them in that order.
+#
+def owners (graph, controlled):
+    controller = {}
+    for srcurl, refurl, forward, backward in graph.edges:
+        if (forward == "control") and (refurl in controlled) and (refurl not in controller) and (refurl != srcurl):
+            controller[refurl] = srcurl
+        elif (forward == "controlledby") and (srcurl in controlled) and (srcurl not in controller) and (refurl != srcurl):
+            controller[srcurl] = refurl
+    owner = {}
+    for url in controller:
+        top = url
+        seen = set([url])
+        while (top in controller) and (controller[top] not in seen):
+            top = controller[top]
+            seen.add(top)
+        if top not in controller:
+            owner[url] = top
+    return owner
+#
+# communities(graph, associations, rounds) - Return the dictionary of the community of each node of the graph, the url of the domain
+# it is named after, from the member trees of the associations grown by at most rounds of label propagation, or unassigned if it is not
+# connected to any of them.
+#
+def communities (graph, associations, rounds=20):
+    neighbours = dict([(url, []) for url in graph.nodes])
+    community = {}
+    for srcurl, refurl, forward, backward in graph.edges:
+        if srcurl != refurl:
+            neighbours[srcurl].append(refurl)
+            neighbours[refurl].append(srcurl)
+        if (forward == "member") and (srcurl in associations) and (refurl not in associations) and (refurl not in community):
+            community[refurl] = srcurl
+        elif (forward == "belongto") and (refurl in associations) and (srcurl not in associations) and (srcurl not in community):
+            community[srcurl] = refurl
+    for url in graph.nodes:
+        if url in associations:
+            community[url] = url
+    fixed = set(community)
     #
-    # Add the reverse direction to the line.
+    # Move each other domain to the community most of its neighbours in one are in, the first of those in the order of the nodes on a
+    # tie, unless its own is one of them.
     #
-    # print ("line = ", line)
-    temp = line.split(",",2)
-    srcurl = temp[0].strip()
-    attr = temp[1].strip()
-    refurl = temp[2].strip()
-    #
-    if (attr == "member"):
-        temp = line + "," + refurl + ",belongto," + srcurl
-    elif (attr == "belongto"):
-        temp = line + "," + refurl + ",member," + srcurl
-    elif (attr == "control"):
-        temp = line + "," + refurl + ",controlledby," + srcurl
-    elif (attr == "controlledby"):
-        temp = line + "," + refurl + ",control," + srcurl
-    elif (attr == "vendor"):
-        temp = line + "," + refurl + ",customer," + srcurl
-    elif (attr == "customer"):
-        temp = line + "," + refurl + ",vendor," + srcurl
-    try:
-        index = symmetric.index(temp)
-    except:
-        match = False
-    else:
-        match = True
-    return match       
+    order = dict([(url, i) for i, url in enumerate(graph.nodes)])
+    for round in range(rounds):
+        moved = 0
+        for url in graph.nodes:
+            if (url in fixed) or (len(neighbours[url]) == 0):
+                continue
+            counts = {}
+            for neighbour in neighbours[url]:
+                if neighbour in community:
+                    counts[community[neighbour]] = counts.get(community[neighbour], 0) + 1
+            if len(counts) == 0:
+                continue
+            most = max(counts.values())
+            if counts.get(community.get(url), 0) < most:
+                community[url] = min([label for label, count in counts.items() if count == most], key=lambda label: order[label])
+                moved += 1
+        if moved == 0:
+            break
+    for url in graph.nodes:
+        if url not in community:
+            community[url] = unassigned
+    return community
+#
+# writeindex(filename, header, index) - Write the dictionary of the owner or community of each member to a .csv file with the given
+# header, grouped by owner or community.
+#
+def writeindex (filename, header, index):
+    file = open(filename,"w")
+    file.write(header + "\n")
+    for url in sorted(index, key=lambda url: (index[url], url)):
+        file.write(index[url] + "," + url + "\n")
+    file.close()
+#
+# Return the -layout.csv file of the most recent Webcrawl directory other than dirname that has one, or "" if there isn't one.
+#
+def findlayout (dirname):
+    for name in sorted(os.listdir("."), reverse=True):
+        if name.startswith("Webcrawl-") and (name != dirname) and os.path.isfile(name + "/" + name + "-layout.csv"):
+            return name + "/" + name + "-layout.csv"
+    return ""
+#
+# matchsym (srcurl, attr, refurl, symmetric) - Return True if the link is one of the set of symmetric links.
+#
+def matchsym (srcurl, attr, refurl, symmetric):
+    return (srcurl, attr, refurl) in symmetric
 #     
 # Main program
 #
-# Specify symmetric and asymmetric attributes.
+# Specify symmetric and asymmetric attributes, the reverse of each symmetric attribute, and the forward ones the symmetric.csv file
+# records symmetric links by.
 #
-symattr = "member,belongto,control,controlledby,vendor,customer"
-asymattr = "social,contact,disclosure"
+symattr = frozenset(["member", "belongto", "control", "controlledby", "vendor", "customer"])
+asymattr = frozenset(["social", "contact", "disclosure"])
+reverse = {"member": "belongto", "belongto": "member", "control": "controlledby", "controlledby": "control", "vendor": "customer", "customer": "vendor"}
+forwardattr = frozenset(["member", "control", "vendor"])
 #
-# Set DIRNAME
+# Parse arguments
 #
-if len(sys.argv) > 1:
-    dirname = sys.argv[1]
-else:
-    dirname = "Webcrawl-"+time.strftime("%Y-%m-%d")
+parser = argparse.ArgumentParser(description="Generate the .graphml social graphs of a JournalList.net webcrawl.")
+parser.add_argument("-z", "--gzip", help="write the graphs compressed with gzip, as .graphmlz files", action="store_true")
+parser.add_argument("-l", "--layout", help="lay the graph out and write the position of each node into the graphs", action="store_true")
+parser.add_argument("-i", "--iterations", help="with --layout, number of iterations of the layout, default 50", type=int, default=50, action="store")
+parser.add_argument("-o", "--owners", help="also write the owner level graphs, with controlled domains collapsed into their owners", action="store_true")
+parser.add_argument("-c", "--communities", help="also split the graph into communities, writing the graph of each and a summary graph", action="store_true")
+parser.add_argument("dirname", help="the Webcrawl-YYYY-MM-DD directory, default today's", type=str, nargs="?", default="Webcrawl-"+time.strftime("%Y-%m-%d"), action="store")
+args = parser.parse_args()
+dirname = args.dirname
+suffix = ".graphmlz" if args.gzip else ".graphml"
 #
 # Check if directory exists.
 #
@@ -292,9 +534,9 @@ if (os.path.isdir(dirname)):
         #
         # Derive filenames.
         #
-        gmlname = dirname + "/" + dirname + ".graphml"
-        symname = dirname + "/" + dirname + "-symmetric.graphml"
-        asymname = dirname + "/" + dirname + "-asymmetric.graphml"
+        gmlname = dirname + "/" + dirname + suffix
+        symname = dirname + "/" + dirname + "-symmetric" + suffix
+        asymname = dirname + "/" + dirname + "-asymmetric" + suffix
         symcsvname = dirname + "/" + dirname + "-symmetric.csv"
         assocname = dirname + "/" + dirname + "-associations.csv"
         pubname = dirname + "/" + dirname + "-publishers.csv"
@@ -304,35 +546,15 @@ if (os.path.isdir(dirname)):
         #
         # Read list of associations, publishers, and vendors, along with the list of those that they control.
         #
-        associations = readlist(assocname)
-        publishers = readlist(pubname)
-        vendors = readlist(vendname)
-        controlled = readlist(ctrldname)
-        symmetric = readlist(symcsvname)
-        #
-        # Set the node and edge counts. Create an empty nodelist.
+        associations = set(readlist(assocname))
+        publishers = set(readlist(pubname))
+        vendors = set(readlist(vendname))
+        controlled = set(readlist(ctrldname))
+        symmetric = readsymmetric(symcsvname)
         #
-        nodelist = []
-        symnodes = []
-        asymnodes = []
+        # Create the empty graph.
         #
-        # Open the graphml output files.
-        #
-        symfile = open(symname,"w")
-        asymfile = open(asymname,"w")
-        gmlfile = open(gmlname,"w")
-        #
-        # Write graphml header to output files
-        #
-        write_header(gmlfile, "JournalList Ecosystem Graph - All Links")
-        write_header(symfile, "JournalList Ecosystem Graph - Symmetric Links Only")
-        write_header(asymfile, "JournalList Ecosystem Graph - Asymmetric Links Only")
-        #
-        # Write legend nodes and edges.
-        #
-        write_legend(gmlfile)
-        write_legend(symfile)
-        write_legend(asymfile)
+        graph = Graph()
         #
         # Read in the .csv file.
         #
@@ -340,17 +562,13 @@ if (os.path.isdir(dirname)):
         #
         # Generate list of urls with trust.txt files (srcurl)
         #
-        trustfiles = []
+        trustfiles = set()
         for line in lines:
             #
-            # Split line into srcurl, attr, and refurl
+            # Split line into srcurl, attr, and refurl, and add srcurl to the set of trust.txt files
             #
             temp = line.split(",",2)
-            srcurl = temp[0].strip()
-            #
-            # If scrurl not in the list of trust.txt files add it
-            if (srcurl not in trustfiles):
-                    trustfiles.append(srcurl)
+            trustfiles.add(temp[0].strip())
         #
         # Check if a list of backward links exists, if so read it in and append it to lines in the .csv file.
         #
@@ -378,81 +596,69 @@ if (os.path.isdir(dirname)):
             #
             forward, backward = edgelabels (attr)
             #
-            # Check if link is in the symmetric list.
+            # If the link is in the symmetric list, add its nodes and a bidirectional edge to the all and symmetric views. If not, and it
+            # is not the reverse of a symmetric link, add its nodes and a unidirectional edge to the all and asymmetric views.
             #
-            match = matchsym (line, symmetric)
+            if matchsym (srcurl, attr, refurl, symmetric):
+                inviews = ("all", "symmetric")
+            elif (attr in forwardattr) or not matchsym (refurl, backward, srcurl, symmetric):
+                inviews = ("all", "asymmetric")
+                backward = None
+            else:
+                continue
             #
-            # If match then write symmetric nodes and edges.
+            # Determine node colors and add the nodes to the views if necessary, then the edge.
             #
-            if match:
-                #
-                # Determine node colors and write node if necessary and bidirectional edge to gmlfile and symfile output files.
-                #
-                srccolor, srcborder = nodecolor (srcurl, associations, publishers, vendors, controlled, trustfiles)
-                refcolor, refborder = nodecolor (refurl, associations, publishers, vendors, controlled, trustfiles)
-                #
-                if (srcurl not in nodelist):
-                    nodelist.append(srcurl)
-                    write_node (gmlfile, srcurl, srccolor, srcborder)
-                if (refurl not in nodelist):
-                    nodelist.append(refurl)
-                    write_node (gmlfile, refurl, refcolor, refborder)
-                if (srcurl not in symnodes):
-                    symnodes.append(srcurl)
-                    write_node (symfile, srcurl, srccolor, srcborder)
-                if (refurl not in symnodes):
-                    symnodes.append(refurl)
-                    write_node (symfile, refurl, refcolor, refborder)
-                #
-                write_biedge (gmlfile, srcurl, refurl, forward, backward)
-                write_biedge (symfile, srcurl, refurl, forward, backward)
-            else:
-                #
-                # Check if this is the reverse of a symmetric link.
-                #
-                temp = line
-                if (attr == "belongto"):
-                    temp = refurl + ",member," + srcurl
-                elif (attr == "controlledby"):
-                    temp = refurl + ",control," + srcurl
-                elif (attr == "customer"):
-                    temp = refurl + ",vendor," + srcurl
-                #
-                match = matchsym (temp, symmetric)
-                #
-                if (not match):
-                    #
-                    # If not, determine node colors and write node if necessary and unidirectional edge to gmlfile and asymfile output files.
-                    #
-                    srccolor, srcborder = nodecolor (srcurl, associations, publishers, vendors, controlled, trustfiles)
-                    refcolor, refborder = nodecolor (refurl, associations, publishers, vendors, controlled, trustfiles)
-                    #
-                    if (srcurl not in nodelist):
-                        nodelist.append(srcurl)
-                        write_node (gmlfile, srcurl, srccolor, srcborder)
-                    if (refurl not in nodelist):
-                        nodelist.append(refurl)
-                        write_node (gmlfile, refurl, refcolor, refborder)
-                    if (srcurl not in asymnodes):
-                        asymnodes.append(srcurl)
-                        write_node (asymfile, srcurl, srccolor, srcborder)
-                    if (refurl not in asymnodes):
-                        asymnodes.append(refurl)
-                        write_node (asymfile, refurl, refcolor, refborder)
-                    #
-                    write_uniedge (gmlfile, srcurl, refurl, forward)
-                    write_uniedge (asymfile, srcurl, refurl, forward)                
+            srccolor, srcborder = nodecolor (srcurl, associations, publishers, vendors, controlled, trustfiles)
+            refcolor, refborder = nodecolor (refurl, associations, publishers, vendors, controlled, trustfiles)
+            for view in inviews:
+                graph.addnode (view, srcurl, srccolor, srcborder)
+                graph.addnode (view, refurl, refcolor, refborder)
+            graph.addedge (inviews, srcurl, refurl, forward, backward)
+        #
+        # If requested, lay the graph out, starting from the most recent earlier layout, and save the positions for the next one.
+        #
+        if args.layout:
+            import graphlayout
+            previous = {}
+            prevname = findlayout(dirname)
+            if prevname != "":
+                previous = graphlayout.read(prevname)
+            graph.positions = graphlayout.layout(list(graph.nodes), [(edge[0], edge[1]) for edge in graph.edges], previous, args.iterations)
+            graphlayout.write(dirname + "/" + dirname + "-layout.csv", graph.positions)
+        #
+        # Write each view to its file.
+        #
+        graph.write (gmlname, "JournalList Ecosystem Graph - All Links", "all", args.gzip)
+        graph.write (symname, "JournalList Ecosystem Graph - Symmetric Links Only", "symmetric", args.gzip)
+        graph.write (asymname, "JournalList Ecosystem Graph - Asymmetric Links Only", "asymmetric", args.gzip)
+        #
+        # If requested, collapse the controlled domains into their owners, and write the owner level views and the index of the domains
+        # collapsed into each owner.
+        #
+        if args.owners:
+            owner = owners(graph, controlled)
+            writeindex(dirname + "/" + dirname + "-owners.csv", "owner,member", owner)
+            collapsed = graph.collapse(owner)
+            collapsed.write (dirname + "/" + dirname + "-owners" + suffix, "JournalList Ecosystem Graph - Owners - All Links", "all", args.gzip)
+            collapsed.write (dirname + "/" + dirname + "-owners-symmetric" + suffix, "JournalList Ecosystem Graph - Owners - Symmetric Links Only", "symmetric", args.gzip)
+            collapsed.write (dirname + "/" + dirname + "-owners-asymmetric" + suffix, "JournalList Ecosystem Graph - Owners - Asymmetric Links Only", "asymmetric", args.gzip)
         #
-        # Write the tail of the symfile and close it.
+        # If requested, split the graph into communities, and write the graph of each, the summary graph of the edges between them, and
+        # the index of the domains in each.
         #
-        write_tail (symfile)
-        write_tail (asymfile)
-        write_tail (gmlfile)
-        gmlfile.close()
-        asymfile.close()
-        symfile.close()
+        if args.communities:
+            community = communities(graph, associations)
+            writeindex(dirname + "/" + dirname + "-communities.csv", "community,member", community)
+            commdir = dirname + "/" + dirname + "-communities"
+            if not os.path.isdir(commdir):
+                os.mkdir(commdir)
+            for url, part in graph.partition(community).items():
+                part.write (commdir + "/" + graphname(url) + suffix, "JournalList Ecosystem Graph - Community - " + nodeid(url), "all", args.gzip)
+            summary = graph.collapse(community)
+            summary.write (dirname + "/" + dirname + "-communities" + suffix, "JournalList Ecosystem Graph - Communities", "all", args.gzip)
         #
     else:
         print (csvname, "doesn't exist")
 else:
-    print (dirname, "doesn't exist")
\ No newline at end of file
+    print (dirname, "doesn't exist")
@@ -0,0 +1,184 @@
+#
+# JournalList.net webcrawler host policy, adaptive per-host timeouts and a circuit breaker for slow or dead hosts.
+#
+# Name - hostpolicy.py
+# Synopsis - from hostpolicy import HostPolicy
+#            policy = HostPolicy("hostpolicy.json", threshold=3)
+#            allowed, timeout = policy.timeout("www.journallist.net")
+#            opened = policy.record("www.journallist.net", True, connect=0.12, read=0.03)
+#            policy.save()
+#
+# Summary - Every fetch used to wait up to 61 seconds to connect and again to read, so a host that does not answer cost a minute or
+# more for each url tried on it. The policy tracks, for each host and across the whole crawl, the time taken to connect and receive
+# the response headers ("connect") and the time taken to read the body ("read"), and sets the timeouts of each fetch from them:
+#
+#   - connect timeout - factor times the larger of the 99th percentile connect time of the crawl and the slowest of the host.
+#   - read timeout    - factor times the larger of the 99th percentile read or connect time of the crawl and the slowest of the host.
+#
+# each kept between mintimeout and maxtimeout. Until minsamples fetches have completed the crawl wide percentiles are not used, so
+# hosts with no history get maxtimeout.
+#
+# The circuit breaker counts the consecutive failures, connection errors and timeouts, not HTTP error statuses, of each host. Once a
+# host has failed threshold times in a row, timeout() refuses any further fetch from it for the rest of the crawl.
+#
+# The state of each host is saved to a JSON file at the end of the crawl, and read back by the next one until it is ttl seconds old.
+# A host that was failing at the end of the previous crawl is given the short probe timeout for its first fetch, and if that fails
+# too the breaker opens at once, rather than waiting threshold full timeouts for a host that is most likely still dead.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import json
+import time
+import threading
+from collections import deque
+#
+# Number of recent connect and read times the crawl wide percentiles are taken from, and how often they are recomputed
+#
+window = 1000
+refresh = 50
+#
+# percentile(times, p) - Return the p percentile of the list of times.
+#
+def percentile (times, p):
+    times = sorted(times)
+    return times[min(len(times) - 1, int(p * len(times)))]
+#
+# HostPolicy(filename, ttl, threshold, probe, mintimeout, maxtimeout, factor, minsamples) - Create a host policy with the state of the
+# previous crawl read from the given file (if it exists), ignoring hosts last seen more than ttl seconds ago. A threshold of 0 disables
+# the circuit breaker.
+#
+class HostPolicy:
+    #
+    def __init__ (self, filename, ttl=7*86400, threshold=3, probe=5.0, mintimeout=5.0, maxtimeout=61.0, factor=4.0, minsamples=100):
+        self.filename = filename
+        self.ttl = ttl
+        self.threshold = threshold
+        self.probe = probe
+        self.mintimeout = mintimeout
+        self.maxtimeout = maxtimeout
+        self.factor = factor
+        self.minsamples = minsamples
+        #
+        # The state of each host in the previous crawl, [failures, connect, read, time], and in this one [failures, successes, connect,
+        # read], where failures are consecutive and connect and read are the slowest times
+        #
+        self.previous = {}
+        self.hosts = {}
+        #
+        # The recent connect and read times of the whole crawl, and their 99th percentiles
+        #
+        self.connects = deque(maxlen=window)
+        self.reads = deque(maxlen=window)
+        self.samples = 0
+        self.connect99 = 0.0
+        self.read99 = 0.0
+        self.lock = threading.Lock()
+        if os.path.isfile(filename):
+            self.read(filename)
+    #
+    # read(filename) - Add the host states of a file written by save() that are less than ttl seconds old, keeping the more recent of
+    # any host already known, e.g., those saved by the policies of the webcrawler.py shard processes.
+    #
+    def read (self, filename):
+        file = open(filename,"r")
+        entries = json.load(file)
+        file.close()
+        now = time.time()
+        with self.lock:
+            for host, entry in entries.items():
+                if (now - entry[3] < self.ttl) and ((host not in self.previous) or (self.previous[host][3] < entry[3])):
+                    self.previous[host] = entry
+    #
+    # clamp(seconds) - Return seconds kept between mintimeout and maxtimeout.
+    #
+    def clamp (self, seconds):
+        return min(self.maxtimeout, max(self.mintimeout, seconds))
+    #
+    # timeout(host) - Return whether a fetch from the host is allowed, and if so the (connect, read) timeouts to fetch it with.
+    #
+    def timeout (self, host):
+        with self.lock:
+            state = self.hosts.get(host)
+            previous = self.previous.get(host)
+            if (state is not None) and (self.threshold > 0) and (state[0] >= self.threshold):
+                return False, None
+            #
+            # Probe a host that was failing at the end of the previous crawl and has not answered in this one
+            #
+            if ((state is None) or (state[1] == 0)) and (previous is not None) and (previous[0] > 0):
+                return True, (min(self.probe, self.maxtimeout), min(self.probe, self.maxtimeout))
+            #
+            # Take the slowest times of the host from this crawl, or the previous one if it has not answered in this one yet
+            #
+            if (state is not None) and (state[1] > 0):
+                connect, read = state[2], state[3]
+            elif previous is not None:
+                connect, read = previous[1], previous[2]
+            else:
+                connect, read = None, None
+            if self.samples < self.minsamples:
+                if connect is None:
+                    return True, (self.maxtimeout, self.maxtimeout)
+                return True, (self.clamp(self.factor * connect), self.clamp(self.factor * max(connect, read)))
+            connect = max(self.connect99, connect or 0.0)
+            read = max(self.connect99, self.read99, read or 0.0)
+            return True, (self.clamp(self.factor * connect), self.clamp(self.factor * read))
+    #
+    # record(host, ok, connect, read) - Record a fetch from the host, ok if it returned a response, whatever its status code, taking
+    # connect seconds to receive the response headers and read seconds to read the body, or failed with a connection error or timeout.
+    # Returns True if the failure opened the circuit breaker of the host.
+    #
+    def record (self, host, ok, connect=0.0, read=0.0):
+        with self.lock:
+            state = self.hosts.setdefault(host, [0, 0, 0.0, 0.0])
+            if ok:
+                state[0] = 0
+                state[1] += 1
+                state[2] = max(state[2], connect)
+                state[3] = max(state[3], read)
+                self.connects.append(connect)
+                self.reads.append(read)
+                self.samples += 1
+                if self.samples % refresh == 0:
+                    self.connect99 = percentile(self.connects, 0.99)
+                    self.read99 = percentile(self.reads, 0.99)
+                return False
+            if self.threshold <= 0:
+                state[0] += 1
+                return False
+            opened = (state[0] < self.threshold)
+            state[0] += 1
+            #
+            # A failed probe of a host that was failing at the end of the previous crawl opens the breaker at once
+            #
+            previous = self.previous.get(host)
+            if (state[1] == 0) and (previous is not None) and (previous[0] > 0):
+                state[0] = max(state[0], self.threshold)
+            return opened and (state[0] >= self.threshold)
+    #
+    # stats() - Return the number of hosts fetched from in this crawl, and the number whose circuit breaker is open.
+    #
+    def stats (self):
+        with self.lock:
+            opened = sum(1 for state in self.hosts.values() if (self.threshold > 0) and (state[0] >= self.threshold))
+            return len(self.hosts), opened
+    #
+    # save() - Write the state of each host, from this crawl if it was fetched from or else the previous one, to the file.
+    #
+    def save (self):
+        now = time.time()
+        with self.lock:
+            entries = dict(self.previous)
+            for host, state in self.hosts.items():
+                if state[1] > 0:
+                    entries[host] = [state[0], state[2], state[3], now]
+                elif host in entries:
+                    entries[host] = [state[0], entries[host][1], entries[host][2], now]
+                else:
+                    entries[host] = [state[0], 0.0, 0.0, now]
+        file = open(self.filename,"w")
+        json.dump(entries, file)
+        file.close()
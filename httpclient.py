@@ -0,0 +1,118 @@
+#
+# JournalList.net shared HTTP client used by webcrawler.py, qa_trust_txt.py, and sitescrape.py.
+#
+# Name - httpclient.py
+# Synopsis - import httpclient
+#            httpclient.configure(connections=100, maxsize=2)
+#            r = httpclient.get(url, timeout=61, verify=False, headers=headers)
+#            chosen, results = httpclient.race([call1, call2], accept)
+#
+# Summary - All fetches go through one requests.Session, so connections are kept alive and reused across requests to the same host,
+# e.g., the "http://domain/trust.txt" fetch followed by the "http://domain/.well-known/trust.txt" fallback, rather than opening a new
+# TCP and TLS connection for every request as the module level requests.get does. The session is created on first use and shared by
+# all threads.
+#
+#   pool_connections - the number of hosts to keep connection pools for. The least recently used host is dropped when the number is
+#                      exceeded, so it should be at least the number of hosts fetched from at once.
+#   pool_maxsize     - the maximum number of connections kept alive to each host.
+#   racers           - the number of threads race() runs calls on.
+#
+# race(calls, accept) runs several fetches at once, e.g., the different urls a trust.txt file may be found at, and returns the first
+# accepted result in the order the calls are listed. Taking them in that order, rather than whichever completes first, keeps the choice
+# the same from one run to the next. It returns as soon as a call is accepted and all those before it have been rejected, so a domain
+# costs at most one timeout rather than one for each url tried in turn.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+#
+# Default pool sizes
+#
+pool_connections = 100
+pool_maxsize = 2
+racers = 32
+#
+# The shared session and the lock protecting its creation
+#
+session = None
+lock = threading.Lock()
+#
+# The thread pool race() runs calls on, created on first use
+#
+racepool = None
+#
+# configure(connections, maxsize, threads) - Set pool_connections, pool_maxsize and racers. Any existing session and race() thread pool
+# are closed, so the new sizes take effect from the next fetch.
+#
+def configure (connections=None, maxsize=None, threads=None):
+    global session, pool_connections, pool_maxsize, racers, racepool
+    with lock:
+        if connections is not None:
+            pool_connections = max(1, connections)
+        if maxsize is not None:
+            pool_maxsize = max(1, maxsize)
+        if threads is not None:
+            racers = max(1, threads)
+        if session is not None:
+            session.close()
+            session = None
+        if racepool is not None:
+            racepool.shutdown(wait=False, cancel_futures=True)
+            racepool = None
+#
+# getsession() - Return the shared session, creating it if necessary.
+#
+def getsession ():
+    global session
+    with lock:
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        return session
+#
+# get(url, **kwargs) - HTTP GET the url using the shared session, takes the same arguments and raises the same exceptions as requests.get.
+#
+def get (url, **kwargs):
+    return getsession().get(url, **kwargs)
+#
+# race(calls, accept) - Run each of the list of calls, functions taking no arguments, at once. Returns the index of the first call, in
+# the order listed, whose result accept(result) is True, and the list of results, with None for the calls after it, which are cancelled
+# if they have not started (those that have are left to finish, and their results are discarded). If no result is accepted, returns
+# -1 and all the results.
+#
+def race (calls, accept):
+    global racepool
+    with lock:
+        if racepool is None:
+            racepool = ThreadPoolExecutor(max_workers=racers)
+        pool = racepool
+    futures = [pool.submit(call) for call in calls]
+    results = [None] * len(calls)
+    for i, future in enumerate(futures):
+        results[i] = future.result()
+        if accept(results[i]):
+            for other in futures[i+1:]:
+                other.cancel()
+            return i, results
+    return -1, results
+#
+# close() - Close the shared session and all the connections it holds, and the race() thread pool.
+#
+def close ():
+    configure()
+#
+# reset() - Forget the shared session without closing it, in a worker process forked from one that has used it, so the worker opens
+# its own connections rather than sharing the parent's sockets.
+#
+def reset ():
+    global session, lock, racepool
+    lock = threading.Lock()
+    session = None
+    racepool = None
@@ -0,0 +1,267 @@
+#
+# JournalList.net webcrawler metrics, records where the time of a crawl goes.
+#
+# Name - metrics.py
+# Synopsis - from metrics import Metrics
+#            metrics = Metrics()
+#            metrics.fetch(seconds, status=200, nbytes=1024)
+#            metrics.write("Webcrawl-YYYY-MM-DD/Webcrawl-YYYY-MM-DD-metrics.json")
+#            metrics.writeprom("Webcrawl-YYYY-MM-DD/Webcrawl-YYYY-MM-DD-metrics.prom")
+#
+# Summary - A Metrics object counts, across all the threads of a crawl:
+#
+#   - the time taken by each HTTP GET, as a histogram, and the bytes received.
+#   - the HTTP status codes returned, and the class of each exception raised instead.
+#   - which url each trust.txt file was found at, "http://domain/trust.txt" or the "http://domain/.well-known/trust.txt" fallback,
+#     or neither, and the number of redirects to another domain.
+#   - the number of domains crawled, those skipped because they do not exist in DNS, and the slowest domains to crawl.
+#
+# write() saves them to a JSON file, which read() adds back, e.g., to combine the metrics of the shards of a crawl. writeprom() saves
+# them in the Prometheus text format, for the node_exporter textfile collector to pick up.
+#
+# The time taken by every domain is also kept, and writetimes() saves them to a .csv file with the columns domain,seconds, which
+# readtimes() reads back, e.g., for the "priority" frontier order of the next crawl to start the slowest domains first (see frontier.py).
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import json
+import time
+import heapq
+import threading
+#
+# Upper bounds, in seconds, of the buckets of the HTTP GET latency histogram. Requests time out after 61 seconds. The buckets below
+# 0.05 seconds resolve fetches from nearby hosts, e.g., the local server of benchmarks/bench_crawl.py.
+#
+buckets = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 61.0]
+#
+# The urls a trust.txt file may be found at
+#
+paths = ["trust.txt", ".well-known/trust.txt", "none"]
+#
+# Metrics(slowest) - Create an empty set of metrics that keeps the given number of slowest domains.
+#
+class Metrics:
+    #
+    def __init__ (self, slowest=20):
+        self.lock = threading.Lock()
+        self.start = time.time()
+        self.nslowest = slowest
+        self.counts = [0] * (len(buckets) + 1)
+        self.seconds = 0.0
+        self.fetches = 0
+        self.bytes = 0
+        self.status = {}
+        self.exceptions = {}
+        self.paths = dict.fromkeys(paths, 0)
+        self.redirects = 0
+        self.domains = 0
+        self.nxdomains = 0
+        self.slowest = []
+        self.times = {}
+    #
+    # fetch(seconds, status, nbytes, exception) - Record an HTTP GET that took the given number of seconds and either returned the status
+    # code and nbytes of content, or raised an exception of the given class name.
+    #
+    def fetch (self, seconds, status=0, nbytes=0, exception=""):
+        i = 0
+        while (i < len(buckets)) and (seconds > buckets[i]):
+            i += 1
+        with self.lock:
+            self.counts[i] += 1
+            self.seconds += seconds
+            self.fetches += 1
+            self.bytes += nbytes
+            if exception != "":
+                self.exceptions[exception] = self.exceptions.get(exception, 0) + 1
+            else:
+                self.status[str(status)] = self.status.get(str(status), 0) + 1
+    #
+    # path(path) - Record which of paths a trust.txt file was found at.
+    #
+    def path (self, path):
+        with self.lock:
+            self.paths[path] += 1
+    #
+    # redirect() - Record a trust.txt file redirected to another domain.
+    #
+    def redirect (self):
+        with self.lock:
+            self.redirects += 1
+    #
+    # domain(domain, seconds, nxdomain) - Record a domain that took the given number of seconds to crawl, or that was skipped because
+    # it does not exist if nxdomain is True.
+    #
+    def domain (self, domain, seconds, nxdomain=False):
+        with self.lock:
+            self.domains += 1
+            if nxdomain:
+                self.nxdomains += 1
+            self.keepslow(domain, seconds)
+            self.times[domain] = seconds
+    #
+    # keepslow(domain, seconds) - Keep the domain if it is one of the slowest, called with the lock held.
+    #
+    def keepslow (self, domain, seconds):
+        if len(self.slowest) < self.nslowest:
+            heapq.heappush(self.slowest, (seconds, domain))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, domain))
+    #
+    # fallbackrate() - Return the fraction of the trust.txt files found that were found at the "/.well-known/trust.txt" fallback.
+    #
+    def fallbackrate (self):
+        found = self.paths["trust.txt"] + self.paths[".well-known/trust.txt"]
+        if found == 0:
+            return 0.0
+        return self.paths[".well-known/trust.txt"] / found
+    #
+    # todict() - Return the metrics as a dictionary, with the histogram buckets cumulative as in Prometheus.
+    #
+    def todict (self):
+        with self.lock:
+            cumulative = {}
+            total = 0
+            for bound, count in zip(buckets + ["+Inf"], self.counts):
+                total += count
+                cumulative[str(bound)] = total
+            return {
+                "elapsed": time.time() - self.start,
+                "fetches": self.fetches,
+                "fetch_seconds": {"buckets": cumulative, "sum": self.seconds, "count": self.fetches},
+                "bytes": self.bytes,
+                "status": dict(sorted(self.status.items())),
+                "exceptions": dict(sorted(self.exceptions.items())),
+                "paths": dict(self.paths),
+                "fallback_rate": self.fallbackrate(),
+                "redirects": self.redirects,
+                "domains": self.domains,
+                "nxdomains": self.nxdomains,
+                "slowest": [[domain, seconds] for seconds, domain in sorted(self.slowest, reverse=True)]
+            }
+    #
+    # write(filename) - Write the metrics to a JSON file.
+    #
+    def write (self, filename):
+        file = open(filename,"w")
+        json.dump(self.todict(), file, indent=1)
+        file.close()
+    #
+    # read(filename) - Add the metrics in a JSON file written by write() to these.
+    #
+    def read (self, filename):
+        file = open(filename,"r")
+        entries = json.load(file)
+        file.close()
+        self.add(entries)
+    #
+    # add(entries) - Add the metrics in a dictionary returned by todict(), e.g., saved in a checkpoint, to these.
+    #
+    def add (self, entries):
+        with self.lock:
+            previous = 0
+            for i, bound in enumerate(buckets + ["+Inf"]):
+                total = entries["fetch_seconds"]["buckets"][str(bound)]
+                self.counts[i] += total - previous
+                previous = total
+            self.seconds += entries["fetch_seconds"]["sum"]
+            self.fetches += entries["fetches"]
+            self.bytes += entries["bytes"]
+            for code, count in entries["status"].items():
+                self.status[code] = self.status.get(code, 0) + count
+            for name, count in entries["exceptions"].items():
+                self.exceptions[name] = self.exceptions.get(name, 0) + count
+            for path, count in entries["paths"].items():
+                self.paths[path] += count
+            self.redirects += entries["redirects"]
+            self.domains += entries["domains"]
+            self.nxdomains += entries["nxdomains"]
+            for domain, seconds in entries["slowest"]:
+                self.keepslow(domain, seconds)
+    #
+    # writetimes(filename) - Write the time taken by each domain to a .csv file with the columns domain,seconds.
+    #
+    def writetimes (self, filename):
+        with self.lock:
+            lines = [domain + "," + str(round(seconds, 3)) + "\n" for domain, seconds in sorted(self.times.items())]
+        file = open(filename,"w")
+        file.write("domain,seconds\n")
+        file.write("".join(lines))
+        file.close()
+    #
+    # writeprom(filename) - Write the metrics in the Prometheus text format. The file is written under a temporary name and then
+    # renamed, so the textfile collector never reads it half written.
+    #
+    def writeprom (self, filename):
+        metrics = self.todict()
+        lines = []
+        #
+        lines.append("# HELP webcrawler_fetch_seconds Time taken by each HTTP GET of a trust.txt url.")
+        lines.append("# TYPE webcrawler_fetch_seconds histogram")
+        for bound, count in metrics["fetch_seconds"]["buckets"].items():
+            lines.append("webcrawler_fetch_seconds_bucket{le=\"" + bound + "\"} " + str(count))
+        lines.append("webcrawler_fetch_seconds_sum " + str(metrics["fetch_seconds"]["sum"]))
+        lines.append("webcrawler_fetch_seconds_count " + str(metrics["fetch_seconds"]["count"]))
+        #
+        lines.append("# HELP webcrawler_fetch_bytes_total Bytes of content received.")
+        lines.append("# TYPE webcrawler_fetch_bytes_total counter")
+        lines.append("webcrawler_fetch_bytes_total " + str(metrics["bytes"]))
+        #
+        lines.append("# HELP webcrawler_fetch_status_total HTTP GETs by the status code returned.")
+        lines.append("# TYPE webcrawler_fetch_status_total counter")
+        for code, count in metrics["status"].items():
+            lines.append("webcrawler_fetch_status_total{code=\"" + code + "\"} " + str(count))
+        #
+        lines.append("# HELP webcrawler_fetch_exceptions_total HTTP GETs by the class of exception raised.")
+        lines.append("# TYPE webcrawler_fetch_exceptions_total counter")
+        for name, count in metrics["exceptions"].items():
+            lines.append("webcrawler_fetch_exceptions_total{exception=\"" + name + "\"} " + str(count))
+        #
+        lines.append("# HELP webcrawler_trust_path_total Domains by the url their trust.txt file was found at.")
+        lines.append("# TYPE webcrawler_trust_path_total counter")
+        for path, count in metrics["paths"].items():
+            lines.append("webcrawler_trust_path_total{path=\"" + path + "\"} " + str(count))
+        #
+        lines.append("# HELP webcrawler_fallback_ratio Fraction of the trust.txt files found at /.well-known/trust.txt.")
+        lines.append("# TYPE webcrawler_fallback_ratio gauge")
+        lines.append("webcrawler_fallback_ratio " + str(metrics["fallback_rate"]))
+        #
+        lines.append("# HELP webcrawler_redirects_total trust.txt files redirected to another domain.")
+        lines.append("# TYPE webcrawler_redirects_total counter")
+        lines.append("webcrawler_redirects_total " + str(metrics["redirects"]))
+        #
+        lines.append("# HELP webcrawler_domains_total Domains crawled.")
+        lines.append("# TYPE webcrawler_domains_total counter")
+        lines.append("webcrawler_domains_total " + str(metrics["domains"]))
+        lines.append("# HELP webcrawler_nxdomains_total Domains skipped because they do not exist in DNS.")
+        lines.append("# TYPE webcrawler_nxdomains_total counter")
+        lines.append("webcrawler_nxdomains_total " + str(metrics["nxdomains"]))
+        #
+        lines.append("# HELP webcrawler_domain_seconds Time taken to crawl each of the slowest domains.")
+        lines.append("# TYPE webcrawler_domain_seconds gauge")
+        for domain, seconds in metrics["slowest"]:
+            lines.append("webcrawler_domain_seconds{domain=\"" + domain + "\"} " + str(seconds))
+        #
+        lines.append("# HELP webcrawler_elapsed_seconds Time taken by the crawl.")
+        lines.append("# TYPE webcrawler_elapsed_seconds gauge")
+        lines.append("webcrawler_elapsed_seconds " + str(metrics["elapsed"]))
+        #
+        tmpname = filename + ".tmp"
+        file = open(tmpname,"w")
+        file.write("\n".join(lines) + "\n")
+        file.close()
+        os.replace(tmpname, filename)
+#
+# readtimes(filename) - Return the dictionary of the seconds taken by each domain in a .csv file written by writetimes().
+#
+def readtimes (filename):
+    times = {}
+    file = open(filename,"r")
+    for line in file:
+        temp = line.rstrip("\n").split(",")
+        if (len(temp) == 2) and (temp[0] != "domain"):
+            times[temp[0]] = float(temp[1])
+    file.close()
+    return times
@@ -3,7 +3,8 @@
 # JournalList.net QA script to check the specified trust.txt file.
 #
 # Name - qa_trust_txt.py trust.txt [srcurl webcrawl.csv]
-# Synopsis - qa_trust_txt.py trust.txt
+# Synopsis - qa_trust_txt.py [--race] trust.txt
+#   --race - Optional, fetch the different url forms of each referenced trust.txt file at once rather than in turn (see fetchtrust).
 #   trust.txt - The trust.txt file to check.
 #   srcurl - Optional, the URL to be used as the srcurl, to check against the .csv file
 #   webcrawl.csv - Optional, the .csv file containing the results of a webcrawl of all published trust.txt files
@@ -15,7 +16,10 @@
 import sys
 import os
 from numpy import triu_indices_from
+import functools
 import requests
+import httpclient
+import trustparse
 #
 # import ssl
 # from urllib3.poolmanager import PoolManager
@@ -103,7 +107,7 @@ def fetchurl(url):
     exception = False
     error = ""
     try:
-        r = requests.get(url, timeout=5, verify=False, headers=headers)
+        r = httpclient.get(url, timeout=5, verify=False, headers=headers)
     except requests.exceptions.TooManyRedirects as Argument:
         error = "HTTP GET too many redirects exception occurred: " + str(Argument)
         r = "" 
@@ -194,10 +198,27 @@ def chkredirect (url,rurl):
     #
     return redirect, success, exception, error
 #
-# fetchtrust (refpath)
+# Whether to race the url forms of each trust.txt file
+#
+racing = False
+#
+# fetchtrust (refpath) - Fetch the trust.txt file at refpath ("https://www.domain/trust.txt") trying, in turn until one does not raise an
+# exception, "http://www.", "http://", "https://www." and "https://". If racing, fetch them all at once and return the first, in that
+# order, that is plaintext, or if none is, the same as trying them in turn.
 #
 def fetchtrust (refpath):
     #
+    if racing:
+        urls = ["http://" + refpath[8:len(refpath)], "http://" + refpath[12:len(refpath)], "https://" + refpath[8:len(refpath)], "https://" + refpath[12:len(refpath)]]
+        chosen, results = httpclient.race([functools.partial(fetchurl, url) for url in urls], lambda result: result[0])
+        if chosen < 0:
+            chosen = len(urls) - 1
+            for i in range(len(urls)):
+                if not results[i][1]:
+                    chosen = i
+                    break
+        return results[chosen]
+    #
     # Try using "http" first.
     #
     http = "http://"
@@ -310,6 +331,13 @@ if not sys.warnoptions:
     import warnings
     warnings.simplefilter("ignore")
 #
+# Check for the --race option
+#
+if "--race" in sys.argv:
+    sys.argv.remove("--race")
+    racing = True
+    httpclient.configure(threads=8)
+#
 # Set trust.txt filename.
 #
 if len(sys.argv) > 1:
@@ -324,85 +352,65 @@ if len(sys.argv) > 1:
     # Check if file exists.
     #
     if(os.path.isfile(filename)):
-        symattr = "member,belongto,control,controlledby,vendor,customer"
-        asymattr = "social,contact,disclosure"
         whoislist = []
         #
         # Open file and read it.
         #
-        file = open(filename,"r")
-        lines = file.readlines()
+        file = open(filename,"rb")
+        data = file.read()
         file.close()
         #
-        linenum = 0
+        # Check if "journallist.net" is in file, once non-ASCII and null characters are removed.
+        #
+        jlfound = b"journallist.net" in trustparse.clean(data, squeeze=False)
+        #
         attrcount = 0
-        jlfound = False
         #
-        # Parse trust.txt file
+        # Parse trust.txt file, leaving tabs and spaces in the lines so that attributes containing them are reported as invalid.
+        # Comments, empty lines and null references, e.g. "control=", are skipped by the parser.
         #
-        for line in lines:
-            linenum += 1
-            #
-            # Remove leading and trailing white space, and remove any non-ASCII chacters (using encode to create bytes object and decode to
-            # convert bytes object back to str), remove any null characters "\00"
-            #
-            bytesline = line.strip().encode("ascii","ignore")
-            tmp1line = bytesline.decode("ascii","ignore")
-            tmpline = tmp1line.replace("\00","")
+        for linenum, attr, value, kind in trustparse.iterentries(data, squeeze=False):
+            line = attr + "=" + value
             #
-            # Check if "journallist.net" is in file.
-            if (not jlfound):
-                jlfound = "journallist.net" in tmpline
+            # If srcurl and .csv file specified, check to see if present in .csv file.
             #
-            # Skip this line if it is a comment line (begins with "#") or is an empty line
+            if (checkcsv):
+                if (attr == "control") or (attr == "controlledby") or (attr == "social"):
+                    refurl = normalize(value)
+                    checkattr ("https://" + srcurl, attr, "https://" + refurl, srclist, attrlist, reflist, linenum)
             #
-            if tmpline.startswith("#") or tmpline == "":
-                continue
+            # If it is a symmetric attribute, then normalize the referenced url and check for the referenced trust.txt file. 
+            # Else if it is not an assymetric attribute, print an invalid attribute error.
             #
-            # Get attribute and referenced url. Ignore attributes with null references, e.g. "control="
-            #
-            attr = tmpline.split("=",2)
-            if (len(attr) == 2) and (attr[1] != ""):
-                #
-                # If srcurl and .csv file specified, check to see if present in .csv file.
-                #
-                if (checkcsv):
-                    if (attr[0] == "control") or (attr[0] == "controlledby") or (attr[0] == "social"):
-                        refurl = normalize(attr[1])
-                        checkattr ("https://" + srcurl, attr[0], "https://" + refurl, srclist, attrlist, reflist, linenum)
+            if (kind == trustparse.SYMMETRIC):
+                attrcount += 1
+                path = normalize(value)
+                url = "https://" + path + "trust.txt"
+                success, exception, r, error = fetchtrust(url)
                 #
-                # If it is a symmetric attribute, then normalize the referenced url and check for the referenced trust.txt file. 
-                # Else if it is not an assymetric attribute, print an invalid attribute error.
+                # If not successful print an error
                 #
-                if (attr[0] in symattr):
-                    attrcount += 1
-                    path = normalize(attr[1])
-                    url = "https://" + path + "trust.txt"
-                    success, exception, r, error = fetchtrust(url)
+                if not success:
                     #
-                    # If not successful print an error
-                    #
-                    if not success:
-                        #
-                        # If there was an exception, server was unreachable. Otherwise, 
-                        #
-                        if exception:
-                            print ("Error at line:",linenum,line.strip(),"- unable to connect with server -",path,"-",error)
-                            whoislist.append(path[4:len(path)-1])
-                        else:
-                            print ("Error at line:",linenum,line.strip(),"- trust.txt file not found -",url,"-",error)
+                    # If there was an exception, server was unreachable. Otherwise, 
                     #
-                    # If there there wasn't an exception, check for redirect.
-                    #
-                    if not exception:
-                        redirect, success, exception, error = chkredirect(url, r.url)
-                        if redirect:
-                            print ("Warning at line:",linenum,line.strip(),"-",url, "redirects to", r.url)
-                            if exception:
-                                print ("Error at line:",linenum,line.strip(),"-",error)
+                    if exception:
+                        print ("Error at line:",linenum,line,"- unable to connect with server -",path,"-",error)
+                        whoislist.append(path[4:len(path)-1])
+                    else:
+                        print ("Error at line:",linenum,line,"- trust.txt file not found -",url,"-",error)
+                #
+                # If there there wasn't an exception, check for redirect.
                 #
-                elif (attr[0] not in asymattr):
-                    print ("Invalid attribute at line:",linenum,attr[0])
+                if not exception:
+                    redirect, success, exception, error = chkredirect(url, r.url)
+                    if redirect:
+                        print ("Warning at line:",linenum,line,"-",url, "redirects to", r.url)
+                        if exception:
+                            print ("Error at line:",linenum,line,"-",error)
+            #
+            elif (kind == trustparse.INVALID):
+                print ("Invalid attribute at line:",linenum,attr)
         #
         # Check if no attributes found
         #
@@ -417,10 +425,10 @@ if len(sys.argv) > 1:
                 whoisfile.write(domain + "\n")
             whoisfile.close()
         #
-        # Check if "journallist.net" found.
+        # Check if "journallist.net" found, reporting it at the last line.
         #
         if (not jlfound):
-            print ("Error at line",linenum,": file does not contain journallist.net")
+            print ("Error at line",len(data.splitlines()),": file does not contain journallist.net")
     else:
         print (filename, "does not exist")
 else:
@@ -0,0 +1,226 @@
+#
+# JournalList.net webcrawler shared frontier, a file-backed queue of trust.txt files to be fetched by several webcrawler.py workers.
+#
+# Name - sharedfrontier.py
+# Synopsis - from sharedfrontier import SharedFrontier
+#            frontier = SharedFrontier("frontier.db", worker=0, lease=600)
+#            frontier.create("Webcrawl-YYYY-MM-DD", workers=4)
+#
+# Summary - A SharedFrontier holds the frontier and visited index of a distributed crawl in a SQLite database, so that several
+# webcrawler.py worker processes, on one machine or on several sharing the file, crawl the ecosystem together. It has the same
+# interface as a Frontier (see frontier.py) so it can be passed to webcrawler.py's crawl().
+#
+# Each refdomain is a row of the frontier table, which records the task that queued it, the shard it belongs to (see shardof), its
+# priority, and the outcome of crawling it. Adding a refdomain that already has a row does nothing, so each domain is queued once
+# across all the workers.
+#
+# A worker claims one task at a time, preferring those of its own shard and taking those of other shards when its own has none left.
+# Claiming a task leases it to the worker for lease seconds. If the worker does not record an outcome before the lease expires, e.g.,
+# it was killed, the task can be claimed again by any worker. A domain may then be crawled twice, the merge step skips the duplicate
+# lines this produces.
+#
+# Tasks are claimed in priority order, then in the order they were queued. The priorities are the classes of the "priority" frontier
+# order (see frontier.py): the root domain and its member tree are ROOT, the well-known.dev seeds DISCOVERED, and the other domains
+# referenced from trust.txt files SYMMETRIC, so the member tree is crawled first and the ecosystem reachable from the root domain
+# before the rest of the well-known.dev list. Unlike a Frontier, tasks are not ordered by their expected time within a class.
+#
+# SQLite locking is not reliable on some network file systems, so when workers run on several machines the database should be on
+# a file system that supports it.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import time
+import sqlite3
+from collections import deque
+from frontier import Visited, shardof, classify, SYMMETRIC
+#
+# Database schema. A task has been claimed if its outcome is "queued" and its lease has not yet expired.
+#
+schema = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    refdomain TEXT NOT NULL UNIQUE,
+    srcdomain TEXT NOT NULL,
+    attr TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    outcome TEXT NOT NULL DEFAULT 'queued',
+    worker INTEGER,
+    expires REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS claimable ON frontier (outcome, priority, seq);
+"""
+#
+# connect(filename) - Open the database, creating its tables if necessary, in autocommit mode so that each transaction is begun
+# explicitly.
+#
+def connect (filename):
+    db = sqlite3.connect(filename, timeout=60, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(schema)
+    return db
+#
+# SharedVisited(db) - Create a visited index backed by the frontier table of the database. The outcomes recorded by this worker are
+# also kept in memory, so write() writes only those. The worker's output files are listed in files, so they can be flushed before
+# an outcome is recorded and a worker that is killed loses nothing another worker will not crawl again.
+#
+class SharedVisited (Visited):
+    #
+    def __init__ (self, db):
+        Visited.__init__(self)
+        self.db = db
+        self.files = []
+    #
+    def __contains__ (self, domain):
+        return self.db.execute("SELECT 1 FROM frontier WHERE refdomain = ?", (domain,)).fetchone() is not None
+    #
+    # mark(domain, outcome) - Record the outcome of crawling the domain. Domains are marked "queued" by adding them to the frontier.
+    #
+    def mark (self, domain, outcome):
+        Visited.mark(self, domain, outcome)
+        if outcome != "queued":
+            for file in self.files:
+                file.flush()
+            self.db.execute("UPDATE frontier SET outcome = ?, expires = 0 WHERE refdomain = ?", (outcome, domain))
+    #
+    # outcome(domain) - Return the outcome recorded for the domain by any worker, or "" if it has not been visited.
+    #
+    def outcome (self, domain):
+        row = self.db.execute("SELECT outcome FROM frontier WHERE refdomain = ?", (domain,)).fetchone()
+        if row is None:
+            return ""
+        return row[0]
+#
+# SharedFrontier(filename, worker, lease) - Open the shared frontier in the given database file for the given worker, leasing the tasks
+# it claims for lease seconds.
+#
+class SharedFrontier:
+    #
+    def __init__ (self, filename, worker=0, lease=600):
+        self.db = connect(filename)
+        self.worker = worker
+        self.lease = lease
+        self.tasks = deque()
+        self.count = 0
+        self.visited = SharedVisited(self.db)
+    #
+    # create(dirname, workers) - Record the Webcrawl-YYYY-MM-DD directory and the number of workers of a new crawl.
+    #
+    def create (self, dirname, workers):
+        self.db.execute("BEGIN IMMEDIATE")
+        self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [("dirname", dirname), ("workers", str(workers))])
+        self.db.execute("COMMIT")
+        self.count = workers
+    #
+    # get(key) - Return the value recorded by create() for the key, "dirname" or "workers", or "" if there isn't one.
+    #
+    def get (self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return ""
+        return row[0]
+    #
+    # workers() - Return the number of workers of the crawl.
+    #
+    def workers (self):
+        if self.count == 0:
+            self.count = max(1, int(self.get("workers") or "1"))
+        return self.count
+    #
+    # __len__() - Return the number of tasks claimed by this worker and not yet taken with pop(), claiming another if there are none.
+    #
+    def __len__ (self):
+        if len(self.tasks) == 0:
+            self.claim()
+        return len(self.tasks)
+    #
+    # seen(refdomain) - Return True if the refdomain has already been queued or crawled by any worker.
+    #
+    def seen (self, refdomain):
+        return refdomain in self.visited
+    #
+    # priority(srcdomain, attr) - Return the priority class of a reference with the given attribute from the srcdomain (see classify).
+    #
+    def priority (self, srcdomain, attr):
+        row = self.db.execute("SELECT priority FROM frontier WHERE refdomain = ?", (srcdomain,)).fetchone()
+        return classify(SYMMETRIC if row is None else row[0], attr)
+    #
+    # push(srcdomain, attr, refdomain, priority) - Queue the task, with the priority given by its srcdomain and attr if priority is None.
+    # Returns False, without queuing it, if the refdomain was already queued.
+    #
+    def push (self, srcdomain, attr, refdomain, priority=None):
+        if priority is None:
+            priority = self.priority(srcdomain, attr)
+        cursor = self.db.execute("INSERT OR IGNORE INTO frontier (refdomain, srcdomain, attr, shard, priority) VALUES (?, ?, ?, ?, ?)",
+            (refdomain, srcdomain, attr, shardof(refdomain, self.workers()), priority))
+        return cursor.rowcount == 1
+    #
+    # extend(tasks, priority) - Queue a list of [srcdomain, attr, refdomain] tasks in one transaction, in the order they are listed, with
+    # the priority given by the srcdomain and attr of each if priority is None.
+    #
+    def extend (self, tasks, priority=None):
+        workers = self.workers()
+        if priority is None:
+            priorities = [self.priority(srcdomain, attr) for srcdomain, attr, refdomain in tasks]
+        else:
+            priorities = [priority] * len(tasks)
+        self.db.execute("BEGIN IMMEDIATE")
+        self.db.executemany("INSERT OR IGNORE INTO frontier (refdomain, srcdomain, attr, shard, priority) VALUES (?, ?, ?, ?, ?)",
+            [(refdomain, srcdomain, attr, shardof(refdomain, workers), priority) for (srcdomain, attr, refdomain), priority in zip(tasks, priorities)])
+        self.db.execute("COMMIT")
+    #
+    # claim() - Lease the next task of this worker's shard, or of any shard if there are none left in its own, to this worker. Returns
+    # False if there were no tasks to claim.
+    #
+    def claim (self):
+        now = time.time()
+        select = "SELECT seq, srcdomain, attr, refdomain FROM frontier WHERE outcome = 'queued' AND expires < ?"
+        order = " ORDER BY priority, seq LIMIT 1"
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute(select + " AND shard = ?" + order, (now, self.worker % self.workers())).fetchone()
+            if row is None:
+                row = self.db.execute(select + order, (now,)).fetchone()
+            if row is not None:
+                self.db.execute("UPDATE frontier SET worker = ?, expires = ? WHERE seq = ?", (self.worker, now + self.lease, row[0]))
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return False
+        self.tasks.append([row[1], row[2], row[3]])
+        return True
+    #
+    # pop() - Remove and return the next [srcdomain, attr, refdomain] task claimed by this worker.
+    #
+    def pop (self):
+        if len(self.tasks) == 0:
+            self.claim()
+        return self.tasks.popleft()
+    #
+    # dump() - Return the list of [srcdomain, attr, refdomain] tasks claimed by this worker and not yet taken with pop().
+    #
+    def dump (self):
+        return [list(task) for task in self.tasks]
+    #
+    # done() - Return True if every task queued by any worker has an outcome, i.e., the crawl is complete.
+    #
+    def done (self):
+        return self.db.execute("SELECT 1 FROM frontier WHERE outcome = 'queued' LIMIT 1").fetchone() is None
+    #
+    # outcomes() - Return the list of [refdomain, outcome] of every domain in the frontier.
+    #
+    def outcomes (self):
+        return [list(row) for row in self.db.execute("SELECT refdomain, outcome FROM frontier ORDER BY refdomain")]
+    #
+    # close() - Close the database.
+    #
+    def close (self):
+        self.db.close()
@@ -29,6 +29,7 @@
 import sys
 import os
 import requests
+import httpclient
 import re
 import html
 from bs4 import BeautifulSoup
@@ -289,7 +290,7 @@ def fetchurl(url):
     exception = False
     error = ""
     try:
-        r = requests.get(url, timeout=61, verify=False, headers=headers)
+        r = httpclient.get(url, timeout=61, verify=False, headers=headers)
     except requests.exceptions.TooManyRedirects as Argument:
         error = "HTTP GET too many redirects exception occurred: " + str(Argument)
         r = "" 
@@ -0,0 +1,217 @@
+#
+# JournalList.net content-addressed snapshot store for the trust.txt files of the daily webcrawls.
+#
+# Name - snapstore.py
+# Synopsis - snapstore.py ingest [--remove] STORE DIRNAME [DIRNAME ...]
+#            snapstore.py materialize STORE DIRNAME [TARGET]
+#            snapstore.py stats STORE
+#   STORE - the directory of the snapshot store, created if it does not exist.
+#   DIRNAME - a Webcrawl-YYYY-MM-DD directory.
+#   ingest - add the www.<domain>-trust.txt files of each DIRNAME to the store, and write its Webcrawl-YYYY-MM-DD-snapshots.json
+#   manifest. With --remove, the files are then removed from DIRNAME.
+#   materialize - write the www.<domain>-trust.txt files listed in the manifest of DIRNAME back into TARGET, default DIRNAME.
+#   stats - print the number of distinct files in the store, their total size, and the size of the pack files.
+#
+#            from snapstore import Store
+#            store = Store("snapstore")
+#            digest = store.put(data)
+#            data = store.get(digest)
+#
+# Summary - Nearly all of the trust.txt files a crawl writes are identical to those of the day before. The store keeps each distinct
+# file once, named by the SHA-256 hash of its contents, so each day only adds the files that changed:
+#
+#   STORE/pack-NNNNNN.pack - the files, each compressed with zlib, appended one after another. A new pack is started once the current
+#                            one is larger than packsize.
+#   STORE/index.txt        - one line "hash pack offset length" for each file, giving the pack it is in and where.
+#
+# Each Webcrawl-YYYY-MM-DD directory then only needs its manifest, Webcrawl-YYYY-MM-DD-snapshots.json, mapping each domain to the hash
+# of its trust.txt file, and the files can be materialized from the store when they are wanted.
+#
+# The store is append only, and is meant to have one writer at a time, e.g., cron.sh.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import json
+import zlib
+import hashlib
+import argparse
+#
+# Size in bytes after which a new pack file is started
+#
+packsize = 64 * 1024 * 1024
+#
+# Store(path) - Open the snapshot store in the directory path, creating it if it does not exist, and read its index.
+#
+class Store:
+    #
+    def __init__ (self, path):
+        self.path = path
+        self.index = {}
+        self.pack = 0
+        os.makedirs(path, exist_ok=True)
+        if os.path.isfile(self.indexname()):
+            file = open(self.indexname(),"r")
+            for line in file:
+                fields = line.split()
+                if len(fields) == 4:
+                    self.index[fields[0]] = (int(fields[1]), int(fields[2]), int(fields[3]))
+                    self.pack = max(self.pack, int(fields[1]))
+            file.close()
+    #
+    # indexname() - Return the name of the index file.
+    #
+    def indexname (self):
+        return self.path + "/index.txt"
+    #
+    # packname(pack) - Return the name of the given pack file.
+    #
+    def packname (self, pack):
+        return self.path + "/pack-" + "%06d" % pack + ".pack"
+    #
+    def __contains__ (self, digest):
+        return digest in self.index
+    #
+    def __len__ (self):
+        return len(self.index)
+    #
+    # put(data) - Add the bytes data to the store, unless it is already there, and return its hash.
+    #
+    def put (self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in self.index:
+            return digest
+        if os.path.isfile(self.packname(self.pack)) and (os.path.getsize(self.packname(self.pack)) >= packsize):
+            self.pack += 1
+        compressed = zlib.compress(data)
+        file = open(self.packname(self.pack),"ab")
+        offset = file.tell()
+        file.write(compressed)
+        file.close()
+        #
+        # Write the index entry once the data is in the pack, so the index never refers to data that is not there
+        #
+        file = open(self.indexname(),"a")
+        file.write(digest + " " + str(self.pack) + " " + str(offset) + " " + str(len(compressed)) + "\n")
+        file.close()
+        self.index[digest] = (self.pack, offset, len(compressed))
+        return digest
+    #
+    # get(digest) - Return the bytes stored with the given hash. Raises KeyError if there are none, and ValueError if they are corrupt.
+    #
+    def get (self, digest):
+        pack, offset, length = self.index[digest]
+        file = open(self.packname(pack),"rb")
+        file.seek(offset)
+        data = zlib.decompress(file.read(length))
+        file.close()
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError("Snapshot " + digest + " in " + self.packname(pack) + " is corrupt")
+        return data
+    #
+    # stats() - Return the number of distinct files in the store, their total size, and the total size of the pack files.
+    #
+    def stats (self):
+        size = 0
+        for pack in range(self.pack + 1):
+            if os.path.isfile(self.packname(pack)):
+                size += os.path.getsize(self.packname(pack))
+        total = 0
+        for digest in self.index:
+            total += len(self.get(digest))
+        return len(self.index), total, size
+#
+# manifestname(dirname) - Return the name of the snapshots manifest of the Webcrawl-YYYY-MM-DD directory dirname.
+#
+def manifestname (dirname):
+    name = os.path.basename(os.path.normpath(dirname))
+    return dirname + "/" + name + "-snapshots.json"
+#
+# readmanifest(dirname) - Return the snapshots manifest of the Webcrawl-YYYY-MM-DD directory, mapping each domain to the hash of its
+# trust.txt file, or an empty one if there isn't one.
+#
+def readmanifest (dirname):
+    if not os.path.isfile(manifestname(dirname)):
+        return {}
+    file = open(manifestname(dirname),"r")
+    entries = json.load(file)
+    file.close()
+    return entries
+#
+# trustname(domain) - Return the name of the trust.txt file of the domain in a Webcrawl-YYYY-MM-DD directory.
+#
+def trustname (domain):
+    return "www." + domain + "-trust.txt"
+#
+# ingest(store, dirname, remove) - Add the trust.txt files of the Webcrawl-YYYY-MM-DD directory to the store and write its snapshots
+# manifest, adding to any already there. If remove is True, remove the files once the manifest is written. Returns the number of files.
+#
+def ingest (store, dirname, remove=False):
+    #
+    entries = readmanifest(dirname)
+    names = []
+    for name in sorted(os.listdir(dirname)):
+        if name.startswith("www.") and name.endswith("-trust.txt"):
+            file = open(dirname + "/" + name,"rb")
+            entries[name[4:-10]] = store.put(file.read())
+            file.close()
+            names.append(name)
+    #
+    tmpname = manifestname(dirname) + ".tmp"
+    file = open(tmpname,"w")
+    json.dump(entries, file, indent=1, sort_keys=True)
+    file.close()
+    os.replace(tmpname, manifestname(dirname))
+    #
+    if remove:
+        for name in names:
+            os.remove(dirname + "/" + name)
+    return len(names)
+#
+# materialize(store, dirname, target) - Write the trust.txt files listed in the snapshots manifest of the Webcrawl-YYYY-MM-DD directory
+# into the target directory. Returns the number of files.
+#
+def materialize (store, dirname, target):
+    #
+    os.makedirs(target, exist_ok=True)
+    entries = readmanifest(dirname)
+    for domain, digest in entries.items():
+        file = open(target + "/" + trustname(domain),"wb")
+        file.write(store.get(digest))
+        file.close()
+    return len(entries)
+#
+# Main program
+#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Content-addressed store of the trust.txt files of the Webcrawl-YYYY-MM-DD directories.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("ingest", help="add the trust.txt files of each DIRNAME to the store")
+    command.add_argument("--remove", help="remove the trust.txt files once they are in the store", action="store_true")
+    command.add_argument("store", help="the directory of the snapshot store", type=str)
+    command.add_argument("dirnames", help="the Webcrawl-YYYY-MM-DD directories", type=str, nargs="+", metavar="dirname")
+    command = commands.add_parser("materialize", help="write the trust.txt files of DIRNAME back from the store")
+    command.add_argument("store", help="the directory of the snapshot store", type=str)
+    command.add_argument("dirname", help="the Webcrawl-YYYY-MM-DD directory", type=str)
+    command.add_argument("target", help="the directory to write the files to, default DIRNAME", type=str, nargs="?", default="")
+    command = commands.add_parser("stats", help="print the size of the store")
+    command.add_argument("store", help="the directory of the snapshot store", type=str)
+    args = parser.parse_args()
+    #
+    store = Store(args.store)
+    if args.command == "ingest":
+        for dirname in args.dirnames:
+            if os.path.isdir(dirname):
+                count = ingest(store, dirname, args.remove)
+                print (dirname + ": " + str(count) + " files, " + str(len(store)) + " distinct files in " + args.store)
+            else:
+                print (dirname, "does not exist")
+    elif args.command == "materialize":
+        target = args.target or args.dirname
+        count = materialize(store, args.dirname, target)
+        print (target + ": " + str(count) + " files")
+    else:
+        count, total, size = store.stats()
+        print (args.store + ": " + str(count) + " distinct files, " + str(total) + " bytes, " + str(size) + " bytes in packs")
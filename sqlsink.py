@@ -0,0 +1,147 @@
+#
+# JournalList.net webcrawler SQLite sink, writes the webcrawler.py results straight into an SQLite database.
+#
+# Name - sqlsink.py
+# Synopsis - from sqlsink import Sink
+#            sink = Sink("Webcrawl-YYYY-MM-DD/Webcrawl-YYYY-MM-DD.db")
+#            csvfile = sink.table("trust_txt")
+#            csvfile.write("https://www.journallist.net/,member,https://www.example.com/\n")
+#            sink.export("trust_txt", "Webcrawl-YYYY-MM-DD/Webcrawl-YYYY-MM-DD.csv")
+#            sink.close()
+#
+# Summary - Instead of writing the Webcrawl-YYYY-MM-DD.csv, -err.csv and -redirects.csv files, which cron.sh then sorts, removes
+# duplicates from and imports into sqlite3, webcrawler.py --sqlite writes the same rows into the tables of a database:
+#
+#   trust_txt   - srcurl,attr,refurl rows of the .csv file.
+#   http_errors - srcurl,attr,refurl,error rows of the -err.csv file.
+#   redirects   - srcurl,redirect rows of the -redirects.csv file.
+#
+# trust_txt and http_errors have the names and columns cron.sh imports the .csv files as, so symmetric.sql can be run against the
+# database as it is. Each table has a UNIQUE constraint over all its columns, so duplicate rows are dropped as they are inserted
+# rather than by sort and uniq afterwards.
+#
+# sink.table(name) returns a Table, which takes the same lines the .csv file would have been written with, so the webcrawler
+# writes to it as it would to the file. Rows are inserted in batches with executemany, each batch in one transaction, and the
+# database is in WAL mode so it can be read while the crawl is writing it. sink.export(name, filename) writes a table back out
+# as a .csv file, when one is wanted.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import sqlite3
+#
+# The columns of each table
+#
+columns = {
+    "trust_txt": ["srcurl", "attr", "refurl"],
+    "http_errors": ["srcurl", "attr", "refurl", "error"],
+    "redirects": ["srcurl", "redirect"]
+}
+#
+# Database schema
+#
+schema = """
+CREATE TABLE IF NOT EXISTS trust_txt ("srcurl" TEXT, "attr" TEXT, "refurl" TEXT, UNIQUE ("srcurl", "attr", "refurl"));
+CREATE TABLE IF NOT EXISTS http_errors ("srcurl" TEXT, "attr" TEXT, "refurl" TEXT, "error" TEXT, UNIQUE ("srcurl", "attr", "refurl", "error"));
+CREATE TABLE IF NOT EXISTS redirects ("srcurl" TEXT, "redirect" TEXT, UNIQUE ("srcurl", "redirect"));
+CREATE INDEX IF NOT EXISTS trust_txt_attr ON trust_txt ("attr");
+CREATE INDEX IF NOT EXISTS trust_txt_refurl ON trust_txt ("refurl");
+CREATE INDEX IF NOT EXISTS http_errors_refurl ON http_errors ("refurl");
+"""
+#
+# Number of rows inserted in each batch
+#
+batchsize = 1000
+#
+# Table(sink, name) - A file-like writer of the rows of one table of the sink. Only the sink creates them.
+#
+class Table:
+    #
+    def __init__ (self, sink, name):
+        self.sink = sink
+        self.name = name
+        self.ncolumns = len(columns[name])
+        self.rows = []
+        self.partial = ""
+        self.count = 0
+    #
+    # write(text) - Add the rows of the lines in text. Fields are separated by commas, as in the .csv file, any extra commas are
+    # kept in the last field. Text after the last newline is kept until the rest of its line is written.
+    #
+    def write (self, text):
+        lines = (self.partial + text).split("\n")
+        self.partial = lines.pop()
+        for line in lines:
+            row = line.split(",", self.ncolumns - 1)
+            if len(row) == self.ncolumns:
+                self.rows.append(row)
+        self.count += len(lines)
+        if len(self.rows) >= batchsize:
+            self.sink.flush()
+    #
+    # flush() - Insert the rows written so far.
+    #
+    def flush (self):
+        self.sink.flush()
+    #
+    # tell() - Return the number of lines written, where a file would return its length.
+    #
+    def tell (self):
+        return self.count
+    #
+    # close() - Insert the rows written so far, the sink itself is closed by sink.close().
+    #
+    def close (self):
+        self.sink.flush()
+#
+# Sink(filename) - Open the database, creating its tables if necessary.
+#
+class Sink:
+    #
+    def __init__ (self, filename):
+        self.db = sqlite3.connect(filename, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(schema)
+        self.tables = {}
+    #
+    # table(name) - Return the Table writing rows into the named table.
+    #
+    def table (self, name):
+        if name not in self.tables:
+            self.tables[name] = Table(self, name)
+        return self.tables[name]
+    #
+    # flush() - Insert the rows written to all of the tables in one transaction, ignoring those already in them.
+    #
+    def flush (self):
+        self.db.execute("BEGIN")
+        for name, table in self.tables.items():
+            if table.rows:
+                names = ",".join(columns[name])
+                marks = ",".join(["?"] * table.ncolumns)
+                self.db.executemany("INSERT OR IGNORE INTO " + name + " (" + names + ") VALUES (" + marks + ")", table.rows)
+                table.rows = []
+        self.db.execute("COMMIT")
+    #
+    # export(name, filename) - Write the named table to a .csv file with a header line. The rows of trust_txt are sorted, as cron.sh
+    # sorts the .csv file, the others are in the order they were written.
+    #
+    def export (self, name, filename):
+        self.flush()
+        if name == "trust_txt":
+            order = " ORDER BY " + ",".join(columns[name])
+        else:
+            order = " ORDER BY rowid"
+        file = open(filename,"w")
+        file.write(",".join(columns[name]) + "\n")
+        for row in self.db.execute("SELECT " + ",".join(columns[name]) + " FROM " + name + order):
+            file.write(",".join(row) + "\n")
+        file.close()
+    #
+    # close() - Insert any rows not yet inserted and close the database.
+    #
+    def close (self):
+        self.flush()
+        self.db.close()
@@ -0,0 +1,181 @@
+#
+# Synthetic trust.txt ecosystem served by a local HTTP proxy, and helpers to run webcrawler.py against it, for the webcrawler tests.
+#
+# Name - crawlserver.py
+# Synopsis - from crawlserver import Ecosystem, serve, runcrawler, outputs
+#            server = serve(Ecosystem(40), delay=0.0)
+#            result = runcrawler(workdir, server, ["-c", "4", "site0.test"])
+#            files = outputs(workdir)
+#
+# Summary - Domain i of an ecosystem of count domains is "site<i>.test". Each is a member of domain (i-1)//fanout, which it lists as
+# "belongto", and lists a "vendor" reference to another domain, so domains are referenced more than once. A few of the leaves are
+# served differently, each covering a case of webcrawler.py's fetchtrust():
+#
+#   redirect - "/trust.txt" redirects to site1.test, queued by the root domain before any other is fetched, so it was already visited.
+#   moved    - "/trust.txt" redirects to moved<i>.test, a domain not otherwise referenced, which serves the trust.txt file.
+#   wellknown - only "/.well-known/trust.txt" is found.
+#   html     - an HTML page is returned.
+#   notfound - neither url is found.
+#
+# The server is an HTTP proxy on 127.0.0.1: webcrawler.py is run with http_proxy set to it, so every "http://site<i>.test/..." request
+# reaches it without any DNS lookup, as in benchmarks/bench_crawl.py. Each response can be delayed, so a crawl takes long enough to be
+# interrupted.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import sys
+import glob
+import json
+import time
+import threading
+import subprocess
+from urllib.parse import urlsplit
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+#
+webcrawler = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "webcrawler.py")
+#
+# Ecosystem(count, fanout, special) - The synthetic ecosystem of count domains, with the leaves given in special, a dictionary of
+# domain number to kind, served differently.
+#
+class Ecosystem:
+    #
+    def __init__ (self, count=40, fanout=3, special=None):
+        self.count = count
+        self.fanout = fanout
+        if special is None:
+            special = {count - 20: "redirect", count - 19: "moved", count - 18: "wellknown", count - 17: "html", count - 16: "notfound"}
+        self.special = special
+    #
+    # kind(i) - Return how domain i is served, "ok" or one of the special kinds.
+    #
+    def kind (self, i):
+        return self.special.get(i, "ok")
+    #
+    # trust(i) - Return the text of the trust.txt file of domain i.
+    #
+    def trust (self, i):
+        lines = ["# trust.txt file for site" + str(i) + ".test"]
+        if i > 0:
+            lines.append("belongto=https://www.site" + str((i - 1) // self.fanout) + ".test/")
+        for child in range(self.fanout * i + 1, min(self.count, self.fanout * (i + 1) + 1)):
+            lines.append("member=https://www.site" + str(child) + ".test/")
+        lines.append("vendor=https://site" + str((i * 7 + 3) % self.count) + ".test")
+        lines.append("contact=mailto:trust@site" + str(i) + ".test")
+        return "\n".join(lines) + "\n"
+    #
+    # lookup(host) - Return the number of the domain served at host, or None.
+    #
+    def lookup (self, host):
+        host = host.split(":")[0].lower()
+        if host.startswith("www."):
+            host = host[4:]
+        for prefix in ["site", "moved"]:
+            name = host[len(prefix):-len(".test")]
+            if host.startswith(prefix) and host.endswith(".test") and name.isdigit() and (int(name) < self.count):
+                return int(name)
+        return None
+#
+# Handler - Serve the trust.txt files of the server's ecosystem, routing each request by its host.
+#
+class Handler (BaseHTTPRequestHandler):
+    #
+    protocol_version = "HTTP/1.1"
+    #
+    def log_message (self, format, *args):
+        pass
+    #
+    def reply (self, status, contenttype="text/plain", body="", headers=None):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", contenttype)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+    #
+    def do_GET (self):
+        if self.server.delay > 0:
+            time.sleep(self.server.delay)
+        o = urlsplit(self.path)
+        host = (o.netloc or self.headers.get("Host", "")).split(":")[0].lower()
+        ecosystem = self.server.ecosystem
+        i = ecosystem.lookup(host)
+        if i is None:
+            self.reply(502, body="Unknown host\n")
+            return
+        kind = ecosystem.kind(i)
+        if (kind == "redirect") and (o.path == "/trust.txt"):
+            self.reply(301, headers={"Location": "http://site1.test/trust.txt"})
+        elif (kind == "moved") and host.startswith("site"):
+            self.reply(301, headers={"Location": "http://moved" + str(i) + ".test" + o.path})
+        elif (kind == "notfound") or ((kind == "wellknown") and (o.path == "/trust.txt")):
+            self.reply(404, body="Not found\n")
+        elif o.path not in ["/trust.txt", "/.well-known/trust.txt"]:
+            self.reply(404, body="Not found\n")
+        elif kind == "html":
+            self.reply(200, "text/html; charset=utf-8", "<html><body>site" + str(i) + ".test</body></html>\n")
+        else:
+            self.reply(200, "text/plain; charset=utf-8", ecosystem.trust(i))
+#
+# serve(ecosystem, delay) - Start serving the ecosystem on a free port of 127.0.0.1 in a background thread, delaying each response by
+# delay seconds, and return the server. Stop it with server.shutdown() and server.server_close().
+#
+def serve (ecosystem, delay=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.ecosystem = ecosystem
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+#
+# environment(server) - Return the environment to run webcrawler.py in, with its HTTP requests sent to the server.
+#
+def environment (server):
+    env = dict(os.environ)
+    proxy = "http://127.0.0.1:" + str(server.server_address[1])
+    env.update(http_proxy=proxy, HTTP_PROXY=proxy, no_proxy="", NO_PROXY="")
+    return env
+#
+# start(workdir, server, args) - Start webcrawler.py with the list of args in workdir, against the server, and return the process.
+#
+def start (workdir, server, args):
+    return subprocess.Popen([sys.executable, os.path.abspath(webcrawler)] + args, cwd=workdir, env=environment(server),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+#
+# runcrawler(workdir, server, args) - Run webcrawler.py with the list of args in workdir, against the server, and return the completed
+# process.
+#
+def runcrawler (workdir, server, args):
+    return subprocess.run([sys.executable, os.path.abspath(webcrawler)] + args, cwd=workdir, env=environment(server),
+                          capture_output=True, text=True, timeout=300)
+#
+# webcrawl(workdir) - Return the path of the Webcrawl-YYYY-MM-DD directory in workdir.
+#
+def webcrawl (workdir):
+    return glob.glob(workdir + "/Webcrawl-*")[0]
+#
+# outputs(workdir) - Return the outputs of the crawl in workdir that do not depend on the order the domains were crawled in: the sorted
+# lines of the .csv, -err.csv, -redirects.csv and -visited.csv files, the domains of the -timings.csv file, and the counts of the
+# -metrics.json file.
+#
+def outputs (workdir):
+    path = webcrawl(workdir)
+    name = path + "/" + os.path.basename(path)
+    results = {}
+    for suffix in [".csv", "-err.csv", "-redirects.csv", "-visited.csv"]:
+        file = open(name + suffix,"r")
+        results[suffix] = sorted(file.read().splitlines())
+        file.close()
+    file = open(name + "-timings.csv","r")
+    results["-timings.csv"] = sorted(line.split(",")[0] for line in file.read().splitlines())
+    file.close()
+    file = open(name + "-metrics.json","r")
+    metrics = json.load(file)
+    file.close()
+    results["-metrics.json"] = dict([(key, metrics[key]) for key in ["fetches", "bytes", "status", "exceptions", "paths", "redirects",
+                                                                     "domains", "nxdomains"]] + [("count", metrics["fetch_seconds"]["count"])])
+    return results
@@ -0,0 +1,67 @@
+#
+# Tests of checkpointing and resuming a crawl by webcrawler.py, run against the synthetic ecosystem of crawlserver.py.
+#
+# Name - test_checkpoint.py
+# Synopsis - python -m pytest tests
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import glob
+import time
+import shutil
+import tempfile
+import unittest
+from crawlserver import Ecosystem, serve, start, runcrawler, outputs, webcrawl
+#
+class TestResume (unittest.TestCase):
+    #
+    def setUp (self):
+        self.path = tempfile.mkdtemp(prefix="test-checkpoint-")
+        self.server = serve(Ecosystem(40), delay=0.1)
+    #
+    def tearDown (self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.path)
+    #
+    def workdir (self, name):
+        os.mkdir(self.path + "/" + name)
+        return self.path + "/" + name
+    #
+    def assertRuns (self, result):
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertNotIn("Traceback", result.stderr)
+    #
+    # A crawl killed after it has written a checkpoint, and resumed, produces the same outputs as one that was not interrupted
+    #
+    def test_resume_matches_uninterrupted (self):
+        single = self.workdir("single")
+        self.assertRuns(runcrawler(single, self.server, ["-k", "0", "-c", "4", "site0.test"]))
+        expected = outputs(single)
+        #
+        # Kill the crawl shortly after its first checkpoint, so that some of its outputs were written after it
+        #
+        workdir = self.workdir("resumed")
+        process = start(workdir, self.server, ["-k", "0.3", "-c", "4", "site0.test"])
+        deadline = time.time() + 60
+        while (len(glob.glob(workdir + "/Webcrawl-*/*-checkpoint.json")) == 0) and (process.poll() is None) and (time.time() < deadline):
+            time.sleep(0.01)
+        time.sleep(0.15)
+        process.kill()
+        stdout, stderr = process.communicate(timeout=60)
+        self.assertEqual(process.returncode, -9, "the crawl completed before it was interrupted\n" + stderr)
+        path = webcrawl(workdir)
+        self.assertTrue(os.path.isfile(path + "/" + os.path.basename(path) + "-checkpoint.json"))
+        #
+        self.assertRuns(runcrawler(workdir, self.server, ["-r", "-k", "0", "-c", "4", "site0.test"]))
+        file = open(path + "/" + os.path.basename(path) + "-log.txt","r")
+        self.assertIn("RESUME: ", file.read())
+        file.close()
+        self.assertFalse(os.path.exists(path + "/" + os.path.basename(path) + "-checkpoint.json"))
+        self.assertEqual(outputs(workdir), expected)
+#
+if __name__ == "__main__":
+    unittest.main()
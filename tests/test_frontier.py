@@ -0,0 +1,145 @@
+#
+# Tests of frontier.py, the order tasks are taken from a Frontier, deduplication through its Visited index, and checkpointing it.
+#
+# Name - test_frontier.py
+# Synopsis - python -m pytest tests
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from frontier import Frontier, Visited, shardof, ROOT, SYMMETRIC, DISCOVERED
+#
+# drain(frontier) - Pop every task on the frontier and return the list of their refdomains, in the order they were popped.
+#
+def drain (frontier):
+    refdomains = []
+    while len(frontier) > 0:
+        refdomains.append(frontier.pop()[2])
+    return refdomains
+#
+class TestOrder (unittest.TestCase):
+    #
+    # root.test lists a.test and b.test, a.test lists c.test
+    #
+    def crawl (self, order):
+        frontier = Frontier(order)
+        frontier.push("root.test", "self", "root.test", ROOT)
+        refdomains = []
+        refs = {"root.test": ["a.test", "b.test"], "a.test": ["c.test"]}
+        while len(frontier) > 0:
+            srcdomain, attr, refdomain = frontier.pop()
+            refdomains.append(refdomain)
+            frontier.extend([[refdomain, "member", ref] for ref in refs.get(refdomain, [])])
+        return refdomains
+    #
+    def test_dfs (self):
+        self.assertEqual(self.crawl("dfs"), ["root.test", "a.test", "c.test", "b.test"])
+    #
+    def test_bfs (self):
+        self.assertEqual(self.crawl("bfs"), ["root.test", "a.test", "b.test", "c.test"])
+    #
+    def test_unknown_order (self):
+        self.assertRaises(ValueError, Frontier, "random")
+    #
+    # Tasks are popped by class, then longest expected time first, then those without an expected time in the order they were queued
+    #
+    def test_priority (self):
+        frontier = Frontier("priority", expected={"slow.test": 5.0, "fast.test": 1.0})
+        frontier.push("", "self", "seed.test", DISCOVERED)
+        frontier.push("", "self", "root.test", ROOT)
+        frontier.extend([["root.test", "vendor", "vendor.test"], ["root.test", "member", "fast.test"],
+                         ["root.test", "member", "unknown.test"], ["root.test", "member", "slow.test"]])
+        frontier.push("vendor.test", "member", "vendormember.test")
+        self.assertEqual(drain(frontier), ["slow.test", "fast.test", "root.test", "unknown.test", "vendor.test", "vendormember.test",
+                                           "seed.test"])
+        self.assertEqual(frontier.classes["vendormember.test"], SYMMETRIC)
+#
+class TestVisited (unittest.TestCase):
+    #
+    # A domain is queued at most once, whether it is still queued or has been crawled, and the index is shared with the frontier
+    #
+    def test_dedup (self):
+        visited = Visited()
+        frontier = Frontier("bfs", visited)
+        self.assertTrue(frontier.push("root.test", "member", "a.test"))
+        self.assertFalse(frontier.push("b.test", "member", "a.test"))
+        self.assertEqual(visited.outcome("a.test"), "queued")
+        frontier.extend([["a.test", "member", "b.test"], ["a.test", "vendor", "b.test"]])
+        self.assertEqual(len(frontier), 2)
+        frontier.pop()
+        visited.mark("a.test", "success")
+        self.assertTrue(frontier.seen("a.test"))
+        self.assertFalse(frontier.push("c.test", "member", "a.test"))
+        self.assertEqual(drain(frontier), ["b.test"])
+        self.assertEqual(visited.outcome("c.test"), "")
+        self.assertRaises(ValueError, visited.mark, "a.test", "unknown")
+    #
+    def test_write_read (self):
+        path = tempfile.mkdtemp(prefix="test-frontier-")
+        try:
+            visited = Visited()
+            visited.mark("a.test", "success")
+            visited.mark("b.test", "redirect")
+            visited.mark("c.test", "queued")
+            visited.write(path + "/visited.csv")
+            copy = Visited()
+            copy.read(path + "/visited.csv")
+            self.assertEqual(copy.outcomes, visited.outcomes)
+        finally:
+            shutil.rmtree(path)
+    #
+    def test_shardof (self):
+        self.assertEqual(shardof("journallist.net", 4), shardof("journallist.net", 4))
+        self.assertTrue(0 <= shardof("journallist.net", 4) < 4)
+#
+class TestCheckpoint (unittest.TestCase):
+    #
+    # fill(frontier) - Queue tasks in every class, some with an expected time.
+    #
+    def fill (self, frontier):
+        frontier.push("", "self", "seed.test", DISCOVERED)
+        frontier.push("", "self", "root.test", ROOT)
+        frontier.extend([["root.test", "member", "a.test"], ["root.test", "vendor", "b.test"], ["root.test", "member", "c.test"]])
+        frontier.push("b.test", "member", "d.test")
+    #
+    # A frontier loaded from the dump of another, with the same visited index, holds the same tasks and pops them in the same order
+    #
+    def test_round_trip (self):
+        for order in ["dfs", "bfs", "priority"]:
+            with self.subTest(order=order):
+                expected = {"c.test": 2.0, "d.test": 1.0}
+                frontier = Frontier(order, expected=expected)
+                self.fill(frontier)
+                frontier.pop()
+                tasks = frontier.dump()
+                copy = Frontier(order, Visited(), expected)
+                for domain, outcome in frontier.visited.outcomes.items():
+                    copy.visited.mark(domain, outcome)
+                copy.load(tasks)
+                self.assertEqual(copy.dump(), tasks)
+                self.assertEqual(drain(copy), drain(frontier))
+    #
+    # The priority classes are kept in the dump, so tasks are loaded into their class whatever their srcdomain, and tasks without
+    # one are classified as they are loaded, marking their refdomains as queued
+    #
+    def test_priority_classes (self):
+        frontier = Frontier("priority")
+        self.fill(frontier)
+        tasks = frontier.dump()
+        self.assertEqual([task[3] for task in tasks], [ROOT, ROOT, ROOT, SYMMETRIC, SYMMETRIC, DISCOVERED])
+        copy = Frontier("priority")
+        copy.load(tasks + [["a.test", "member", "e.test"]])
+        self.assertEqual(copy.visited.outcome("e.test"), "queued")
+        self.assertEqual(copy.classes["e.test"], ROOT)
+        self.assertEqual(drain(copy), ["root.test", "a.test", "c.test", "e.test", "b.test", "d.test", "seed.test"])
+#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#
+# Tests of graphml.py, run on small Webcrawl directories written into a temporary directory.
+#
+# Name - test_graphml.py
+# Synopsis - python -m pytest tests
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+#
+graphml = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "graphml.py")
+dirname = "Webcrawl-2021-01-01"
+#
+# writecrawl(path, files) - Write the dictionary of the lines of each file, by suffix, into the Webcrawl directory in path.
+#
+def writecrawl (path, files):
+    os.mkdir(path + "/" + dirname)
+    for suffix, lines in files.items():
+        file = open(path + "/" + dirname + "/" + dirname + suffix,"w")
+        file.write("".join(line + "\n" for line in lines))
+        file.close()
+#
+# readindex(filename) - Return the dictionary of the community of each member in a -communities.csv file.
+#
+def readindex (filename):
+    file = open(filename,"r")
+    index = dict([line.rstrip("\n").split(",")[::-1] for line in file][1:])
+    file.close()
+    return index
+#
+class TestCommunities (unittest.TestCase):
+    #
+    def setUp (self):
+        self.path = tempfile.mkdtemp(prefix="test-graphml-")
+    #
+    def tearDown (self):
+        shutil.rmtree(self.path)
+    #
+    def run_graphml (self, options):
+        return subprocess.run([sys.executable, os.path.abspath(graphml)] + options + [dirname], cwd=self.path, capture_output=True, text=True)
+    #
+    # An association whose url has a path, a member of it, and two publishers that only control each other, outside any member tree
+    #
+    def test_path_and_unassigned (self):
+        assoc = "https://www.assoc.org/news/"
+        pub = "https://www.pub.com/"
+        other1 = "https://www.other1.com/"
+        other2 = "https://www.other2.com/"
+        writecrawl(self.path, {
+            ".csv": ["srcurl,attr,refurl", assoc + ",member," + pub, pub + ",belongto," + assoc, other1 + ",control," + other2,
+                     other2 + ",controlledby," + other1],
+            "-symmetric.csv": [",".join([assoc, "member", pub, pub, "belongto", assoc]),
+                               ",".join([other1, "control", other2, other2, "controlledby", other1])],
+            "-associations.csv": [assoc],
+            "-publishers.csv": [pub, other1, other2],
+            "-vendors.csv": [],
+            "-controlled.csv": [other2]
+        })
+        result = self.run_graphml(["-c"])
+        self.assertEqual(result.returncode, 0, result.stderr)
+        #
+        commdir = self.path + "/" + dirname + "/" + dirname + "-communities"
+        self.assertEqual(sorted(os.listdir(commdir)), ["unassigned.graphml", "www.assoc.org_news.graphml"])
+        index = readindex(self.path + "/" + dirname + "/" + dirname + "-communities.csv")
+        self.assertEqual(index, {assoc: assoc, pub: assoc, other1: "https://unassigned/", other2: "https://unassigned/"})
+        self.assertTrue(os.path.isfile(self.path + "/" + dirname + "/" + dirname + "-communities.graphml"))
+#
+if __name__ == "__main__":
+    unittest.main()
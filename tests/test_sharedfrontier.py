@@ -0,0 +1,127 @@
+#
+# Tests of sharedfrontier.py, and of distributed crawls by webcrawler.py workers sharing a frontier, run against the synthetic
+# ecosystem of crawlserver.py.
+#
+# Name - test_sharedfrontier.py
+# Synopsis - python -m pytest tests
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sharedfrontier import SharedFrontier
+from crawlserver import Ecosystem, serve, start, runcrawler, outputs
+#
+class TestSharedFrontier (unittest.TestCase):
+    #
+    def setUp (self):
+        self.path = tempfile.mkdtemp(prefix="test-sharedfrontier-")
+        self.dbname = self.path + "/frontier.db"
+    #
+    def tearDown (self):
+        shutil.rmtree(self.path)
+    #
+    # A domain queued by one worker is seen by the other and is not queued again
+    #
+    def test_dedup (self):
+        worker0 = SharedFrontier(self.dbname, worker=0)
+        worker0.create("Webcrawl-2021-01-01", 2)
+        worker1 = SharedFrontier(self.dbname, worker=1)
+        self.assertTrue(worker0.push("", "", "a.test"))
+        self.assertTrue("a.test" in worker1.visited)
+        self.assertFalse(worker1.push("b.test", "member", "a.test"))
+        worker1.extend([["b.test", "member", "a.test"], ["b.test", "member", "c.test"]])
+        self.assertEqual(sorted(worker0.outcomes()), [["a.test", "queued"], ["c.test", "queued"]])
+        worker0.close()
+        worker1.close()
+    #
+    # A task claimed by a worker that does not record its outcome is claimed again by another once its lease expires
+    #
+    def test_lease_expiry (self):
+        worker0 = SharedFrontier(self.dbname, worker=0, lease=0.5)
+        worker0.create("Webcrawl-2021-01-01", 2)
+        worker1 = SharedFrontier(self.dbname, worker=1, lease=0.5)
+        worker0.push("", "", "a.test")
+        self.assertEqual(len(worker0), 1)
+        self.assertEqual(len(worker1), 0)
+        time.sleep(0.6)
+        self.assertEqual(len(worker1), 1)
+        self.assertEqual(worker1.pop(), ["", "", "a.test"])
+        self.assertFalse(worker1.done())
+        worker1.visited.mark("a.test", "success")
+        self.assertTrue(worker0.done())
+        self.assertEqual(len(worker0), 1)
+        worker0.pop()
+        self.assertEqual(len(worker0), 0)
+        worker0.close()
+        worker1.close()
+#
+class TestDistributedCrawl (unittest.TestCase):
+    #
+    def setUp (self):
+        self.path = tempfile.mkdtemp(prefix="test-sharedfrontier-")
+        self.server = serve(Ecosystem(40), delay=0.01)
+    #
+    def tearDown (self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.path)
+    #
+    def workdir (self, name):
+        os.mkdir(self.path + "/" + name)
+        return self.path + "/" + name
+    #
+    def assertRuns (self, result):
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertNotIn("Traceback", result.stderr)
+    #
+    # crawl(lease) - Run a coordinator, two workers at once and the merge in a work directory, with each worker leasing its tasks for
+    # lease seconds, and return the directory.
+    #
+    def crawl (self, name, lease):
+        workdir = self.workdir(name)
+        self.assertRuns(runcrawler(workdir, self.server, ["--coordinator", "frontier.db", "--workers", "2", "site0.test"]))
+        workers = [start(workdir, self.server, ["--worker", "frontier.db", "--worker-id", str(worker), "-c", "4", "--lease", str(lease)])
+                   for worker in range(2)]
+        for worker in workers:
+            stdout, stderr = worker.communicate(timeout=300)
+            self.assertEqual(worker.returncode, 0, stdout + stderr)
+            self.assertNotIn("Traceback", stderr)
+        result = runcrawler(workdir, self.server, ["--merge", "frontier.db"])
+        self.assertRuns(result)
+        self.assertNotIn("not complete", result.stdout)
+        return workdir
+    #
+    # Two workers, whose ecosystem redirects across domains, both to a domain already visited and to a new one, produce the same outputs
+    # as a single process
+    #
+    def test_matches_single_process (self):
+        single = self.workdir("single")
+        self.assertRuns(runcrawler(single, self.server, ["-k", "0", "-c", "4", "site0.test"]))
+        expected = outputs(single)
+        self.assertIn("http://site20.test/trust.txt,http://site1.test/trust.txt", expected["-redirects.csv"])
+        self.assertIn("http://site21.test/trust.txt,http://moved21.test/trust.txt", expected["-redirects.csv"])
+        self.assertEqual(outputs(self.crawl("distributed", 600)), expected)
+    #
+    # Workers whose leases expire while they are crawling reclaim each other's tasks, and the merge skips the duplicate lines this
+    # produces
+    #
+    def test_lease_reclaim (self):
+        self.server.delay = 0.05
+        single = self.workdir("single")
+        self.assertRuns(runcrawler(single, self.server, ["-k", "0", "-c", "4", "site0.test"]))
+        expected = outputs(single)
+        results = outputs(self.crawl("distributed", 0.02))
+        for suffix in [".csv", "-err.csv", "-redirects.csv", "-visited.csv"]:
+            self.assertEqual(results[suffix], expected[suffix])
+#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#
+# JournalList.net trust.txt parser shared by webcrawler.py, qa_trust_txt.py, and trust2fps.py.
+#
+# Name - trustparse.py
+# Synopsis - import trustparse
+#            for linenum, attr, value, kind in trustparse.iterentries(data):
+#                if kind == trustparse.SYMMETRIC:
+#                    ...
+#            entries = trustparse.parsefile("www.journallist.net-trust.txt")
+#
+# Summary - A trust.txt file is a list of "attribute=url" lines, with "#" comment lines and blank lines. Each line is cleaned up
+# before it is parsed as the scripts each did one line at a time: leading and trailing white space, non-ASCII characters and null
+# characters are removed, and unless squeeze is False so is all other white space, e.g., tabs and spaces. Rather than one line at a
+# time, the whole file is cleaned up at once with bytes.translate, and then parsed in a single pass of one compiled pattern over all
+# of it, which matches each line in turn, capturing the attribute and url of those that are entries.
+#
+# Lines end where str.splitlines() ends them: at "\r\n", "\r", "\n", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", and the UTF-8 encoded
+# U+0085, U+2028 and U+2029. The line endings are found before any character is removed, so removing one between a "\r" and a "\n"
+# does not join their lines and change the line numbers of those that follow.
+#
+# An entry is a tuple (linenum, attr, value, kind), for each line with exactly one "=" and a non-empty url, other lines are skipped:
+#
+#   linenum - the line number in the file, counting from 1.
+#   attr    - the attribute, e.g., "member".
+#   value   - the referenced url, unmodified.
+#   kind    - SYMMETRIC if attr is one of symattr, ASYMMETRIC if it is one of asymattr, otherwise INVALID.
+#
+# parse(data) returns the list of entries, and iterentries(data) yields them one at a time as the pattern matches them.
+#
+# Attributes are looked up in the symattr and asymattr sets, so only whole attribute names match, not a part of one, e.g., "control"
+# but not "contro".
+#
+# See benchmarks/bench_parse.py for a comparison with the original line parsing.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+import re
+#
+# Symmetric and asymmetric attributes
+#
+symattr = frozenset(["member", "belongto", "control", "controlledby", "vendor", "customer"])
+asymattr = frozenset(["social", "contact", "disclosure", "datatrainingallowed"])
+#
+# Kinds of entry
+#
+SYMMETRIC = "symmetric"
+ASYMMETRIC = "asymmetric"
+INVALID = "invalid"
+#
+# The kind of entry of each attribute
+#
+kinds = dict([(attr, SYMMETRIC) for attr in symattr] + [(attr, ASYMMETRIC) for attr in asymattr])
+#
+# The bytes removed from the file, without and with the white space other than line endings (that removed by str.strip())
+#
+junk = bytes(range(128, 256)) + b"\0"
+squeezed = junk + b" \t\x1f"
+#
+# The single byte line endings other than "\r" and "\n", mapped to "\n" by bytes.translate, and the UTF-8 encoded ones
+#
+breaks = bytes.maketrans(b"\x0b\x0c\x1c\x1d\x1e", b"\n\n\n\n\n")
+unicodebreaks = re.compile(b"\xc2\x85|\xe2\x80[\xa8\xa9]")
+#
+# The patterns matching each line of the file, capturing the attribute and url of an "attribute=url" line: not a comment, exactly
+# one "=", and a non-empty url. Without white space in the file, and with it, when it is stripped from the start and end of the line.
+#
+patterns = {
+    True: re.compile(r"(?:([^#=\n][^=\n]*+|)=([^=\n]++)(?=\n)|[^\n]*+)\n"),
+    False: re.compile(r"(?:(?![ \t\x1f]*#)[ \t\x1f]*([^=\n]*)=([^=\n]*[^=\n \t\x1f])[ \t\x1f]*(?=\n)|[^\n]*)\n")
+}
+#
+# clean(data, squeeze) - Return the bytes or str data as bytes with the non-ASCII and null characters, and if squeeze is True the
+# white space other than line endings, removed.
+#
+def clean (data, squeeze=True):
+    if isinstance(data, str):
+        data = data.encode("utf-8", "ignore")
+    return data.translate(None, squeezed if squeeze else junk)
+#
+# lines(data, squeeze) - Return the trust.txt file contents data cleaned up, as a str with "\n" line endings and ending in one, so
+# the patterns only have to match one kind.
+#
+def lines (data, squeeze=True):
+    if isinstance(data, str):
+        data = data.encode("utf-8", "ignore")
+    data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    if (b"\xc2\x85" in data) or (b"\xe2\x80" in data):
+        data = unicodebreaks.sub(b"\n", data)
+    return data.translate(breaks, squeezed if squeeze else junk).decode("ascii") + "\n"
+#
+# parse(data, squeeze) - Return the list of entries of the trust.txt file contents data, bytes or str.
+#
+def parse (data, squeeze=True):
+    return [(linenum, attr, value, kinds.get(attr, INVALID))
+            for linenum, (attr, value) in enumerate(patterns[squeeze].findall(lines(data, squeeze)), 1) if value != ""]
+#
+# iterentries(data, squeeze) - Yield each entry of the trust.txt file contents data, bytes or str, in turn.
+#
+def iterentries (data, squeeze=True):
+    for linenum, match in enumerate(patterns[squeeze].finditer(lines(data, squeeze)), 1):
+        attr, value = match.groups(default="")
+        if value != "":
+            yield (linenum, attr, value, kinds.get(attr, INVALID))
+#
+# parsefile(filename, squeeze) - Return the list of entries of the trust.txt file filename.
+#
+def parsefile (filename, squeeze=True):
+    file = open(filename,"rb")
+    data = file.read()
+    file.close()
+    return parse(data, squeeze)
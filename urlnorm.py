@@ -0,0 +1,150 @@
+#
+# JournalList.net url normalizer shared by webcrawler.py and trust2fps.py.
+#
+# Name - urlnorm.py
+# Synopsis - from urlnorm import normalize, normalize_many
+#            domain, subdomain, subdir = normalize("https://www.journallist.net/about/")
+#            results = normalize_many(["journallist.net", "https://news.bbc.co.uk/"])
+#
+# Summary - Because of the vagaries of how urls are used in trust.txt files it is necessary to normalize them so that they can be
+# matched appropriately in the JournalList ecosystem database. normalize(url) returns the base domain (e.g., journallist.net), the
+# subdomain (if any), and the subdirectory (if any) of the url.
+#
+# The results are identical to the normalize() previously copied into each script, but faster:
+#
+#   - the country code top level domains are a frozenset, so checking one is a hash lookup rather than a scan of a list.
+#   - urls of the common forms "http[s]://host/path" and "host/path" are split directly, only the unusual ones (queries, fragments,
+#     parameters, ports written as schemes, non-ASCII, etc.) go through urlparse.
+#   - results are memoized in an LRU cache, as the same urls are referenced from many trust.txt files.
+#
+# normalize_many(urls) normalizes a whole list, e.g., the domain column of the well-known.dev resources.csv file, normalizing
+# each distinct url only once.
+#
+# See benchmarks/bench_normalize.py for a comparison with the original function.
+#
+# Copyright (c) 2021 Brown Wolf Consulting LLC
+# License: Creative Commons Attribution-NonCommercial-ShareAlike license. See: https://creativecommons.org/
+#
+#--------------------------------------------------------------------------------------------------
+from functools import lru_cache
+from urllib.parse import urlparse
+#
+# Top level country domains
+#
+countrytld = frozenset([
+    "ac", "ad", "ae", "af", "ag", "ai", "al", "am", "an", "ao", "aq", "ar", "as", "at", "au", "aw", "ax", "az",
+    "ba", "bb", "bd", "be", "bf", "bg", "bh", "bi", "bj", "bl", "bm", "bn", "bo", "bq", "br", "bs", "bt", "bv", "bw", "by", "bz",
+    "ca", "cc", "cd", "cf", "cg", "ch", "ci", "ck", "cl", "cm", "cn", "co", "cr", "cu", "cv", "cw", "cx", "cy", "cz",
+    "de", "dj", "dk", "dm", "do", "dz",
+    "ec", "ee", "eg", "er", "es", "et", "eu",
+    "fi", "fj", "fk", "fm", "fo", "fr",
+    "ga", "gb", "gd", "ge", "gf", "gg", "gh", "gi", "gl", "gm", "gn", "gp", "gq", "gr", "gs", "gt", "gu", "gw", "gy",
+    "hk", "hm", "hn", "hr", "ht", "hu",
+    "id", "ie", "il", "im", "in", "io", "iq", "ir", "is", "it",
+    "je", "jm", "jo", "jp",
+    "ke", "kg", "kh", "ki", "km", "kn", "kp", "kr", "kw", "ky", "kz",
+    "la", "lb", "lc", "li", "lk", "lr", "ls", "lt", "lu", "lv", "ly",
+    "ma", "mc", "md", "me", "mf", "mg", "mh", "mk", "ml", "mm", "mn", "mo", "mp", "mq", "mr", "ms", "mt", "mu", "mv", "mw", "mx", "my", "mz",
+    "na", "nc", "ne", "nf", "ng", "ni", "nl", "no", "np", "nr", "nu", "nz",
+    "om",
+    "pa", "pe", "pf", "pg", "ph", "pk", "pl", "pm", "pn", "pr", "ps", "pt", "pw", "py",
+    "qa",
+    "re", "ro", "rs", "ru", "rw",
+    "sa", "sb", "sc", "sd", "se", "sg", "sh", "si", "sj", "sk", "sl", "sm", "sn", "so", "sr", "ss", "st", "su", "sv", "sx", "sy", "sz",
+    "tc", "td", "tf", "tg", "th", "tj", "tk", "tl", "tm", "tn", "to", "tp", "tr", "tt", "tv", "tw","tz",
+    "ua", "ug", "uk", "um", "us", "uy", "uz",
+    "va", "vc", "ve", "vg", "vi", "vn", "vu",
+    "wf", "ws"
+])
+#
+# Number of urls memoized by normalize()
+#
+cachesize = 65536
+#
+# Characters that urlparse treats specially, urls containing any of them are not split directly. Without a scheme, a ":" may be taken
+# as the end of one.
+#
+special = frozenset("?#;[]\t\r\n")
+schemeless = frozenset("?#;[]\t\r\n:")
+#
+# split (url) - Split the url into domain and subdirectory, as normalize() did with urlparse.
+#
+def split (url):
+    #
+    # If no scheme is provided, then domain is contained in the path up to a "/" and subdirectory is the path from "/" to the
+    # remainder, otherwise take them from the netloc and path.
+    #
+    if url.startswith("https://"):
+        rest = url[8:]
+    elif url.startswith("http://"):
+        rest = url[7:]
+    else:
+        rest = None
+    #
+    if url.isascii() and (url == "" or url[0] > " "):
+        if rest is not None:
+            if special.isdisjoint(rest):
+                s = rest.split("/",1)
+                if len(s) > 1:
+                    return s[0], "/" + s[1]
+                return s[0], ""
+        elif schemeless.isdisjoint(url) and not url.startswith("//"):
+            s = url.split("/",1)
+            if len(s) > 1:
+                return s[0], s[1]
+            return s[0], ""
+    #
+    # Otherwise parse the url
+    #
+    o = urlparse(url)
+    if o.scheme == "":
+        s = o.path.split("/",1)
+        if len(s) > 1:
+            return s[0], s[1]
+        return s[0], ""
+    return o.netloc, o.path
+#
+# normalize (url) - Normalize the input url and return base domain (e.g., journallist.net), subdomain (if any), and subdirectory (if any).
+#
+@lru_cache(maxsize=cachesize)
+def normalize (url):
+    #
+    domain, subdir = split(url)
+    #
+    # If subdirectory is just "/" return null
+    #
+    if subdir == "/":
+        subdir = ""
+    #
+    # Get base domain, typically the last two elements of the netloc, unless top level domain is a country code, in which case it is the last three elements of the netloc
+    #
+    s = domain.split(".")
+    slen = len(s)
+    if (slen > 2) and (s[slen-1] in countrytld) and (s[slen-3] != "www"):
+        dlen = 3
+        domain = s[slen - 3] + "." + s[slen - 2] + "." + s[slen - 1]
+    elif slen > 1:
+        dlen = 2
+        domain = s[slen - 2] + "." + s[slen - 1]
+    else:
+        dlen = 1
+        domain = s[0]
+    #
+    domain = domain.lower()
+    #
+    # Get subdomain if there is one (elements of netloc preceeding base domain)
+    #
+    subdom = ".".join(s[0:slen - dlen])
+    #
+    return domain, subdom, subdir
+#
+# normalize_many (urls) - Normalize each url in the list and return the list of [domain, subdomain, subdir] results, normalizing each
+# distinct url only once.
+#
+def normalize_many (urls):
+    #
+    results = {}
+    for url in urls:
+        if url not in results:
+            results[url] = normalize(url)
+    return [results[url] for url in urls]
@@ -4,9 +4,60 @@
 # "belongto", "vendor", "consumer", "control", and "controlledby" entries.
 #
 # Name - webcrawler.py
-# Synopsis - webcrawler.py [ROOT_URL]
+# Synopsis - webcrawler.py [-c CONCURRENCY] [-i] [-o ORDER] [-r] [-k SECONDS] [-d DNS_CACHE] [-t SECONDS] [-p POOL_SIZE] [-s SHARDS] [-q [-e]] [--race] [-m MAX_SIZE] [--snapstore SNAPSTORE] [--host-policy HOST_POLICY [--breaker FAILURES]] [-l LOG_LEVEL [-z]] [ROOT_URL]
+#            webcrawler.py --coordinator DB [--workers WORKERS] [ROOT_URL]
+#            webcrawler.py --worker DB [--worker-id WORKER_ID] [--lease SECONDS] [-c CONCURRENCY] [-i] [-d DNS_CACHE] [-t SECONDS] [--host-policy HOST_POLICY [--breaker FAILURES]] [-l LOG_LEVEL [-z]]
+#            webcrawler.py --merge DB [-l LOG_LEVEL [-z]]
 #   ROOT_URL - optional, the domain URL (absent "trust.txt") where to begin webcrawl. Default
 #   is "https://www.journallist.net/"
+#   -c CONCURRENCY, --concurrency CONCURRENCY - optional, the number of trust.txt files to fetch at once.
+#   Default is 1, which crawls serially.
+#   -i, --incremental - optional, send conditional GETs (If-None-Match/If-Modified-Since) using the manifest of the most recent
+#   earlier Webcrawl-YYYY-MM-DD directory, and reuse its trust.txt files for those that have not been modified.
+#   -o ORDER, --order ORDER - optional, "dfs" to crawl referenced domains depth first (default), "bfs" breadth first, or "priority" the
+#   root domain's member tree first, then the other symmetric references, then the well-known.dev resource list, and within each the
+#   domains that took longest in the previous crawl first, so the slowest are not left to finish on their own (see frontier.py).
+#   -r, --resume - optional, resume today's crawl from its checkpoint if it was interrupted.
+#   -k SECONDS, --checkpoint SECONDS - optional, how often to checkpoint the crawl (see checkpoint.py). Default is 60, 0 disables it.
+#   -d DNS_CACHE, --dns-cache DNS_CACHE - optional, resolve the domains on the frontier ahead of fetching them (see dnscache.py),
+#   caching the results in the file DNS_CACHE, and write those that do not exist to the -err.csv file without fetching them.
+#   -t SECONDS, --dns-ttl SECONDS - optional, how long to keep results in the DNS cache. Default is 86400 (one day).
+#   -p POOL_SIZE, --pool-size POOL_SIZE - optional, the number of hosts to keep HTTP connections alive to (see httpclient.py). Default is 100.
+#   -s SHARDS, --shards SHARDS - optional, the number of worker processes to crawl the well-known.dev resources.csv list with. Its
+#   domains are partitioned across the processes, each of which crawls its own with CONCURRENCY fetches at once and writes its own
+#   output shard, and the shards are merged into the Webcrawl-YYYY-MM-DD files when they are all done. Default is 1, which crawls it
+#   in this process.
+#   -m MAX_SIZE, --max-size MAX_SIZE - optional, the largest trust.txt file to download, in bytes. Larger files are written to the
+#   -err.csv file without being downloaded, as are responses that are not plaintext. Default is 1048576 (1 MB).
+#   --snapstore SNAPSTORE - optional, at the end of the crawl move the trust.txt files into the content-addressed snapshot store in the
+#   directory SNAPSTORE, leaving the Webcrawl-YYYY-MM-DD-snapshots.json manifest in their place (see snapstore.py). Incremental
+#   crawls read the previous crawl's files back from the store.
+#   --race - optional, fetch "http://domain/trust.txt" and "http://domain/.well-known/trust.txt" at once rather than trying the second
+#   only when the first fails, and use the first of them, in that order, that is plaintext (see racetrust). This bounds the time taken
+#   by a domain to one timeout.
+#   --host-policy HOST_POLICY - optional, rather than waiting 61 seconds to connect and read from every host, set the timeouts of each
+#   from the response times of the host and of the crawl (see hostpolicy.py), and once a host has failed FAILURES times in a row skip
+#   its urls for the rest of the crawl, writing them to the -err.csv file. The state of each host is kept in the file HOST_POLICY, and
+#   hosts that were failing at the end of the previous crawl are first fetched with a short timeout.
+#   --breaker FAILURES - optional, with --host-policy, the consecutive connection errors or timeouts of a host before it is skipped.
+#   Default is 3, 0 never skips a host.
+#   -q, --sqlite - optional, write the rows of the .csv, -err.csv and -redirects.csv files into the trust_txt, http_errors and redirects
+#   tables of the SQLite database Webcrawl-YYYY-MM-DD.db instead, dropping duplicate rows as they are inserted (see sqlsink.py).
+#   -e, --export-csv - optional, with --sqlite, also export the .csv, -err.csv and -redirects.csv files from the database at the end.
+#   -l LOG_LEVEL, --log-level LOG_LEVEL - optional, also write the events of the crawl of LOG_LEVEL ("debug", "info", "warning", or
+#   "error") and above as JSON lines to the Webcrawl-YYYY-MM-DD-events.jsonl structured log (see crawllog.py), e.g., for each domain
+#   its outcome and the time taken, and at "debug" each HTTP GET. Shards and distributed workers write their own, which are merged.
+#   -z, --log-gzip - optional, with --log-level, compress the structured log with gzip, as Webcrawl-YYYY-MM-DD-events.jsonl.gz.
+#
+#   A crawl can also be distributed across several worker processes, on one machine or several, that share a frontier in the SQLite
+#   database DB (see sharedfrontier.py):
+#   --coordinator DB - creates today's Webcrawl-YYYY-MM-DD directory and DB, and queues ROOT_URL and the resources.csv domains on it.
+#   --workers WORKERS - the number of workers, each claims the domains of its own shard first. Default is 1.
+#   --worker DB - crawls the domains claimed from DB as worker WORKER_ID (from 0 to WORKERS-1, default 0) until all have been crawled,
+#   writing its output into the Webcrawl-YYYY-MM-DD/shard-WORKER_ID subdirectory.
+#   --lease SECONDS - how long a claimed domain is leased to a worker before another may claim it, e.g., if the worker was killed.
+#   Default is 600.
+#   --merge DB - once all the workers are done, merges their outputs into the Webcrawl-YYYY-MM-DD files.
 #
 # Summary - This python script has several outputs:
 # 
@@ -28,10 +79,18 @@
 #    - url is the url that generated the error
 #    - error is the error status code or "HTML" if the content is an HTML page or "exception"
 #      if the request throws and exception.
+# 6. It generates a Webcrawl-YYYY-MM-DD-manifest.json file that records the ETag and Last-Modified of each trust.txt file fetched.
+# 7. It generates a Webcrawl-YYYY-MM-DD-visited.csv file that lists each domain visited and the outcome, "success", "failure", or
+#    "redirect", of fetching its trust.txt file, and a Webcrawl-YYYY-MM-DD-timings.csv file with the seconds each domain took.
+# 8. It generates Webcrawl-YYYY-MM-DD-metrics.json and Webcrawl-YYYY-MM-DD-metrics.prom files with the metrics of the crawl (see
+#    metrics.py): HTTP GET latency histogram, bytes, status codes, exceptions, the url form trust.txt files were found at, redirects,
+#    and the slowest domains. The .prom file is in the Prometheus text format, for the node_exporter textfile collector.
+# 9. With --log-level, it generates a Webcrawl-YYYY-MM-DD-events.jsonl structured log of the events of the crawl, which crawllog.py
+#    can query, e.g., "crawllog.py -e domain -o failure -f domain Webcrawl-YYYY-MM-DD/Webcrawl-YYYY-MM-DD-events.jsonl".
 #
 # The webcrawler downloads the trust.txt file for the ROOT_URL, then extracts all "member", 
-# "belongto", "vendor", "consumer", "control", and "controlledby" referenced URLs and recursively
-# downloads and process each.
+# "belongto", "vendor", "consumer", "control", and "controlledby" referenced URLs, queues them on
+# a frontier (see frontier.py), and downloads and processes each in turn.
 # 
 # To insure that source urls and referenced urls in symmetric attributes match it is necessary to normalizes all these URLs to 
 # be of the form http[s]://www.domain.com/, (e.g., all lowercase, with leading "www." and trailing "/"). Referenced urls in asymmetric 
@@ -43,110 +102,80 @@
 #--------------------------------------------------------------------------------------------------
 import sys
 import os
+import io
 import time
+import argparse
+import functools
+import json
+import shutil
+import multiprocessing
 import requests
-from urllib.parse import urlparse
+import httpclient
+import checkpoint
+import snapstore
+import trustparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+from frontier import Frontier, Visited, orders, shardof, ROOT, DISCOVERED
+from sharedfrontier import SharedFrontier
+from sqlsink import Sink
+from metrics import Metrics, readtimes
+from crawllog import EventLog
+from urlnorm import normalize
+from dnscache import Resolver
+from hostpolicy import HostPolicy
 #
 # Skip any well-known resources that begin with any of the following strings
 #
-well_known_skip =[
+well_known_skip = frozenset([
     "api",
     "assets",
     "cdn01",
     "m",
     "posting",
     "storyconsole"
-]
-#
-# Top level country domains
-#
-countrytld = [
-    "ac", "ad", "ae", "af", "ag", "ai", "al", "am", "an", "ao", "aq", "ar", "as", "at", "au", "aw", "ax", "az",
-    "ba", "bb", "bd", "be", "bf", "bg", "bh", "bi", "bj", "bl", "bm", "bn", "bo", "bq", "br", "bs", "bt", "bv", "bw", "by", "bz",
-    "ca", "cc", "cd", "cf", "cg", "ch", "ci", "ck", "cl", "cm", "cn", "co", "cr", "cu", "cv", "cw", "cx", "cy", "cz",
-    "de", "dj", "dk", "dm", "do", "dz",
-    "ec", "ee", "eg", "er", "es", "et", "eu",
-    "fi", "fj", "fk", "fm", "fo", "fr",
-    "ga", "gb", "gd", "ge", "gf", "gg", "gh", "gi", "gl", "gm", "gn", "gp", "gq", "gr", "gs", "gt", "gu", "gw", "gy",
-    "hk", "hm", "hn", "hr", "ht", "hu", 
-    "id", "ie", "il", "im", "in", "io", "iq", "ir", "is", "it",
-    "je", "jm", "jo", "jp",
-    "ke", "kg", "kh", "ki", "km", "kn", "kp", "kr", "kw", "ky", "kz",
-    "la", "lb", "lc", "li", "lk", "lr", "ls", "lt", "lu", "lv", "ly",
-    "ma", "mc", "md", "me", "mf", "mg", "mh", "mk", "ml", "mm", "mn", "mo", "mp", "mq", "mr", "ms", "mt", "mu", "mv", "mw", "mx", "my", "mz",
-    "na", "nc", "ne", "nf", "ng", "ni", "nl", "no", "np", "nr", "nu", "nz",
-    "om",
-    "pa", "pe", "pf", "pg", "ph", "pk", "pl", "pm", "pn", "pr", "ps", "pt", "pw", "py",
-    "qa",
-    "re", "ro", "rs", "ru", "rw",
-    "sa", "sb", "sc", "sd", "se", "sg", "sh", "si", "sj", "sk", "sl", "sm", "sn", "so", "sr", "ss", "st", "su", "sv", "sx", "sy", "sz",
-    "tc", "td", "tf", "tg", "th", "tj", "tk", "tl", "tm", "tn", "to", "tp", "tr", "tt", "tv", "tw","tz",
-    "ua", "ug", "uk", "um", "us", "uy", "uz",
-    "va", "vc", "ve", "vg", "vi", "vn", "vu",
-    "wf", "ws"
-]
-#
-# Because of the vagaries of how urls are used in trust.txt files it is necessary to normalize them so that they can be matched 
-# appropriately in the JournalList ecosystem database.
-# 
-# normalize (url) - Normalize the input url and return base domain (e.g., journallist.net), subdomain (if any), and subdirectory (if any).
+])
 #
-def normalize (url):
-    #
-    # Parse the url
-    #
-    o = urlparse(url)
-    #
-    # If no scheme is provided, then domain is contained in o.path up to a "/" and subdirectory = o.path from "/" to the remainder, otherwise take them from urlparse results
-    #
-    if o.scheme == "":
-        s = o.path.split("/",1)
-        domain = s[0]
-        if (len(s) > 1):
-            subdir = s[1]
-        else:
-            subdir = ""
-    else:
-        subdir = o.path
-        domain = o.netloc
-    #
-    # If subdirectory is just "/" return null
-    #
-    if subdir == "/":
-        subdir = ""
-    #
-    # Get base domain, typically the last two elements of the netloc, unless top level domain is a country code, in which case it is the last three elements of the netloc
-    #
-    s = domain.split(".")
-    slen = len(s)
-    if (s[slen-1] in countrytld) and (slen > 2) and (s[slen-3] != "www"):
-        dlen = 3
-        domain = s[slen - 3] + "." + s[slen - 2] + "." + s[slen - 1]
-    else:
-        if slen > 1:
-            dlen = 2
-            domain = s[slen - 2] + "." + s[slen - 1]
-        else:
-            dlen = 1
-            domain = s[0]   
-    #
-    domain = domain.lower()
-    #
-    # Get subdomain if there is one (elements of netloc preceeding base domain)
+# Largest trust.txt file downloaded, in bytes
+#
+maxbytes = 1048576
+#
+# StreamedResponse(r, text) - Stands in for the streamed response r once its text has been read.
+#
+class StreamedResponse:
     #
-    subdom = ""
-    n = slen - dlen
-    if n > 0:
-        i = 0
-        subdom = s[i]
-        while i < n - 1:
-            i = i + 1
-            subdom = subdom + "." + s[i]
+    def __init__ (self, r, text):
+        self.url = r.url
+        self.text = text
+        self.status_code = r.status_code
+        self.headers = r.headers
+#
+# readbody(r) - Read the body of the streamed response r, returns its text, or None if it is longer than maxbytes, and the number of
+# bytes read.
+#
+def readbody (r):
     #
-    return domain, subdom, subdir
+    length = r.headers.get("Content-Length", "")
+    if length.isdigit() and (int(length) > maxbytes):
+        return None, 0
+    chunks = []
+    size = 0
+    for chunk in r.iter_content(chunk_size=16384):
+        size += len(chunk)
+        if size > maxbytes:
+            return None, size
+        chunks.append(chunk)
+    return b"".join(chunks).decode(r.encoding or "utf-8", errors="replace"), size
+#
+# fetchurl(url, validators) - Fetches the specified url, catches exceptions, and if successful checks if the content is plaintext. 
+# Returns success (True or False), exception (True or False), the request response, and error string. The optional validators are
+# added to the request headers to make it a conditional GET (see fetchcached).
+#
+# The response is streamed, so the status code and content type are checked before the body is downloaded, and if it is not a
+# plaintext file the connection is closed without downloading it. Bodies longer than maxbytes are not downloaded either.
 #
-# fetchurl(url) - Fetches the specified url, catches exceptions, and if successful checks if the content is plaintext. 
-# Returns success (True or False), exception (True or False), the request response, and error string.
+# With --host-policy, the connect and read timeouts are set by the policy of the url's host (see hostpolicy.py), which is told the
+# outcome, and if the host's circuit breaker is open the url is not fetched and an exception is returned.
 # 
 # Valid success & exception states (cannot have both success = True and exception = True):
 #
@@ -154,11 +183,13 @@ def normalize (url):
 #    success = True,  exception = False - trust.txt file found
 #    success = False, exception = True  - connection error occured trying to connect to site
 #
-def fetchurl(url):
+def fetchurl(url, validators=None):
     #
     # Set User Agent to "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:93.0) Gecko/20100101 Firefox/93.0" to avoid 403 errors on some websites.
     #
     headers = {'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:93.0) Gecko/20100101 Firefox/93.0'}
+    if validators:
+        headers.update(validators)
     #
     # Set User Agent to "Mozilla/5.0 (compatible; JournalListBot/0.1; +https://journallist.net/JournalListBot.html)" to avoid 403 errors on some websites.
     #
@@ -170,24 +201,67 @@ def fetchurl(url):
     success = True
     exception = False
     error = ""
+    start = time.time()
+    #
+    # Take the timeouts from the host policy, if enabled, and skip the host if its circuit breaker is open
+    #
+    host = urlsplit(url).hostname or ""
+    timeout = 61
+    if policy is not None:
+        allowed, timeout = policy.timeout(host)
+        if not allowed:
+            error = "HTTP GET skipped, circuit breaker open: " + host + " failed " + str(policy.threshold) + " times"
+            events.event("debug", "fetch", url=url, status=0, seconds=0.0, success=False, error=error)
+            return False, True, "", error
+    reached = None
+    connected = 0.0
+    response = None
     try:
-        r = requests.get(url, timeout=61, verify=False, headers=headers)
+        r = httpclient.get(url, timeout=timeout, verify=False, headers=headers, stream=True)
+        response = r
+        connected = time.time() - start
+        #
+        # Read the body if the content is plaintext
+        #
+        text = None
+        size = 0
+        if (r.status_code == 200) and ("text/plain" in r.headers.get("Content-Type", "")):
+            text, size = readbody(r)
     except requests.exceptions.TooManyRedirects as Argument:
         error = "HTTP GET too many redirects exception occurred: " + str(Argument)
+        metrics.fetch(time.time() - start, exception=type(Argument).__name__)
         r = "" 
         success = False
         exception = True
     except requests.exceptions.Timeout as Argument:
         error = "HTTP GET time out exception occurred: " + str(Argument)
+        metrics.fetch(time.time() - start, exception=type(Argument).__name__)
         r = ""
         success = False
         exception = True
+        reached = False
     except requests.exceptions.ConnectionError as Argument:
         error = "HTTP GET connection error exception occurred: " + str(Argument)
+        metrics.fetch(time.time() - start, exception=type(Argument).__name__)
         r = ""
         success = False
         exception = True
+        reached = False
+    except requests.exceptions.RequestException as Argument:
+        #
+        # Any other error, e.g., a ChunkedEncodingError or ContentDecodingError while reading the body
+        #
+        error = "HTTP GET exception occurred: " + str(Argument)
+        metrics.fetch(time.time() - start, exception=type(Argument).__name__)
+        r = ""
+        success = False
+        exception = True
+        reached = False
     else:
+        reached = True
+        metrics.fetch(time.time() - start, r.status_code, size)
+        if text is not None:
+            r = StreamedResponse(r, text)
         if r.status_code != 200:
             error = "HTTP Status Code: " + str(r.status_code)
             success = False
@@ -204,8 +278,177 @@ def fetchurl(url):
                     error = "Content type: " + r.headers['Content-Type']
                 except:
                     error = "Invalid content type"
+            elif text is None:
+                error = "Content too large: more than " + str(maxbytes) + " bytes"
+                success = False
+    finally:
+        #
+        # Close the connection, whether or not the body was read
+        #
+        if response is not None:
+            response.close()
+    #
+    # Record the outcome with the host policy, a response of any status code is a success, and log if it opened the circuit breaker
     #
-    # Return results
+    if (policy is not None) and (reached is not None):
+        if policy.record(host, reached, connected, time.time() - start - connected):
+            events.event("warning", "breaker", host=host, failures=policy.threshold, error=error)
+    #
+    # Log the fetch and return results
+    #
+    events.event("debug", "fetch", url=url, status=(0 if exception else r.status_code), seconds=round(time.time() - start, 3),
+                 success=success, error=error)
+    return success, exception, r, error
+#
+# Incremental crawl state. The manifest records, for each trust.txt url fetched successfully, its ETag and Last-Modified validators,
+# the url it was finally fetched from, its content type and the file it was written to. It is written to the Webcrawl-YYYY-MM-DD-manifest.json
+# file. When crawling incrementally, previous holds the manifest of the most recent earlier crawl in the prevdir directory.
+#
+manifest = {}
+previous = {}
+prevdir = ""
+#
+# The snapshot store the trust.txt files are moved to at the end of the crawl, None if disabled, and the snapshots manifest of prevdir
+# (see snapstore.py).
+#
+store = None
+prevsnapshots = {}
+#
+# The index of domains visited by this crawl and the outcome of fetching each (see frontier.py).
+#
+visited = Visited()
+#
+# The seconds each domain took in the previous crawl, for the "priority" frontier order to start the slowest first (see frontier.py).
+#
+expected = {}
+#
+# The DNS resolver used to skip domains that do not exist, None if disabled (see dnscache.py).
+#
+resolver = None
+#
+# The adaptive timeouts and circuit breaker of each host fetched from, None if disabled and every fetch has a 61 second timeout (see
+# hostpolicy.py).
+#
+policy = None
+#
+# Whether to race the trust.txt urls of each domain (see racetrust).
+#
+racing = False
+#
+# The metrics of this crawl (see metrics.py).
+#
+metrics = Metrics()
+#
+# The structured log of the events of this crawl, disabled unless --log-level is given (see crawllog.py).
+#
+events = EventLog()
+#
+# CachedResponse(url, text, content_type) - Stands in for the response of a fetch that was not modified since the previous crawl, with
+# the text of the previous crawl's trust.txt file.
+#
+class CachedResponse:
+    #
+    def __init__ (self, url, text, content_type):
+        self.url = url
+        self.text = text
+        self.status_code = 200
+        self.headers = {"Content-Type": content_type}
+#
+# findprevious(dirname) - Return the most recent Webcrawl-YYYY-MM-DD directory, other than dirname, that contains a manifest, or "" if
+# there isn't one.
+#
+def findprevious (dirname):
+    #
+    for name in sorted(os.listdir("."), reverse=True):
+        if name.startswith("Webcrawl-") and (name != dirname) and os.path.isfile(name + "/" + name + "-manifest.json"):
+            return name
+    return ""
+#
+# readmanifest(dirname) - Read the manifest of the given Webcrawl-YYYY-MM-DD directory.
+#
+def readmanifest (dirname):
+    file = open(dirname + "/" + dirname + "-manifest.json","r")
+    entries = json.load(file)
+    file.close()
+    return entries
+#
+# writemanifest(dirname) - Write the manifest of this crawl into the given Webcrawl-YYYY-MM-DD directory.
+#
+def writemanifest (dirname):
+    file = open(dirname + "/" + dirname + "-manifest.json","w")
+    json.dump(manifest, file, indent=1, sort_keys=True)
+    file.close()
+#
+# readprevious(filename) - Return the text of the previous crawl's trust.txt file, from the prevdir directory or if it has been moved
+# to the snapshot store from there, or None if it is in neither.
+#
+def readprevious (filename):
+    #
+    if os.path.isfile(prevdir + "/" + filename):
+        file = open(prevdir + "/" + filename,"r")
+        text = file.read()
+        file.close()
+        return text
+    digest = prevsnapshots.get(filename[4:-10])
+    if (store is not None) and (digest is not None) and (digest in store):
+        return store.get(digest).decode()
+    return None
+#
+# hasprevious(filename) - Return True if readprevious can return the text of the previous crawl's trust.txt file.
+#
+def hasprevious (filename):
+    #
+    if os.path.isfile(prevdir + "/" + filename):
+        return True
+    digest = prevsnapshots.get(filename[4:-10])
+    return (store is not None) and (digest is not None) and (digest in store)
+#
+# fetchcached(url, filename, logfile) - Fetch the url with fetchurl. If the url was fetched by the previous crawl and its trust.txt
+# file can still be read, e.g., it was not moved to a snapshot store this crawl does not use, send its validators with If-None-Match and
+# If-Modified-Since, and if the server replies 304 Not Modified reuse the previous crawl's trust.txt file. If it cannot be read after
+# all, fetch the url again without the validators. Record the validators of each successful fetch in the manifest, or if given in the
+# entries dictionary instead, e.g., to only add them to the manifest if the fetch is the one kept (see racetrust). Returns the same
+# results as fetchurl.
+#
+def fetchcached (url, filename, logfile, entries=None):
+    #
+    entry = previous.get(url)
+    if (entry is not None) and not hasprevious(entry["file"]):
+        entry = None
+    validators = {}
+    if entry is not None:
+        if entry["etag"] != "":
+            validators["If-None-Match"] = entry["etag"]
+        if entry["last_modified"] != "":
+            validators["If-Modified-Since"] = entry["last_modified"]
+    #
+    if entries is None:
+        entries = manifest
+    success, exception, r, error = fetchurl (url, validators)
+    #
+    text = None
+    if (not exception) and (r.status_code == 304) and (entry is not None):
+        text = readprevious(entry["file"])
+        if text is None:
+            logfile.write (url + " not modified, but " + prevdir + "/" + entry["file"] + " is missing, fetching again\n")
+            success, exception, r, error = fetchurl (url)
+    if text is not None:
+        #
+        # Not modified, reuse the previous trust.txt file
+        #
+        logfile.write (url + " not modified, reusing: " + prevdir + "/" + entry["file"] + "\n")
+        r = CachedResponse(entry["url"], text, entry["content_type"])
+        success = True
+        error = ""
+        entries[url] = dict(entry, file=filename)
+    elif success and (("ETag" in r.headers) or ("Last-Modified" in r.headers)):
+        entries[url] = {
+            "etag": r.headers.get("ETag", ""),
+            "last_modified": r.headers.get("Last-Modified", ""),
+            "url": r.url,
+            "content_type": r.headers["Content-Type"],
+            "file": filename
+        }
     #
     return success, exception, r, error
 #
@@ -214,6 +457,7 @@ def fetchurl(url):
 #
 def write_error (srcurl, attr, refurl, error, errfile):
     errfile.write (srcurl + "," + attr + "," + refurl + "," + error + "\n")
+    events.event("warning", "error", src=srcurl, attr=attr, url=refurl, error=error)
 #
 # write_csv (srcurl, attr, refurl, csvfile) - Write the entry into the .csv file csvfile for the specified srcpath, attr, and refpath.
 #
@@ -226,15 +470,47 @@ def write_csv (srcurl, attr, refurl, csvfile):
 def write_csv_asym (srcurl, attr, refurl, csvfile):
     csvfile.write (srcurl + "," + attr + "," + refurl + "\n")
 #
+# racetrust (refdomain, filename, logfile) - Fetch "http://refdomain/trust.txt" and "http://refdomain/.well-known/trust.txt" at once
+# with fetchcached, and choose the first in that order that is plaintext. If neither is, choose the one fetchtrust would have without
+# racing, "/.well-known" only if "/trust.txt" raised an exception or was not found. Each fetch is logged, in that order, followed
+# by the choice. Only the manifest entry of the url chosen is recorded, as both were written to the same file. Returns the url chosen
+# and the fetchcached results for it.
+#
+def racetrust (refdomain, filename, logfile):
+    #
+    urls = ["http://" + refdomain + "/trust.txt", "http://" + refdomain + "/.well-known/trust.txt"]
+    logs = [io.StringIO() for url in urls]
+    entries = [{} for url in urls]
+    calls = [functools.partial(fetchcached, url, filename, log, entry) for url, log, entry in zip(urls, logs, entries)]
+    chosen, results = httpclient.race(calls, lambda result: result[0])
+    if chosen < 0:
+        exception, r = results[0][1], results[0][2]
+        if exception or r.status_code == 404:
+            chosen = 1
+        else:
+            chosen = 0
+    #
+    for url, log, result in zip(urls, logs, results):
+        if result is not None:
+            logfile.write("Trying: " + url + "\n")
+            logfile.write(log.getvalue())
+    logfile.write("Chose: " + urls[chosen] + "\n")
+    manifest.update(entries[chosen])
+    return urls[chosen], results[chosen]
+#
 # fetchtrust (srcdomain,attr,refdomain,dirname,filename,csvfile,logfile,errfile) - Fetch a trust.txt file and catch exceptions. If there are no exceptions
 # write the contents to the specified directory and filename. Check if the content is plaintext and return success=True. Otherwise, write
-# a blank line to the specified directory and filename and return success=False.
+# to the error file and return success=False. Also returns the response, the outcome to record in the visited index, and the domain the
+# fetch redirected to, or "" if it did not redirect to another domain. Runs on the fetching threads, so it does not check whether that
+# domain was already visited, crawl() does once the fetch has completed.
 #
 def fetchtrust (srcdomain, attr, refdomain, dirname, filename, redirfile, logfile, errfile):
     #
     # Set list of domain registrars to check for expired domains.
     #
     registrars = "www.hugedomains.com,www.domain.com,www.godaddy.com,www.namecheap.com,www.name.com,www.enom.com,www.dynadot.com,www.namesilo.com,www.123-reg.co.uk,www.bluehost.com"
+    outcome = ""
+    redirect = ""
     #
     # Set source and referenced urls.
     #
@@ -245,21 +521,32 @@ def fetchtrust (srcdomain, attr, refdomain, dirname, filename, redirfile, logfil
     #
     logfile.write("Fetching: " + refurl + " referenced from " + srcurl + " with attribute \"" + attr + "\"\n")
     #
-    # Try using "http"
-    #
-    refurl = "http://" + refdomain + "/trust.txt"
-    logfile.write("Trying: " + refurl + "\n")
+    # Try using "http", or race it against "/.well-known" if racing
     #
-    success, exception, r, error = fetchurl (refurl)
-    if exception or r.status_code == 404:
+    if racing:
+        refurl, results = racetrust (refdomain, filename, logfile)
+        success, exception, r, error = results
+    else:
+        refurl = "http://" + refdomain + "/trust.txt"
+        logfile.write("Trying: " + refurl + "\n")
+        #
+        success, exception, r, error = fetchcached (refurl, filename, logfile)
+    if (not racing) and (exception or r.status_code == 404):
         #
         # Try using "http" and adding "/.well-known"
         #
         refurl = "http://" + refdomain + "/.well-known/trust.txt"
         logfile.write("Trying: " + refurl + "\n")
-        success, exception, r, error = fetchurl (refurl)
+        success, exception, r, error = fetchcached (refurl, filename, logfile)
+    #
+    # Fall through to here after trying different url forms, record which one the trust.txt file was found at
     #
-    # Fall through to here after trying different url forms
+    if not success:
+        metrics.path("none")
+    elif refurl.endswith("/.well-known/trust.txt"):
+        metrics.path(".well-known/trust.txt")
+    else:
+        metrics.path("trust.txt")
     #
     if success:
         #
@@ -306,208 +593,558 @@ def fetchtrust (srcdomain, attr, refdomain, dirname, filename, redirfile, logfil
             #
             logfile.write (refurl + " redirects to " + r.url + "\n")
             redirfile.write (refurl + "," + r.url + "\n")
+            metrics.redirect()
+            events.event("info", "redirect", url=refurl, to=r.url)
             #
             # Check if redirect domain is a domain registrar, set success to False and set error message.
             #
             if (domain2 in registrars):
                 success = False
                 error = "HTTP GET domain registration expired redirects to " + r.url
-            #
-            # Check if the fetch redirects to an existing file, if so log it has already been fetched and set success to False so that contents are not processed again.
-            #
-            rfilename = "www." + domain2 + "-trust.txt"
-            if os.path.isfile(dirname + "/" + rfilename):
-                #
-                # Log url as previously fetched
-                #
-                logfile.write (r.url + " previously fetched\n")
-                success = False
+            elif success:
+                outcome = "redirect"
+            redirect = domain2
     else:
         #
-        # Write a blank trust.txt file, log it, and write to error file.
+        # Log the error, and write to error file.
         #
         write_error (srcurl, attr, refurl, error.replace(",",""), errfile)
         logfile.write ("HTTP GET error: " + error + "\n")
-        logfile.write ("Writing blank trust.txt file: " + dirname + "/" + filename + "\n")
-        trustfile = open(dirname + "/" + filename,"w")
-        trustfile.write("\n")
-        trustfile.close()
     #
-    return success, r
+    if (outcome == "") and success:
+        outcome = "success"
+    elif (outcome == ""):
+        outcome = "failure"
+    #
+    return success, r, outcome, redirect
 #
-# process(srcdomain, attribute, refdomain, dirname, csvfile, logfile, errfile) - Process the given refdomain by retrieving the trust.txt 
-# file from the given redomain, write it to the given directory & filename, output the tuple [srcurl,attr,refurl] to the given csvfile, 
-# log process to the given logfile, and errors to the given errfile.
+# fetchdomain (srcdomain,attr,refdomain,dirname,filename,redirfile,logfile,errfile) - If the DNS resolver is enabled, check the refdomain
+# exists before fetching its trust.txt file with fetchtrust. If it does not exist, write to the error file and skip the HTTP GET. Returns
+# the same results as fetchtrust.
 #
-def process (srcdomain, attribute, refdomain, dirname, csvfile, redirfile, logfile, errfile):
-    #
-    # Specify symmetric and asymmetric attributes
-    #
-    symattr = "member,belongto,control,controlledby,vendor,customer"
-    asymattr = "social,contact,disclosure,datatrainingallowed"
-    #
+def fetchdomain (srcdomain, attr, refdomain, dirname, filename, redirfile, logfile, errfile):
     #
-    # Set srcurl and refurl to standard format (https://www.domain/, e.g., https://www.journallist.net/)
+    start = time.time()
+    if resolver is not None:
+        found, error = resolver.lookup(refdomain)
+        if not found:
+            srcurl = "https://www." + srcdomain + "/trust.txt"
+            refurl = "http://" + refdomain + "/trust.txt"
+            logfile.write("Fetching: https://www." + refdomain + "/trust.txt referenced from " + srcurl + " with attribute \"" + attr + "\"\n")
+            write_error (srcurl, attr, refurl, error.replace(",",""), errfile)
+            logfile.write ("DNS error: " + error + "\n")
+            metrics.domain(refdomain, time.time() - start, nxdomain=True)
+            events.event("info", "domain", domain=refdomain, src=srcdomain, attr=attr, outcome="nxdomain", url="",
+                         seconds=round(time.time() - start, 3))
+            return False, "", "failure", ""
     #
-    srcurl = "https://www." + srcdomain + "/"
-    refurl = "https://www." + refdomain + "/"
-    # print ("srcdomain = ", srcdomain, "attribute = ", attribute, "refdomain = ", refdomain)
+    results = fetchtrust (srcdomain, attr, refdomain, dirname, filename, redirfile, logfile, errfile)
+    metrics.domain(refdomain, time.time() - start)
+    events.event("info", "domain", domain=refdomain, src=srcdomain, attr=attr, outcome=results[2],
+                 url=(results[1].url if results[1] != "" else ""), seconds=round(time.time() - start, 3))
+    return results
+#
+# checkref (srcdomain, attribute, refdomain, logfile) - Return True if the refdomain should be processed, i.e., the attribute is "self" or
+# a symmetric attribute, the srcdomain is not the same as the refdomain and the refdomain is not "". Otherwise log why it is skipped.
+#
+def checkref (srcdomain, attribute, refdomain, logfile):
     #
-    # Only process the refdomain if the attribute is a symmetric attribute and the srcdomain is not the same as the refdomain and the refdomain is not ""
+    if (attribute == "self") or ((attribute in trustparse.symattr) and (srcdomain != refdomain) and (refdomain != "")):
+        return True
     #
-    if (attribute == "self") or ((attribute in symattr) and (srcdomain != refdomain) and (refdomain != "")):
+    if (refdomain == ""):
         #
-        # Set filename to standard format (www.domain-trust.txt, e.g., www.journallist.net-trust.txt)
+        # Log invalid referenced url
         #
-        filename = "www." + refdomain + "-trust.txt"
-        #
-        # Set attribute count to zero
-        #
-        attrcount = 0
+        logfile.write("Invalid url referenced by: " + "https://www." + srcdomain + "/" + " with attribute " + attribute + "=\n")
+        events.event("debug", "skip", src=srcdomain, attr=attribute, domain=refdomain, reason="invalid url")
+    else:
         #
-        # Log beginning of processing the url
+        # Log self referential symmetric attributes
         #
-        logfile.write ("BEGIN: " + refurl + "trust.txt\n")
+        logfile.write("Self referential symmetric attribute: " + attribute + "\n")
+        events.event("debug", "skip", src=srcdomain, attr=attribute, domain=refdomain, reason="self referential")
+    #
+    return False
+#
+# parsetrust (refdomain, data, csvfile, logfile, errfile) - Parse the contents data of the trust.txt file fetched from refdomain, e.g.,
+# read from the file it was written to, with trustparse.parse, output the tuple [srcurl,attr,refurl] for each attribute to the
+# given csvfile, and errors to the given errfile. Returns the number of attributes found and the list of [attr, domain] symmetric
+# references to be processed next.
+#
+def parsetrust (refdomain, data, csvfile, logfile, errfile):
+    #
+    refurl = "https://www." + refdomain + "/"
+    attrcount = 0
+    refs = []
+    url = ""
+    #
+    # Process each "attribute=url" entry, lines are cleaned up, and comments, empty lines and null references, e.g. "control=", skipped
+    # by the parser.
+    #
+    for linenum, attr, value, kind in trustparse.parse(data):
         #
-        # If the specified file doesn't already exist, fetch the url/trust.txt file and parse the contents.
+        # If a symmetric attribute then normalize the referenced url, otherwise the reference url should remain unmodified.
         #
-        if not os.path.isfile(dirname + "/" + filename):
+        if kind == trustparse.SYMMETRIC:
+            attrcount += 1
             #
-            # Fetch the trust.txt file.
+            # Normalize the referenced url
             #
-            success, r = fetchtrust (srcdomain, attribute, refdomain, dirname, filename, redirfile, logfile, errfile)
+            domain, subdomain, subdir = normalize(value)
             #
-            if (success):
+            # If the domain is empty then referenced url is not a valid url, skip this attribute
+            #
+            if (domain != ""):
                 #
-                # If fetch was successful, process each line in the response.
+                # If subdomain is empty, begin url with "www", if subdomain begins with "www" then use subdomain, else use subdomain
                 #
-                lines = r.text.splitlines()
-                linenum = 0
-                for line in lines:
-                    linenum += 1
-                    #
-                    # Remove leading and trailing white space, and remove any non-ASCII chacters (using encode to create bytes object and decode to
-                    # convert bytes object back to str), remove any null characters "\00", or tab "\t", or spaces.
-                    #
-                    bytesline = line.strip().encode("ascii","ignore")
-                    tmp1line = bytesline.decode("ascii","ignore")
-                    tmpline = tmp1line.replace("\00","")
-                    tmpline1 = tmpline.replace("\t","")
-                    tmpline = tmpline1.replace(" ","")
-                    #
-                    # Skip this line if it is a comment line (begins with "#") or is an empty line
-                    #
-                    if tmpline.startswith("#") or tmpline == "":
-                        continue
-                    #
-                    # Get attribute and referenced url. Ignore attributes with null references, e.g. "control="
-                    #
-                    attr = tmpline.split("=",2)
-                    if (len(attr) == 2) and (attr[1] != ""):
-                        #
-                        # If a symmetric attribute then normalize the referenced url, otherwise the reference url should remain unmodified.
-                        #
-                        if (attr[0] in symattr):
-                            attrcount += 1
-                            #
-                            # Normalize the referenced url
-                            #
-                            domain, subdomain, subdir = normalize(attr[1])
-                            # print ("url = ", attr[1], "domain = ", domain, "subdomain = ", subdomain, "subdir = ", subdir, "refdomain = ", refdomain)
-                            #
-                            # If the domain is empty then referenced url is not a valid url, skip this attribute
-                            #
-                            if (domain != ""):
-                                #
-                                # If subdomain is empty, begin url with "www", if subdomain begins with "www" then use subdomain, else use subdomain
-                                #
-                                if subdomain == "":
-                                    url = "https://www"
-                                elif subdomain.startswith("www"):
-                                    url = "https://" + subdomain
-                                else:
-                                    url = "https://" + subdomain
-                                #
-                                # Add domain to url
-                                #
-                                url = url + "." + domain
-                                #
-                                # Add subdirectory if not empty
-                                #
-                                if subdir != "":
-                                    if subdir.startswith("/"):
-                                        url = url + subdir
-                                    else:
-                                        url = url + "/" + subdir
-                                #
-                                # Add trailing "/" if not present
-                                #
-                                if not url.endswith("/"):
-                                    url = url + "/"
-                                #
-                                # Write the tuple [srcrul, attribute, refurl] in standard format to the .csv file
-                                #
-                                write_csv (refurl, attr[0], url , csvfile)
-                            else:
-                                #
-                                # If domain is "", then write invalid url error
-                                #
-                                write_error (refurl, attr[0], url, "Invalid url" + attr[1] + "at line " + str(linenum), errfile)
-                                #
-                        elif (attr[0] in asymattr):
-                            attrcount += 1
-                            #
-                            # Write the tuple [srcrul, attribute, refurl] in standard format to the .csv file
-                            #
-                            url = attr[1]
-                            write_csv_asym (refurl, attr[0], url, csvfile)
-                        else:
-                            #
-                            # Write invalid attribute error to log and error files
-                            #
-                            write_error (refurl, attr[0], url, "Invalid attribute" + attr[0] + "at line " + str(linenum), errfile)
-                            logfile.write ("Invalid attribute" + attr[0] + "at line " + str(linenum) + "\n")
-                        #
-                        # If attribute is a symmetric one and the domain is not "", process the referenced domain
-                        #
-                        if attr[0] in symattr:
-                            #
-                            # Recursively process the referenced domain, remember refdomain is now the srcdomain
-                            #
-                            process (refdomain, attr[0], domain, dirname, csvfile, redirfile, logfile, errfile)
+                if subdomain == "":
+                    url = "https://www"
+                elif subdomain.startswith("www"):
+                    url = "https://" + subdomain
+                else:
+                    url = "https://" + subdomain
+                #
+                # Add domain to url
+                #
+                url = url + "." + domain
+                #
+                # Add subdirectory if not empty
+                #
+                if subdir != "":
+                    if subdir.startswith("/"):
+                        url = url + subdir
+                    else:
+                        url = url + "/" + subdir
+                #
+                # Add trailing "/" if not present
+                #
+                if not url.endswith("/"):
+                    url = url + "/"
+                #
+                # Write the tuple [srcrul, attribute, refurl] in standard format to the .csv file
+                #
+                write_csv (refurl, attr, url , csvfile)
             else:
-                # Set attrcount to -1 (not zero), prevents no attributes error from also being logged
                 #
-                attrcount = -1        
+                # If domain is "", then write invalid url error
+                #
+                write_error (refurl, attr, url, "Invalid url" + value + "at line " + str(linenum), errfile)
             #
-            # If no attributes were found, log a no attributes error
+            # Remember the referenced domain, remember refdomain is then the srcdomain
             #
-            if (attrcount == 0):
-                write_error (srcurl, attribute, refurl, refurl + "trust.txt no attributes found", errfile)
-                logfile.write("No attributes found in: " + refurl + "\n")
+            refs.append([attr, domain])
             #
-            # Log completion of processing the url and number of attributes found
+        elif kind == trustparse.ASYMMETRIC:
+            attrcount += 1
             #
-            logfile.write ("END: " + refurl + "trust.txt, number of attributes found = " + str(attrcount) + "\n")
+            # Write the tuple [srcrul, attribute, refurl] in standard format to the .csv file
+            #
+            url = value
+            write_csv_asym (refurl, attr, url, csvfile)
         else:
             #
-            # Log url as previously fetched
+            # Write invalid attribute error to log and error files
+            #
+            write_error (refurl, attr, url, "Invalid attribute" + attr + "at line " + str(linenum), errfile)
+            logfile.write ("Invalid attribute" + attr + "at line " + str(linenum) + "\n")
+    #
+    return attrcount, refs
+#
+# endtrust (srcdomain, attribute, refdomain, attrcount, logfile, errfile) - Log the completion of processing the refdomain and the number
+# of attributes found, writing a no attributes error if none were found.
+#
+def endtrust (srcdomain, attribute, refdomain, attrcount, logfile, errfile):
+    #
+    srcurl = "https://www." + srcdomain + "/"
+    refurl = "https://www." + refdomain + "/"
+    #
+    # If no attributes were found, log a no attributes error
+    #
+    if (attrcount == 0):
+        write_error (srcurl, attribute, refurl, refurl + "trust.txt no attributes found", errfile)
+        logfile.write("No attributes found in: " + refurl + "\n")
+    #
+    # Log completion of processing the url and number of attributes found
+    #
+    logfile.write ("END: " + refurl + "trust.txt, number of attributes found = " + str(attrcount) + "\n")
+    if attrcount >= 0:
+        events.event("info", "parsed", domain=refdomain, attrs=attrcount)
+#
+# crawl(seeds, frontier, dirname, csvfile, redirfile, logfile, errfile, concurrency, checkpoint) - Process each [srcdomain, attribute, refdomain] seed
+# and every domain referenced from it. Each refdomain is retrieved from the given frontier, its trust.txt file is fetched and written
+# to the given directory, the tuple [srcurl,attr,refurl] for each attribute is output to the given csvfile, the process is logged to
+# the given logfile, and errors to the given errfile. The symmetric references found are queued on the frontier to be processed next.
+#
+# Up to concurrency fetches are run at once on a pool of worker threads. Only the fetch runs in the worker threads. Each fetch logs into
+# its own buffers which are copied to the log, redirect and error files by the calling thread when the fetch completes, so the entries
+# for one domain are never interleaved with those of another. Parsing the response and writing the .csv file also happen in the calling
+# thread.
+#
+# If given, checkpoint is called with the list of [srcdomain, attribute, refdomain] tasks still being fetched each time fetches complete.
+# It returns True if a checkpoint is due but was not written because fetches are still pending, no more are then started until they have
+# completed and it is called again, so that a checkpoint does not include the files and metrics of fetches that are repeated on resume.
+# The seeds are queued with the given priority class, e.g., ROOT or DISCOVERED, or if None the one they are classified in (see frontier.py).
+#
+def crawl (seeds, frontier, dirname, csvfile, redirfile, logfile, errfile, concurrency, checkpoint=None, priority=None):
+    #
+    pending = {}
+    waiting = False
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    #
+    # schedule(srcdomain, refs, priority) - Queue the [attribute, refdomain] references found in the srcdomain trust.txt file on the
+    # frontier with the given priority class, unless they are not to be processed or were already queued.
+    #
+    def schedule (srcdomain, refs, priority=None):
+        #
+        tasks = []
+        queued = set()
+        for attribute, refdomain in refs:
+            if not checkref (srcdomain, attribute, refdomain, logfile):
+                continue
+            #
+            # Skip the refdomain if it is already in the visited index
+            #
+            if frontier.seen(refdomain) or (refdomain in queued):
+                #
+                # Log url as previously fetched
+                #
+                logfile.write ("BEGIN: https://www." + refdomain + "/trust.txt\n")
+                logfile.write ("END: https://www." + refdomain + "/trust.txt previously fetched\n")
+                continue
+            queued.add(refdomain)
+            tasks.append([srcdomain, attribute, refdomain])
+        #
+        frontier.extend(tasks, priority)
+        #
+        # Start resolving the queued domains
+        #
+        if resolver is not None:
+            resolver.prefetch([task[2] for task in tasks])
+    #
+    # dispatch() - Start fetching tasks from the frontier until concurrency fetches are pending.
+    #
+    def dispatch ():
+        #
+        while (len(pending) < concurrency) and (len(frontier) > 0):
+            srcdomain, attribute, refdomain = frontier.pop()
+            filename = "www." + refdomain + "-trust.txt"
+            buffers = (io.StringIO(), io.StringIO(), io.StringIO())
+            future = executor.submit(fetchdomain, srcdomain, attribute, refdomain, dirname, filename, buffers[0], buffers[1], buffers[2])
+            pending[future] = (srcdomain, attribute, refdomain, buffers)
+    #
+    if resolver is not None:
+        resolver.prefetch([task[2] for task in frontier.dump()])
+    for srcdomain, attribute, refdomain in seeds:
+        schedule (srcdomain, [[attribute, refdomain]], priority)
+    dispatch ()
+    #
+    # Process each fetch as it completes, queuing the domains it references.
+    #
+    while pending:
+        done, notdone = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            srcdomain, attribute, refdomain, buffers = pending.pop(future)
+            success, r, outcome, redirect = future.result()
+            #
+            # Log beginning of processing the url, followed by the fetch
             #
-            logfile.write ("END: " + refurl + "trust.txt previously fetched\n")
+            logfile.write ("BEGIN: https://www." + refdomain + "/trust.txt\n")
+            redirfile.write (buffers[0].getvalue())
+            logfile.write (buffers[1].getvalue())
+            errfile.write (buffers[2].getvalue())
             #
-    else:
-        if (refdomain == ""):
+            # Check if the fetch redirects to a domain already visited, if so log it has already been fetched and set success to False so
+            # that contents are not processed again. This is done here rather than on the fetching thread, as the visited index of a
+            # shared frontier can only be queried from the thread that opened it.
             #
-            # Log invalid referenced url
+            if (redirect != "") and (redirect in frontier.visited):
+                #
+                # Log url as previously fetched
+                #
+                logfile.write (r.url + " previously fetched\n")
+                success = False
             #
-            logfile.write("Invalid url referenced by: " + srcurl + " with attribute " + attribute + "=\n")
-        else:
+            if (success):
+                #
+                # Parse the trust.txt file from the file it was written to
+                #
+                trustfile = open(dirname + "/www." + refdomain + "-trust.txt","rb")
+                attrcount, refs = parsetrust (refdomain, trustfile.read(), csvfile, logfile, errfile)
+                trustfile.close()
+            else:
+                #
+                # Set attrcount to -1 (not zero), prevents no attributes error from also being logged
+                #
+                attrcount = -1
+                refs = []
+            #
+            endtrust (srcdomain, attribute, refdomain, attrcount, logfile, errfile)
+            #
+            # Record the outcome once everything for the refdomain has been written
             #
-            # Log self referential symmetric attributes
+            frontier.visited.mark(refdomain, outcome)
             #
-            logfile.write("Self referential symmetric attribute: " + attribute + "\n")
+            # Queue the referenced domains, remember refdomain is now the srcdomain
+            #
+            schedule (refdomain, refs)
+        #
+        # Give the caller the chance to checkpoint the crawl, waiting for the pending fetches to complete if it is due
+        #
+        if checkpoint is not None:
+            waiting = checkpoint ([pending[future][0:3] for future in pending])
+        if not waiting:
+            dispatch ()
+    #
+    executor.shutdown()
+#
+# readresources(resname) - Read the well-known.dev resource list one line at a time and yield the normalized domain of each entry,
+# skipping those whose subdomain is in well_known_skip. Each entry is a tuple of [rank, domain, resource, status, scan_dt, simhash].
+#
+def readresources (resname):
+    #
+    resfile = open(resname,"r")
+    for line in resfile:
+        tuple = line.split(",",5)
+        if (len(tuple) < 2) or (tuple[0] == "rank"):
+            continue
+        domain, subdomain, subdir = normalize(tuple[1])
+        #
+        # Check if subdomain matches one of the subdomains that shoud be skipped
+        #
+        if subdomain in well_known_skip:
+            continue
+        if (subdomain != ""):
+            domain = subdomain + "." + domain
+        yield domain
+    resfile.close()
+#
+# openevents(filename, mode) - Return the structured log filename opened in the given mode with the --log-level and --log-gzip options,
+# or a disabled one if --log-level was not given.
+#
+def openevents (filename, mode):
+    if args.log_level == "":
+        return EventLog()
+    return EventLog(filename, args.log_level, args.log_gzip, mode)
+#
+# Names of the .csv and log files written by each shard process, in the same order as the Webcrawl-YYYY-MM-DD files they are merged into
+#
+shardnames = ["shard.csv", "shard-redirects.csv", "shard-log.txt", "shard-err.csv"]
+#
+# shardpath(dirname, shard) - Return the subdirectory of dirname the given shard writes its output to.
+#
+def shardpath (dirname, shard):
+    return dirname + "/shard-" + str(shard)
+#
+# crawlshard(shard, seeds, dirname, concurrency, order, dnsname, dnsttl) - Run in a worker process forked after the root url has been
+# crawled, so it starts with its visited index, manifest, incremental state, and host policy. Crawls the seeds of the shard, writing its
+# trust.txt files and its .csv, log, visited, manifest, timings, DNS cache and host policy files into the shard's subdirectory of dirname for
+# mergeshards() to collect.
+#
+def crawlshard (shard, seeds, dirname, concurrency, order, dnsname, dnsttl):
+    global resolver, metrics, events
+    #
+    # Open this process's own HTTP connections, DNS resolver and structured log, and start its own metrics
+    #
+    httpclient.reset()
+    metrics = Metrics()
+    sharddir = shardpath(dirname, shard)
+    events = openevents(sharddir + "/shard-events.jsonl", "w")
+    events.phase = "resources"
+    events.event("info", "shard", shard=shard, seeds=len(seeds))
+    if dnsname != "":
+        resolver = Resolver(dnsname, ttl=dnsttl)
+        resolver.filename = sharddir + "/shard-dnscache.json"
+    if policy is not None:
+        policy.filename = sharddir + "/shard-hosts.json"
+    #
+    files = [open(sharddir + "/" + name,"w") for name in shardnames]
+    csvfile, redirfile, logfile, errfile = files
+    logfile.write("BEGIN: shard " + str(shard) + " with " + str(len(seeds)) + " well-known.dev resources\n")
+    #
+    frontier = Frontier(order, visited, expected)
+    crawl(seeds, frontier, sharddir, csvfile, redirfile, logfile, errfile, concurrency, priority=DISCOVERED)
+    #
+    logfile.write("END: shard " + str(shard) + "\n")
+    events.close()
+    visited.write(sharddir + "/shard-visited.csv")
+    metrics.write(sharddir + "/shard-metrics.json")
+    metrics.writetimes(sharddir + "/shard-timings.csv")
+    file = open(sharddir + "/shard-manifest.json","w")
+    json.dump(manifest, file)
+    file.close()
+    httpclient.close()
+    if resolver is not None:
+        resolver.save()
+    if policy is not None:
+        policy.save()
+    for file in files:
+        file.close()
+#
+# mergeshards(dirname, shards, files) - Append the .csv and log files of each shard to the given Webcrawl-YYYY-MM-DD [csvfile, redirfile,
+# logfile, errfile] files and its structured log to this process's, move its trust.txt files into dirname, add its visited index,
+# manifest, timings, DNS cache and host policy to this process's, and remove its subdirectory. A domain referenced from the seeds of more than one shard is crawled by each of them, so lines of the .csv,
+# redirects, and error files already merged from another shard are skipped.
+#
+def mergeshards (dirname, shards, files):
+    #
+    seen = [set(), set(), None, set()]
+    for shard in range(shards):
+        sharddir = shardpath(dirname, shard)
+        if not os.path.isfile(sharddir + "/shard-visited.csv"):
+            files[2].write("Shard " + str(shard) + " did not complete\n")
+        #
+        for name, outfile, lines in zip(shardnames, files, seen):
+            if not os.path.isfile(sharddir + "/" + name):
+                continue
+            file = open(sharddir + "/" + name,"r")
+            for line in file:
+                if lines is not None:
+                    if line in lines:
+                        continue
+                    lines.add(line)
+                outfile.write(line)
+            file.close()
+        for name in ["shard-events.jsonl", "shard-events.jsonl.gz"]:
+            if os.path.isfile(sharddir + "/" + name):
+                events.include(sharddir + "/" + name)
         #
-    return
+        if os.path.isfile(sharddir + "/shard-visited.csv"):
+            visited.read(sharddir + "/shard-visited.csv")
+        if os.path.isfile(sharddir + "/shard-manifest.json"):
+            file = open(sharddir + "/shard-manifest.json","r")
+            manifest.update(json.load(file))
+            file.close()
+        if os.path.isfile(sharddir + "/shard-metrics.json"):
+            metrics.read(sharddir + "/shard-metrics.json")
+        if os.path.isfile(sharddir + "/shard-timings.csv"):
+            metrics.times.update(readtimes(sharddir + "/shard-timings.csv"))
+        if (resolver is not None) and os.path.isfile(sharddir + "/shard-dnscache.json"):
+            resolver.read(sharddir + "/shard-dnscache.json")
+        if (policy is not None) and os.path.isfile(sharddir + "/shard-hosts.json"):
+            policy.read(sharddir + "/shard-hosts.json")
+        #
+        for name in os.listdir(sharddir):
+            if name.endswith("-trust.txt"):
+                os.replace(sharddir + "/" + name, dirname + "/" + name)
+        shutil.rmtree(sharddir)
+#
+# coordinate(dbname, dirname, rootdomain, resname, workers) - Start a distributed crawl: create the Webcrawl-YYYY-MM-DD directory and
+# the shared frontier database (see sharedfrontier.py) for the given number of workers, and queue the root domain and the well-known.dev
+# resources on it. Running it again on an existing database keeps the outcomes already recorded, so the crawl carries on from there.
+#
+def coordinate (dbname, dirname, rootdomain, resname, workers):
+    #
+    if not os.path.isdir(dirname):
+        os.mkdir(dirname)
+    frontier = SharedFrontier(dbname)
+    frontier.create(dirname, workers)
+    frontier.push(rootdomain, "self", rootdomain, priority=ROOT)
+    if os.path.isfile(resname):
+        frontier.extend([[domain, "self", domain] for domain in readresources(resname)], priority=DISCOVERED)
+    print ("Queued", len(frontier.outcomes()), "domains in", dbname, "for", workers, "workers to crawl into", dirname)
+    frontier.close()
+#
+# runworker(dbname, worker, concurrency, lease) - Crawl the domains claimed from the shared frontier as the given worker, writing the
+# trust.txt files and the .csv, log, visited and manifest files into the worker's subdirectory of the Webcrawl-YYYY-MM-DD directory
+# recorded in the database. Keeps claiming until every domain queued by any of the workers has been crawled. A worker that is restarted
+# appends to its earlier output.
+#
+def runworker (dbname, worker, concurrency, lease):
+    global events
+    #
+    frontier = SharedFrontier(dbname, worker, lease)
+    dirname = frontier.get("dirname")
+    if dirname == "":
+        print (dbname, "has not been created by webcrawler.py --coordinator")
+        return
+    sharddir = shardpath(dirname, worker)
+    os.makedirs(sharddir, exist_ok=True)
+    if os.path.isfile(sharddir + "/shard-manifest.json"):
+        file = open(sharddir + "/shard-manifest.json","r")
+        manifest.update(json.load(file))
+        file.close()
+    #
+    files = [open(sharddir + "/" + name,"a") for name in shardnames]
+    csvfile, redirfile, logfile, errfile = files
+    frontier.visited.files = files
+    logfile.write("BEGIN: worker " + str(worker) + " of " + str(frontier.workers()) + " " + time.asctime( time.localtime(time.time()) ) + "\n")
+    events = openevents(sharddir + "/shard-events.jsonl", "a")
+    events.phase = "worker"
+    events.event("info", "worker", worker=worker, workers=frontier.workers())
+    #
+    # Crawl until there are no tasks left to claim, then wait for the other workers' leased tasks, which may queue more or expire
+    #
+    while True:
+        crawl([], frontier, sharddir, csvfile, redirfile, logfile, errfile, concurrency)
+        for file in files:
+            file.flush()
+        if frontier.done():
+            break
+        time.sleep(1)
+    #
+    logfile.write("END: worker " + str(worker) + " " + time.asctime( time.localtime(time.time()) ) + "\n")
+    events.close()
+    frontier.visited.write(sharddir + "/shard-visited.csv")
+    metrics.write(sharddir + "/shard-metrics.json")
+    metrics.writetimes(sharddir + "/shard-timings.csv")
+    file = open(sharddir + "/shard-manifest.json","w")
+    json.dump(manifest, file)
+    file.close()
+    frontier.close()
+    for file in files:
+        file.close()
+#
+# mergeworkers(dbname) - Merge the outputs of the workers of a completed distributed crawl into the Webcrawl-YYYY-MM-DD directory, with
+# the outcome of every domain taken from the shared frontier.
+#
+def mergeworkers (dbname):
+    global events
+    #
+    frontier = SharedFrontier(dbname)
+    dirname = frontier.get("dirname")
+    if dirname == "":
+        print (dbname, "has not been created by webcrawler.py --coordinator")
+        return
+    if not frontier.done():
+        print ("The crawl in", dbname, "is not complete")
+        return
+    #
+    csvname = dirname + "/" + dirname + ".csv"
+    names = [csvname, dirname + "/" + dirname + "-redirects.csv", dirname + "/" + dirname + "-log.txt", dirname + "/" + dirname + "-err.csv"]
+    files = [open(name,"w") for name in names]
+    csvfile, redirfile, logfile, errfile = files
+    logfile.write("START: " + time.asctime( time.localtime(time.time()) ) + "\n")
+    logfile.write("Directory name: " + dirname + "\n")
+    logfile.write(".csv file name: " + csvname + "\n")
+    logfile.write("-err.csv file name: " + names[3] + "\n")
+    logfile.write("Log file name: " + names[2] + "\n")
+    logfile.write("Merging " + str(frontier.workers()) + " workers of " + dbname + "\n")
+    events = openevents(dirname + "/" + dirname + "-events.jsonl", "w")
+    events.phase = "merge"
+    events.event("info", "start", dirname=dirname, workers=frontier.workers())
+    csvfile.write ("srcurl,attr,refurl\n")
+    redirfile.write("srcurl,redirect\n")
+    errfile.write ("srcurl,attr,refurl,error\n")
+    #
+    mergeshards(dirname, frontier.workers(), files)
+    for domain, outcome in frontier.outcomes():
+        visited.mark(domain, outcome)
+    writemanifest(dirname)
+    visited.write(dirname + "/" + dirname + "-visited.csv")
+    metrics.write(dirname + "/" + dirname + "-metrics.json")
+    metrics.writeprom(dirname + "/" + dirname + "-metrics.prom")
+    metrics.writetimes(dirname + "/" + dirname + "-timings.csv")
+    if store is not None:
+        count = snapstore.ingest(store, dirname, remove=True)
+        logfile.write("Moved " + str(count) + " trust.txt files to the snapshot store, " + str(len(store)) + " distinct files\n")
+    logfile.write("END: " + time.asctime( time.localtime(time.time()) ) + "\n")
+    events.event("info", "end", domains=len(visited))
+    events.close()
+    frontier.close()
+    for file in files:
+        file.close()
 #
 # Main program
 #
@@ -517,95 +1154,308 @@ if not sys.warnoptions:
     import warnings
     warnings.simplefilter("ignore")
 #
-# Set root_url
+# Create argument parser
 #
-if len(sys.argv) > 1:
-    rootdomain = sys.argv[1]
-else:
-    rootdomain = "journallist.net"
+parser = argparse.ArgumentParser(description="Recursively crawl the trust.txt files referenced from ROOT_DOMAIN and the well-known.dev resources.csv list.")
+parser.add_argument("-c", "--concurrency", help="number of trust.txt files to fetch at once, default 1 (serial crawl)", type=int, default=1, action="store")
+parser.add_argument("-o", "--order", help="order to crawl the referenced domains, \"dfs\" (depth first, default), \"bfs\" (breadth first), or \"priority\" (member tree first, slowest first)", type=str, choices=orders, default="dfs", action="store")
+parser.add_argument("-i", "--incremental", help="send conditional GETs using the manifest of the most recent earlier Webcrawl directory and reuse its trust.txt files when not modified", action="store_true")
+parser.add_argument("-r", "--resume", help="resume today's interrupted crawl from its checkpoint", action="store_true")
+parser.add_argument("-k", "--checkpoint", help="seconds between checkpoints of the crawl, default 60, 0 to disable", type=float, default=60, action="store")
+parser.add_argument("-d", "--dns-cache", help="resolve domains ahead of fetching them, caching the results in DNS_CACHE, and skip those that do not exist", type=str, default="", action="store")
+parser.add_argument("-t", "--dns-ttl", help="seconds to keep DNS results in the cache, default 86400", type=int, default=86400, action="store")
+parser.add_argument("-p", "--pool-size", help="number of hosts to keep HTTP connections alive to, default 100", type=int, default=100, action="store")
+parser.add_argument("-s", "--shards", help="number of processes to crawl the well-known.dev resource list with, default 1 (this process)", type=int, default=1, action="store")
+parser.add_argument("-m", "--max-size", help="largest trust.txt file to download, in bytes, default 1048576", type=int, default=1048576, action="store")
+parser.add_argument("--snapstore", help="move the trust.txt files into the content-addressed snapshot store SNAPSTORE at the end of the crawl", type=str, default="", action="store")
+parser.add_argument("--host-policy", help="adapt the timeouts of each host to its response times and skip hosts that keep failing, keeping their state in HOST_POLICY", type=str, default="", action="store")
+parser.add_argument("--breaker", help="with --host-policy, consecutive failures of a host before it is skipped, default 3, 0 never skips", type=int, default=3, metavar="FAILURES", action="store")
+parser.add_argument("--race", help="fetch the /trust.txt and /.well-known/trust.txt urls of each domain at once rather than in turn", action="store_true")
+parser.add_argument("-q", "--sqlite", help="write the .csv, -err.csv and -redirects.csv rows into the SQLite database Webcrawl-YYYY-MM-DD.db instead", action="store_true")
+parser.add_argument("-e", "--export-csv", help="with --sqlite, also export the .csv, -err.csv and -redirects.csv files from the database at the end of the crawl", action="store_true")
+parser.add_argument("--coordinator", help="start a distributed crawl with its shared frontier in the SQLite database COORDINATOR", type=str, default="", metavar="DB", action="store")
+parser.add_argument("--worker", help="crawl as a worker of the distributed crawl in the SQLite database WORKER", type=str, default="", metavar="DB", action="store")
+parser.add_argument("--merge", help="merge the outputs of the workers of the distributed crawl in the SQLite database MERGE", type=str, default="", metavar="DB", action="store")
+parser.add_argument("--workers", help="number of workers of the distributed crawl, default 1", type=int, default=1, action="store")
+parser.add_argument("--worker-id", help="this worker's number, from 0 to WORKERS-1, default 0", type=int, default=0, action="store")
+parser.add_argument("--lease", help="seconds a worker has to crawl a domain before another worker may claim it, default 600", type=float, default=600, action="store")
+parser.add_argument("-l", "--log-level", help="also write the structured log Webcrawl-YYYY-MM-DD-events.jsonl with the events of LOG_LEVEL and above", type=str, default="", choices=["debug", "info", "warning", "error"], action="store")
+parser.add_argument("-z", "--log-gzip", help="with --log-level, compress the structured log with gzip", action="store_true")
+parser.add_argument("rootdomain", help="domain where to begin the webcrawl, default journallist.net", type=str, nargs="?", default="journallist.net", action="store")
+#
+# Parse arguments
+#
+args = parser.parse_args()
+#
+# Set root domain and concurrency
+#
+rootdomain = args.rootdomain
+concurrency = max(1, args.concurrency)
+#
+# Keep connections alive to at least as many hosts as are fetched from at once
+#
+httpclient.configure(connections=max(args.pool_size, concurrency), threads=2*concurrency)
+racing = args.race
+if args.snapstore != "":
+    store = snapstore.Store(args.snapstore)
+maxbytes = args.max_size
+#
+# Create the DNS resolver and host policy if enabled
+#
+if args.dns_cache != "":
+    resolver = Resolver(args.dns_cache, ttl=args.dns_ttl)
+if args.host_policy != "":
+    policy = HostPolicy(args.host_policy, threshold=args.breaker)
 #
 rooturl = "https://" + rootdomain
 #
 # Create directory name to contain today's webcrawl "Webcrawl-YYYY-MM-DD". If bail if it already
-# exists
+# exists, unless resuming an interrupted crawl from its checkpoint.
 #
 dirname = "Webcrawl-"+time.strftime("%Y-%m-%d")
-if (not os.path.isdir(dirname)):
-    #
-    # Create directory for today's webcrawl
-    #
-    os.mkdir(dirname)
+checkname = dirname + "/" + dirname + "-checkpoint.json"
+resume = args.resume and os.path.isfile(checkname)
+if args.coordinator != "":
+    coordinate(args.coordinator, dirname, rootdomain, "resources.csv", max(1, args.workers))
+elif args.worker != "":
+    runworker(args.worker, args.worker_id, concurrency, args.lease)
+    httpclient.close()
+    if resolver is not None:
+        resolver.save()
+    if policy is not None:
+        policy.save()
+elif args.merge != "":
+    mergeworkers(args.merge)
+elif (not os.path.isdir(dirname)) or resume:
     #
-    # Open .csv and log files
+    # Set the .csv and log file names
     #
     csvname = dirname + "/" + dirname + ".csv"
-    csvfile = open(csvname,"w")
     redirname = dirname + "/" + dirname + "-redirects.csv"
-    redirfile = open(redirname,"w")
     logname = dirname + "/" + dirname + "-log.txt"
-    logfile = open(logname,"w")
     errname = dirname + "/" + dirname + "-err.csv"
-    errfile = open(errname,"w")
+    dbname = dirname + "/" + dirname + ".db"
+    names = [csvname, redirname, logname, errname]
     #
-    # Log start time , directory name, .csv file, and log file names
     #
-    logfile.write("START: " + time.asctime( time.localtime(time.time()) ) + "\n")
-    logfile.write("Directory name: " + dirname + "\n")
-    logfile.write(".csv file name: " + csvname + "\n")
-    logfile.write("-err.csv file name: " + errname + "\n")
-    logfile.write("Log file name: " + logname + "\n")
+    # With the "priority" order, read the time each domain took in the previous crawl
     #
-    # Write headers to .csv, redirects, and error files
+    timingsdir = ""
+    if args.order == "priority":
+        timingsdir = findprevious(dirname)
+        if (timingsdir != "") and os.path.isfile(timingsdir + "/" + timingsdir + "-timings.csv"):
+            expected = readtimes(timingsdir + "/" + timingsdir + "-timings.csv")
+    frontier = Frontier(args.order, visited, expected)
+    sink = None
+    if resume:
+        #
+        # Restore the state of the crawl from the checkpoint and reopen the .csv and log files, discarding anything written after it
+        #
+        state = checkpoint.read(checkname)
+        phase = state["phase"]
+        frontier.load(state["frontier"])
+        for domain, outcome in state["visited"].items():
+            visited.mark(domain, outcome)
+        manifest.update(state["manifest"])
+        #
+        # Carry on the metrics and times of the domains crawled before the checkpoint, and the elapsed time of the crawl
+        #
+        if "metrics" in state:
+            metrics.add(state["metrics"])
+            metrics.start -= state["metrics"]["elapsed"]
+            metrics.times.update(state["times"])
+        if args.sqlite:
+            #
+            # Rows written to the database after the checkpoint are kept, those written again are ignored as duplicates
+            #
+            sink = Sink(dbname)
+            csvfile, redirfile, errfile = sink.table("trust_txt"), sink.table("redirects"), sink.table("http_errors")
+            logfile = checkpoint.reopen([logname], [state["offsets"][2]])[0]
+        else:
+            csvfile, redirfile, logfile, errfile = checkpoint.reopen(names, state["offsets"])
+        logfile.write("RESUME: " + time.asctime( time.localtime(time.time()) ) + " from checkpoint with " + str(len(frontier)) + " domains to crawl\n")
+        #
+        # Append to the structured log, the events logged after the checkpoint are logged again as the crawl repeats them
+        #
+        events = openevents(dirname + "/" + dirname + "-events.jsonl", "a")
+        events.phase = phase
+        events.event("info", "resume", dirname=dirname, frontier=len(frontier))
+    else:
+        #
+        # Create directory for today's webcrawl
+        #
+        os.mkdir(dirname)
+        phase = "root"
+        #
+        # Open .csv and log files, or the database tables the .csv rows are written to instead
+        #
+        logfile = open(logname,"w")
+        if args.sqlite:
+            sink = Sink(dbname)
+            csvfile, redirfile, errfile = sink.table("trust_txt"), sink.table("redirects"), sink.table("http_errors")
+        else:
+            csvfile = open(csvname,"w")
+            redirfile = open(redirname,"w")
+            errfile = open(errname,"w")
+        #
+        # Log start time , directory name, .csv file, and log file names
+        #
+        logfile.write("START: " + time.asctime( time.localtime(time.time()) ) + "\n")
+        logfile.write("Directory name: " + dirname + "\n")
+        if args.sqlite:
+            logfile.write("Database name: " + dbname + "\n")
+        else:
+            logfile.write(".csv file name: " + csvname + "\n")
+            logfile.write("-err.csv file name: " + errname + "\n")
+        logfile.write("Log file name: " + logname + "\n")
+        events = openevents(dirname + "/" + dirname + "-events.jsonl", "w")
+        events.phase = phase
+        events.event("info", "start", dirname=dirname, root=rootdomain, concurrency=concurrency, order=args.order)
+        #
+        # Write headers to .csv, redirects, and error files
+        #
+        if not args.sqlite:
+            csvfile.write ("srcurl,attr,refurl\n")
+            redirfile.write("srcurl,redirect\n")
+            errfile.write ("srcurl,attr,refurl,error\n")
     #
-    csvfile.write ("srcurl,attr,refurl\n")
-    redirfile.write("srcurl,redirect\n")
-    errfile.write ("srcurl,attr,refurl,error\n")
+    # If crawling incrementally, read the manifest of the previous crawl.
+    #
+    if args.incremental:
+        prevdir = findprevious(dirname)
+        if prevdir != "":
+            previous = readmanifest(prevdir)
+            prevsnapshots = snapstore.readmanifest(prevdir)
+            logfile.write("Incremental crawl against: " + prevdir + "\n")
+    if len(expected) > 0:
+        logfile.write("Expected times of " + str(len(expected)) + " domains from: " + timingsdir + "\n")
+    #
+    # savecheckpoint(inflight) - Write a checkpoint, at most every args.checkpoint seconds, of the current phase, the frontier, the
+    # visited index, the manifest, the metrics and the time taken by each domain, and the lengths of the .csv and log files. Returns
+    # True, without writing it, if one is due but the inflight list of tasks being fetched is not empty, as those fetches record their
+    # metrics and write their files as they complete (see crawl).
+    #
+    # If force is True, write it regardless of when the last one was written.
     #
-    # Process the root url
+    lastcheckpoint = time.time()
+    def savecheckpoint (inflight, force=False):
+        global lastcheckpoint
+        if (args.checkpoint <= 0) or ((time.time() - lastcheckpoint < args.checkpoint) and not force):
+            return False
+        if len(inflight) > 0:
+            return True
+        with metrics.lock:
+            times = dict(metrics.times)
+        state = {
+            "phase": phase,
+            "frontier": frontier.dump(),
+            "visited": visited.outcomes,
+            "manifest": manifest,
+            "metrics": metrics.todict(),
+            "times": times,
+            "offsets": checkpoint.offsets([csvfile, redirfile, logfile, errfile])
+        }
+        checkpoint.write(checkname, state)
+        events.event("debug", "checkpoint", frontier=len(state["frontier"]))
+        lastcheckpoint = time.time()
+        return False
     #
-    retcount = process(rootdomain, "self", rootdomain, dirname, csvfile, redirfile, logfile, errfile)
+    # Process the root url, or when resuming the rest of the phase that was interrupted
+    #
+    if resume:
+        crawl([], frontier, dirname, csvfile, redirfile, logfile, errfile, concurrency, savecheckpoint)
+    else:
+        crawl([[rootdomain, "self", rootdomain]], frontier, dirname, csvfile, redirfile, logfile, errfile, concurrency, savecheckpoint, ROOT)
     #
     # If well-known.dev resource list obtained from (https://well-known.dev/?q=resource%3Atrust.txt+is_base_domain%3Atrue) exists process each entry.
     # Each entry is a tuple of [rank, domain, resource, status, scan_dt, simhash]
     #
     resname = "resources.csv"
-    if os.path.isfile(resname):
+    if os.path.isfile(resname) and (phase == "root") and (args.shards > 1):
         #
-        logfile.write("BEGIN: processing well-known.dev resource list\n")
-        resfile = open(resname,"r")
+        # Partition the domains across the shards
         #
-        # Read the lines of the resource file
+        logfile.write("BEGIN: processing well-known.dev resource list in " + str(args.shards) + " shards\n")
+        events.phase = "resources"
+        shardseeds = [[] for shard in range(args.shards)]
+        for domain in readresources(resname):
+            shardseeds[shardof(domain, args.shards)].append([domain, "self", domain])
         #
-        lines = resfile.readlines()
+        # Checkpoint before starting the shards, still in the "root" phase, so that if interrupted the resume starts them over. Flush
+        # the files so the shard processes don't inherit anything buffered.
         #
-        # Process the domain for each line.
+        savecheckpoint([], force=True)
+        for file in [csvfile, redirfile, logfile, errfile]:
+            file.flush()
+        events.flush()
         #
-        for line in lines:
-            tuple = line.split(",",5)
-            if tuple[0] != "rank":
-                domain, subdomain, subdir = normalize(tuple[1])
-                if (subdomain != ""):
-                    domain = subdomain + "." + domain
-                #
-                # Check if subdomain matches one of the subdomains that shoud be skipped
-                #
-                found = False
-                for i in range(0,len(well_known_skip)):
-                    if (subdomain == well_known_skip[i]):
-                        found = True
-                #
-                if not found:
-                    retcount = process(domain, "self", domain, dirname, csvfile, redirfile, logfile, errfile)
+        # Crawl each shard in its own process, then merge their outputs
+        #
+        context = multiprocessing.get_context("fork")
+        processes = []
+        for shard in range(args.shards):
+            sharddir = shardpath(dirname, shard)
+            if os.path.isdir(sharddir):
+                shutil.rmtree(sharddir)
+            os.mkdir(sharddir)
+            process = context.Process(target=crawlshard, args=(shard, shardseeds[shard], dirname, concurrency, args.order, args.dns_cache, args.dns_ttl))
+            process.start()
+            processes.append(process)
+        for shard in range(args.shards):
+            processes[shard].join()
+            if processes[shard].exitcode != 0:
+                logfile.write("Shard " + str(shard) + " exited with code " + str(processes[shard].exitcode) + "\n")
+        mergeshards(dirname, args.shards, [csvfile, redirfile, logfile, errfile])
+        phase = "resources"
+    elif os.path.isfile(resname) and (phase == "root"):
+        #
+        phase = "resources"
+        events.phase = phase
+        logfile.write("BEGIN: processing well-known.dev resource list\n")
+        seeds = [[domain, "self", domain] for domain in readresources(resname)]
+        crawl(seeds, frontier, dirname, csvfile, redirfile, logfile, errfile, concurrency, savecheckpoint, DISCOVERED)
+    #
+    # Write the manifest and log ending time.
+    #
+    writemanifest(dirname)
+    visited.write(dirname + "/" + dirname + "-visited.csv")
+    metrics.write(dirname + "/" + dirname + "-metrics.json")
+    metrics.writeprom(dirname + "/" + dirname + "-metrics.prom")
+    metrics.writetimes(dirname + "/" + dirname + "-timings.csv")
+    if store is not None:
+        count = snapstore.ingest(store, dirname, remove=True)
+        logfile.write("Moved " + str(count) + " trust.txt files to the snapshot store, " + str(len(store)) + " distinct files\n")
     #
-    # Log ending time.
+    # If requested, export the .csv files from the database
     #
+    if (sink is not None) and args.export_csv:
+        sink.export("trust_txt", csvname)
+        sink.export("redirects", redirname)
+        sink.export("http_errors", errname)
+        logfile.write("Exported: " + csvname + ", " + redirname + ", " + errname + "\n")
+    if policy is not None:
+        hosts, opened = policy.stats()
+        logfile.write("Circuit breaker open for " + str(opened) + " of " + str(hosts) + " hosts\n")
     logfile.write("END: " + time.asctime( time.localtime(time.time()) ) + "\n")
+    events.event("info", "end", domains=len(visited), seconds=round(time.time() - metrics.start, 3))
     #
-    # Close the .csv, log, err files
+    # Close the HTTP connections, the .csv, log, err files or database, and the structured log, the crawl is complete so remove the
+    # checkpoint
     #
+    httpclient.close()
+    if resolver is not None:
+        resolver.save()
+    if policy is not None:
+        policy.save()
     csvfile.close()
     redirfile.close()
     logfile.close()
     errfile.close()
+    events.close()
+    if sink is not None:
+        sink.close()
+    checkpoint.remove(checkname)
+elif args.resume:
+    print (dirname, "already exists and has no checkpoint to resume from")
 else:
-    print (dirname, "already exists")
\ No newline at end of file
+    print (dirname, "already exists")